@@ -2,91 +2,53 @@ import time
 import os
 import re
 import json
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+import sys
 from selenium.common.exceptions import (
-    NoSuchElementException,
     TimeoutException,
     WebDriverException,
 )
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-# Function to find an element using multiple selectors
-def find_element_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                return context.find_element(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                return context.find_element(By.CSS_SELECTOR, selector['value'])
-        except NoSuchElementException:
-            continue
-    return None  # If none of the selectors match
-
-# Function to find multiple elements using multiple selectors
-def find_elements_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                elements = context.find_elements(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                elements = context.find_elements(By.CSS_SELECTOR, selector['value'])
-            if elements:
-                return elements
-        except NoSuchElementException:
-            continue
-    return []  # If none of the selectors match
+from browser_factory import LazyDriver, create_chrome_driver, chrome_options
+from page_ready import wait_until_ready, print_ready_report
+from lazy_scroll import scroll_until_stable, iter_new_links, print_scroll_report
+from rate_limiter import polite_get, print_rate_report
+from tab_manager import tab_manager_for, quit_driver, print_tab_report
+from master_store import append_master_record, master_index_path, export_master_list
+from crawl_frontier import CrawlFrontier, print_frontier_report
+from selector_lookup import find_element_by_selectors, find_elements_by_selectors
+from selector_stats import print_selector_report
 
 # Function to sanitize filenames
 def sanitize_filename(name):
     return re.sub(r'[<>:"/\\|?*]', '', name)
 
-# Setup Chrome options
-options = webdriver.ChromeOptions()
-# options.add_argument("--headless")  # Uncomment this if you want to run headless
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--window-size=1920,1080")  # Set a larger window size
+# Setup Chrome options from the run's browser profile (SCRAPER_PROFILE=debug for a visible 1920x1080 window)
+options = chrome_options()
 
-# Initialize the WebDriver
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# Initialize the WebDriver lazily: Chrome starts on the first page load, not at import
+driver = LazyDriver(lambda: create_chrome_driver(options))
 
 # Base URL
 base_url = 'https://www.skipthedishes.com'
 
-# Global set to track processed merchants
-processed_merchants_global = set()
-
-# Function to scroll down incrementally
-def scroll_down(driver, scroll_pause_time=0.5, scroll_increment=500):
-    driver.execute_script(f"window.scrollBy(0, {scroll_increment});")
-    time.sleep(scroll_pause_time)
+# Persistent frontier keeping track of discovered, processed and failed merchants across runs
+frontier = CrawlFrontier()
 
 # Function to scrape a single merchant page using your correct inner code
 def scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory):
-    if merchant_url in processed_merchants_global:
+    # Skip merchants already scraped in this or an earlier run
+    if not frontier.claim(merchant_url, 'skip', city):
         print(f"Merchant already scraped: {merchant_url}")
         return
 
+    tabs = tab_manager_for(driver)
     try:
-        # Open a new tab
-        driver.execute_script("window.open('');")
-        # Switch to the new tab
-        driver.switch_to.window(driver.window_handles[-1])
-        # Navigate to the merchant URL
-        driver.get(merchant_url)
-        wait = WebDriverWait(driver, 10)
+        # Navigate the long-lived worker tab to the merchant URL (the list tab is left untouched)
+        tabs.navigate(merchant_url)
+        wait_until_ready(driver, 'skip_merchant')  # Wait for the rendered menu instead of a fixed sleep
 
         # Scroll to load all content
-        def scroll_to_bottom(driver, scrolls=200):
-            for _ in range(scrolls):
-                driver.execute_script("window.scrollBy(0, 400);")  # Scroll down by 200 pixels
-                time.sleep(0.1)  # Wait for new content to load
-
-        scroll_to_bottom(driver)
+        scroll_until_stable(driver, {'type': 'css', 'value': 'h3'}, max_steps=200, label=merchant_url)
 
         # Scrape clean URL for the merchant
         clean_url = merchant_url.split("/")[-1]
@@ -261,26 +223,23 @@ def scrape_merchant(merchant_url, error_log, city, save_directory, base_save_dir
             'merchant_icon': banner_image_url,
             'clean_url': clean_url
         }
-        all_merchants.append(merchant_info)
-        processed_merchants_global.add(merchant_url)
 
-        # Update the master list JSON
+        # Append to the master list index (all_merchants.json is exported at the end of the run)
         master_list_path = os.path.join(base_save_directory, "all_merchants.json")
-        with open(master_list_path, 'w', encoding='utf-8') as master_file:
-            json.dump(all_merchants, master_file, ensure_ascii=False, indent=2)
+        append_master_record(master_index_path(master_list_path), merchant_info)
+        frontier.mark_done(merchant_url)
 
     except Exception as e:
         error_log.append(f"Failed to scrape merchant at {merchant_url}: {e}")
         print(f"Failed to scrape merchant at {merchant_url}: {e}")
+        frontier.mark_failed(merchant_url, e)
     finally:
-        # Close the merchant tab and switch back to the main window
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
+        # Switch back to the list tab; the worker tab stays open for the next merchant
+        tabs.release()
 
 # Main function to scrape merchants for a list of cities
 def main():
-    global all_merchants, base_save_directory
-    all_merchants = []  # Initialize a list to store all merchants' data
+    global base_save_directory
     cities = [
         "richmond",
         "vancouver",
@@ -303,10 +262,8 @@ def main():
     # Base directory where the JSON files will be saved
     base_save_directory = r'D:\skip\Skip_menu'  # Update the path as needed
 
-    # Create the master list JSON file at the start
+    # The master list index is kept across runs so merchants finished in an earlier run stay in the export
     master_list_path = os.path.join(base_save_directory, "all_merchants.json")
-    with open(master_list_path, 'w', encoding='utf-8') as master_file:
-        json.dump(all_merchants, master_file, ensure_ascii=False, indent=2)
 
     total_cities = len(cities)
     for city_index, city in enumerate(cities):
@@ -316,43 +273,31 @@ def main():
         save_directory = os.path.join(base_save_directory, city)
         os.makedirs(save_directory, exist_ok=True)
 
-        # Open the city restaurants page
         city_url = f'{base_url}/{city}/restaurants'
-        driver.get(city_url)
-        time.sleep(5)  # Wait for the page to load
-
-        # Initialize variables
-        scroll_times = 0
-        max_scroll_times = 500  # Adjust as needed
-
-        while scroll_times < max_scroll_times:
-            scroll_times += 1
-            print(f"Scrolling down... ({scroll_times}/{max_scroll_times})")
-            # Scroll down to load new merchants
-            scroll_down(driver, scroll_pause_time=1, scroll_increment=500)
-
-            # Find all merchant links currently visible
-            merchant_xpath = '//*[@id="root"]/div/main/div/div/div/div/div[3]/div[2]/div/a'
-            merchant_elements = driver.find_elements(By.XPATH, merchant_xpath)
-
-            # Extract merchant URLs
-            current_merchant_urls = []
-            for element in merchant_elements:
-                href = element.get_attribute('href')
-                if href and href not in processed_merchants_global:
-                    if href.startswith('/'):
-                        full_url = base_url + href
-                    elif href.startswith('http'):
-                        full_url = href
-                    else:
-                        full_url = base_url + '/' + href
-                    current_merchant_urls.append(full_url)
 
-            if not current_merchant_urls:
-                print("No new merchants found in this scroll.")
-                continue
+        # Resume from the frontier instead of scrolling the city list again when it was already harvested
+        if frontier.is_page_harvested(city_url):
+            pending_urls = frontier.pending('skip', city=city)
+            print(f"City list already harvested, {len(pending_urls)} merchants left.")
+            for merchant_url in pending_urls:
+                scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory)
+            print(f"Finished processing city: {city}")
+            continue
 
+        # Open the city restaurants page
+        polite_get(driver, city_url)
+        wait_until_ready(driver, 'skip_city')  # Wait for the merchant list instead of a fixed sleep
+
+        # Discover merchants incrementally: each round returns only the anchors appended since the last
+        # round (tagged in the DOM) and stops as soon as the list stops growing
+        merchant_xpath = '//*[@id="root"]/div/main/div/div/div/div/div[3]/div[2]/div/a'
+        merchant_count = 0
+        max_scroll_rounds = 1000  # Safety cap
+        for current_merchant_urls in iter_new_links(driver.execute_script, {'type': 'xpath', 'value': merchant_xpath},
+                                                    max_steps=max_scroll_rounds, stable_time=3, label=city_url):
+            merchant_count += len(current_merchant_urls)
             print(f"Found {len(current_merchant_urls)} new merchants.")
+            frontier.add(current_merchant_urls, 'skip', city, city_url)
 
             # For each new merchant, open in a new tab and scrape data
             for merchant_index, merchant_url in enumerate(current_merchant_urls):
@@ -360,10 +305,24 @@ def main():
                 print(f"Scraping merchant ({merchant_index + 1}/{len(current_merchant_urls)}) - Progress: {percentage_done:.2f}%")
                 scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory)
 
+        # Remember the city list as harvested so a restarted run does not scroll it again
+        frontier.mark_page_harvested(city_url, 'skip', city, merchant_count)
         print(f"Finished processing city: {city}")
 
+    # Export the legacy all_merchants.json from the append-only index
+    count = export_master_list(master_index_path(master_list_path), master_list_path)
+    print(f"Master list exported with {count} merchants: {master_list_path}")
+
     # Close the WebDriver
-    driver.quit()
+    quit_driver(driver)
+
+    # Report the frontier state, how long pages took to become ready and how much scrolling was needed
+    print_frontier_report(frontier, 'skip')
+    print_ready_report()
+    print_scroll_report()
+    print_rate_report()
+    print_selector_report()
+    print_tab_report()
 
     # Report errors
     if error_log:
@@ -373,5 +332,9 @@ def main():
     else:
         print("\nNo errors encountered during scraping.")
 
+# Usage: python "#finalskip.py" [--fresh]
+#   --fresh  scrolls every city list and scrapes every merchant again, ignoring what earlier runs finished
 if __name__ == "__main__":
+    if '--fresh' in sys.argv[1:]:
+        frontier.start_fresh()
     main()
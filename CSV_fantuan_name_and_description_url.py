@@ -2,118 +2,162 @@ import time
 import os
 import random
 import json
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import (
-    NoSuchElementException,
     TimeoutException,
     WebDriverException,
 )
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-# Setup Chrome options
-options = webdriver.ChromeOptions()
-# options.add_argument("--headless")  # Uncomment this if you want to run headless
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--window-size=1920,1080")  # Set a larger window size
-
-# Initialize the WebDriver
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()), options=options
-)
-
-# Function to find an element using multiple selectors
-def find_element_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                return context.find_element(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                return context.find_element(By.CSS_SELECTOR, selector['value'])
-        except NoSuchElementException:
-            continue
-    return None  # If none of the selectors match
-
-# Function to scrape merchants
-def scrape_merchants(driver):
-    # XPath for all merchant containers
-    merchant_containers_xpath = '//*[@id="scrollableDiv"]/div[1]/div/div/div/div'
-    merchant_containers = driver.find_elements(By.XPATH, merchant_containers_xpath)
-
+from browser_factory import LazyDriver, create_chrome_driver, chrome_options
+from page_ready import wait_until_ready, print_ready_report
+from lazy_scroll import iter_new_items, print_scroll_report
+from rate_limiter import polite_get, print_rate_report
+from merchant_record import append_record, from_fantuan, RECORDS_FILE_NAME
+from fantuan_store import FantuanStore, FANTUAN_DB_NAME
+from challenge_queue import challenge_queue, park_if_challenged, print_challenge_report
+
+# Setup Chrome options; the visible debug profile is kept so a parked captcha can be watched
+options = chrome_options('debug')
+
+# Initialize the WebDriver lazily: Chrome starts on the first page load, not at import, and stays
+# open for every city
+driver = LazyDriver(lambda: create_chrome_driver(options))
+
+# City page URL format
+city_url_template = 'https://www.fantuanorder.com/zh-CN/city/{}'
+
+# Also rewrite merchants_chinese.xlsx after every city (slow; otherwise export it with fantuan_store.py)
+export_excel_on_save = False
+
+# Returns the merchant rows not returned before, then scrolls #scrollableDiv down by most of its height.
+# The list is virtualized, so rows are read on every step before they leave the DOM, and scrolling by a
+# viewport (not to the end) makes sure every row is rendered at some point. The row selectors are the ones
+# the element-by-element version used.
+HARVEST_MERCHANTS_JS = """
+var list = document.getElementById('scrollableDiv');
+var seen = window.__fantuanSeen || (window.__fantuanSeen = {});
+function first(xpath, context) {
+    return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+var containers = document.evaluate('//*[@id="scrollableDiv"]/div[1]/div/div/div/div', document, null,
+                                   XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var rows = [];
+for (var i = 0; i < containers.snapshotLength; i++) {
+    var container = containers.snapshotItem(i);
+    var nameNode = first('.//div/div/div/a/div/div[2]/div[1]', container);
+    if (!nameNode) {
+        continue;
+    }
+    var link = first('.//div/div/div/a', container) || container.querySelector('a');
+    var descriptionNode = first('.//div/div[2]/span[3]', container)
+        || container.querySelector('div.info > div.others > span.stateLabel');
+    var url = link ? link.href : '';
+    var name = nameNode.innerText.trim();
+    if (seen[url || name]) {
+        continue;
+    }
+    seen[url || name] = true;
+    rows.push({
+        name: name,
+        url: url,
+        description: descriptionNode ? descriptionNode.innerText.trim() : 'No description available'
+    });
+}
+if (list) {
+    list.scrollTop = list.scrollTop + Math.max(list.clientHeight * 0.8, 200);
+    return [rows, [list.scrollHeight, list.scrollTop]];
+}
+window.scrollBy(0, Math.max(window.innerHeight * 0.8, 200));
+return [rows, [document.body.scrollHeight, window.scrollY]];
+"""
+
+# Function to scrape merchants, collecting the rows while #scrollableDiv is scrolled until it stops growing
+def scrape_merchants(driver, label=''):
     merchants = []
-    for container in merchant_containers:
-        try:
-            name_element = container.find_element(By.XPATH, './/div/div/div/a/div/div[2]/div[1]')
-            name = name_element.text.strip()
-            url_element = find_element_by_selectors(container, [
-                {'type': 'xpath', 'value': './/div/div/div/a'},
-                {'type': 'css', 'value': 'a'}
-            ])
-            url = url_element.get_attribute('href') if url_element else ""
-            description_element = find_element_by_selectors(container, [
-                {'type': 'xpath', 'value': './/div/div[2]/span[3]'},
-                {'type': 'css', 'value': 'div.info > div.others > span.stateLabel'}
-            ])
-            description = description_element.text.strip() if description_element else "No description available"
-            merchants.append({'name': name, 'url': url, 'description': description})
-        except NoSuchElementException:
-            continue
-
+    for rows in iter_new_items(driver.execute_script, HARVEST_MERCHANTS_JS, max_steps=2000,
+                               stable_time=3, step_pause=0.3, label=label):
+        merchants.extend(rows)
     return merchants
 
-# Main scraping function
-def scrape_category(category_url, save_directory):
+# Main scraping function for one city page
+def scrape_category(category_url, save_directory, store):
     try:
-        driver.get(category_url)
+        polite_get(driver, category_url)
+        city = category_url.rstrip('/').split('/')[-1]
 
-        # Adding an explicit wait to ensure the page has fully loaded
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "scrollableDiv")))
+        # Wait for the merchant list to render instead of a fixed 120 second sleep (a captcha ends the wait early)
+        wait_until_ready(driver, 'fantuan_city', timeout=120)
 
-        time.sleep(120)
-        # Check for graphic verification code (CAPTCHA)
-        try:
-            captcha_element = driver.find_element(By.XPATH, '//div[contains(@class, "captcha")]')
-            print("Graphic verification code detected. Please solve it manually and press Enter to continue...")
-            input("Press Enter after solving the captcha...")
-        except NoSuchElementException:
-            pass
+        # Park the city on a graphic verification code (CAPTCHA) instead of waiting for Enter, and go on
+        # with the next city
+        if park_if_challenged(driver.execute_script, category_url, 'fantuan', city):
+            return
 
         # Scrape merchant information
-        merchants = scrape_merchants(driver)
-
-        # Save results to an Excel file
-        if not os.path.exists(save_directory):
-            os.makedirs(save_directory)
-        excel_path = os.path.join(save_directory, 'merchants_chinese.xlsx')
-
-        # Append new data if the file already exists
-        if os.path.exists(excel_path):
-            existing_df = pd.read_excel(excel_path)
-            new_df = pd.DataFrame(merchants)
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            # Remove duplicates based on the 'url' column
-            combined_df.drop_duplicates(subset='url', keep='first', inplace=True)
-            combined_df.to_excel(excel_path, index=False)
-        else:
-            df = pd.DataFrame(merchants)
-            df.to_excel(excel_path, index=False)
-
-        print(f"Scraped {len(merchants)} merchants.")
+        merchants = scrape_merchants(driver, category_url)
+
+        # Save results to the merchant store, one upsert per merchant keyed by URL
+        new_count = store.upsert(merchants, city)
+        print(f"Scraped {len(merchants)} merchants in {city} ({new_count} new).")
+
+        # Emit the merchants in the shared record format
+        records_path = os.path.join(save_directory, RECORDS_FILE_NAME)
+        for merchant in merchants:
+            append_record(records_path, from_fantuan(merchant, city))
+        challenge_queue.mark_done(category_url)
 
     except (TimeoutException, WebDriverException) as e:
-        print(f"Error occurred: {e}")
+        print(f"Error occurred on {category_url}: {e}")
+
+# Main function to scrape the city pages with one browser
+def main():
+    # Cities to scrape (the Lower Mainland)
+    cities = [
+        'vancouver-bc',
+        'richmond-bc',
+        'burnaby-bc',
+        'surrey-bc',
+        'coquitlam-bc',
+        'port-coquitlam-bc',
+        'port-moody-bc',
+        'new-westminster-bc',
+        'north-vancouver-bc',
+        'west-vancouver-bc',
+        'delta-bc',
+        'langley-bc',
+        'white-rock-bc',
+        'maple-ridge-bc',
+    ]
+    save_directory = "E:/scraped_data"
+    os.makedirs(save_directory, exist_ok=True)
+
+    excel_path = os.path.join(save_directory, 'merchants_chinese.xlsx')
+    store = FantuanStore(os.path.join(save_directory, FANTUAN_DB_NAME))
+
+    # Carry over the workbook of runs made before the store existed, once
+    if store.count() == 0 and os.path.exists(excel_path):
+        print(f"Imported {store.import_excel(excel_path)} merchants from {excel_path}")
 
+    try:
+        for city in cities:
+            print(f"\nProcessing city: {city}")
+            scrape_category(city_url_template.format(city), save_directory, store)
+
+            # The Excel workbook is generated only on demand
+            if export_excel_on_save:
+                store.export_excel(excel_path)
+
+        # Retry the cities parked on a captcha, in this run or an earlier one
+        for item in challenge_queue.due('fantuan'):
+            print(f"\nRetrying parked city: {item['city']}")
+            scrape_category(item['url'], save_directory, store)
     finally:
+        store.close()
         driver.quit()
 
-# URL of the category page to scrape
-category_url = "https://www.fantuanorder.com/zh-CN/city/white-rock-bc"
-save_directory = "E:/scraped_data"
+    # Report the page waits and the scrolling
+    print_ready_report()
+    print_scroll_report()
+    print_rate_report()
+    print_challenge_report('fantuan')
 
-# Run the scraping function
-scrape_category(category_url, save_directory)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
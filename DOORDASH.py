@@ -1,7 +1,7 @@
-import csv, json, os, re, time
+import csv, json, os, re, sys, time
 import pandas as pd
 from tqdm import tqdm
-from DrissionPage import ChromiumPage, ChromiumOptions
+from DrissionPage import ChromiumPage
 from urllib.parse import unquote
 import traceback
 from parsel import Selector
@@ -10,26 +10,46 @@ import DrissionPage.errors
 from DrissionPage.errors import PageDisconnectedError
 from pprint import pprint
 from datetime import datetime
+from browser_pool import BrowserPool
+from master_store import append_master_record, master_index_path, export_master_list
+from crawl_frontier import CrawlFrontier, print_frontier_report
+from doordash_parse import parse_store_page
+from doordash_http import fetch_store_html, count_fetch, log_fetch_report
+from lazy_scroll import harvest_links, print_scroll_report
+from rate_limiter import polite_get, print_rate_report
+from browser_factory import chromium_options, block_tab_resources
+from snapshot_store import SnapshotStore, print_snapshot_report, replay_arguments
+from merchant_record import append_record, from_doordash, RECORDS_FILE_NAME
+from challenge_queue import challenge_queue, park_if_challenged, print_challenge_report
+from retry_scheduler import retry_scheduler, print_failure_report, MISSING_SELECTOR
 
 current_date = datetime.now()
 
 formatted_date = current_date.strftime('%m%d')
 
+# Number of tabs scraping restaurants in parallel (1 disables the pool)
+pool_size = 4
+
+# Fetch store pages over plain HTTP and only render them in a tab when the ld+json is missing
+use_http_fetch = True
+
 logger.add("D:/scraping_log.txt", rotation="500 MB")
 
-# Store processed URLs in a set to avoid redundant scraping
-processed_urls = set()
-if os.path.exists('processed_urls.txt'):
-    with open('processed_urls.txt', 'r', encoding='utf-8') as f:
-        processed_urls = set([line.strip() for line in f.readlines()])
+# Persistent frontier of discovered, processed and failed restaurant URLs (replaces processed_urls.txt)
+frontier = CrawlFrontier()
+
+# Compressed store of every fetched store page, re-parsed without a browser by --replay
+snapshots = SnapshotStore()
 
-# Load or initialize master JSON
-master_file_path = f'D:/All_Data/doordash_{formatted_date}_rawdata/master_data.json'
-if os.path.exists(master_file_path):
-    with open(master_file_path, 'r', encoding='utf-8') as master_file:
-        master_json = json.load(master_file)
-else:
-    master_json = []
+# Directory of this run's raw data
+data_path = f'D:/All_Data/doordash_{formatted_date}_rawdata'
+
+# Master JSON and the append-only index it is exported from
+master_file_path = f'{data_path}/master_data.json'
+master_index_file_path = master_index_path(master_file_path)
+
+# Cross-platform merchant records emitted next to the JSON files
+records_file_path = f'{data_path}/{RECORDS_FILE_NAME}'
 
 def clean_filename(name):
     name = unquote(name)
@@ -51,176 +71,151 @@ def reconnect_page(page):
         page.close()
     except:
         pass
-    options = ChromiumOptions().set_local_port(10020)
-    return ChromiumPage(options)
-
-def find_elements_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                elements = context.eles(f'xpath:{selector["value"]}')
-            elif selector['type'] == 'css':
-                elements = context.eles(f'css:{selector["value"]}')
-            if elements:
-                return elements
-        except DrissionPage.errors.ElementNotFoundError:
-            continue
-    return []  # If none of the selectors match
-
-def convert_price_to_integer(price_str):
+    options = chromium_options(local_port=10020)
+    return block_tab_resources(ChromiumPage(options))
+
+# Function to save one restaurant's JSON file and append it to the master index
+def save_restaurant(data, url, data_path, city=None):
+    if data['@type'] == 'Restaurant':
+        restaurant_name = data['name']
+        cleaned_url = clean_url(url)
+        logger.debug(f"Dish image: {data.get('dish_image', '')}, cuisine: {data['merchant_cuisine']}")
+
+        file_path = f'{data_path}/{cleaned_url}.json'
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        logger.info(f"Saved: {file_path}")
+
+        # Append to the master index; master_data.json is exported at the end of the run
+        append_master_record(master_index_file_path, {
+            'name': restaurant_name,
+            'url': url,
+            'clean_url': cleaned_url
+        })
+        logger.info(f"Updated master index with: {restaurant_name}")
+
+        # Emit the store in the shared record format
+        append_record(records_file_path, from_doordash(data, city))
+
+# Function to record a failed restaurant in the frontier and queue it for a retry when the failure is transient
+def record_restaurant_failure(url, error, data_path, city=None, failure_class=None):
+    retryable = retry_scheduler.record_failure(url, error, 'doordash', city, (data_path, city), failure_class)
+    frontier.mark_failed(url, error, permanent=not retryable)
+
+# Function to scrape one restaurant; a disconnected tab is recorded and raised again so the caller reconnects
+def process_restaurant(page: ChromiumPage, url, data_path, city=None):
     try:
-        # Remove currency symbols and special characters like '+'
-        cleaned_price = re.sub(r'[^0-9.]', '', price_str)
-        return int(float(cleaned_price) * 100)
-    except ValueError:
-        logger.error(f"Failed to convert price: {price_str}")
-        return None
-
-def process_restaurant(page: ChromiumPage, url, data_path):
-    try:
-        if url in processed_urls:
+        if not frontier.claim(url, 'doordash', city):
             logger.info(f"Skipping already processed URL: {url}")
             return
 
-        page.get(url)
-        time.sleep(3)
-        html = page.html
-
-        json_data = page.s_ele('@type=application/ld+json').text
-        data = json.loads(json_data)
-
-        if data['@type'] == 'Restaurant':
-            restaurant_name = data['name']
-            data['url'] = url
-
-            data['address'] = re.findall(r'"displayAddress\\":\\"(.*?)\\"', html)[0]
-            data['phone'] = re.findall(r'"phoneno\\":\\"(.*?)\\"', html)[0]
-
-            doordashOperationHourInfo = (re.findall(r'"operationSchedule\\":\[(.*)\]}}(.*),\\"banners', html)[0][0]
-                                         .replace('\\', "")
-                                         .replace('{"__typename":"OperationHours",', "")
-                                         .replace("]}", "]"))
-
-            door_pattern = r'"dayOfWeek":"(\w+)".*?"timeSlotList":\["(.*?)"\]'
-            door_matches = re.findall(door_pattern, doordashOperationHourInfo, re.DOTALL)
-
-            doordashOperationHourInfo_result = {}
-            for day, slots in door_matches:
-                doordashOperationHourInfo_result[day] = [slots]
-
-            data['doordashOperationHourInfo'] = doordashOperationHourInfo_result
-
-            storeOperationHourInfo_tmp = (
-                (re.findall(r'"operationSchedule\\":\[(.*)\]},\\"doordashOperationHourInfo', html)[0].
-                 replace('\\', "").
-                 replace('{"__typename":"OperationHours",', "")).
-                replace("]}", "]"))
-
-            store_pattern = r'"dayOfWeek":"(\w+)".*?"timeSlotList":\["(.*?)"\]'
-            store_matches = re.findall(store_pattern, storeOperationHourInfo_tmp, re.DOTALL)
-
-            storeOperationHourInfo_result = {}
-            for day, slots in store_matches:
-                storeOperationHourInfo_result[day] = [slots]
-
-            data['storeOperationHourInfo'] = storeOperationHourInfo_result
-
-            try:
-                cuisine_element = page.ele('xpath://span[contains(@class, "iCdfhy") and contains(@class, "gZPeMs")]')
-                if cuisine_element:
-                    data['merchant_cuisine'] = cuisine_element.text
-                else:
-                    cuisine_element = page.ele('.iCdfhy.gZPeMs')
-                    data['merchant_cuisine'] = cuisine_element.text if cuisine_element else "Not found"
-            except Exception as e:
-                logger.error(f"merchant_cuisine: {e}")
-                data['merchant_cuisine'] = "Error: Unable to retrieve"
-
-            cleaned_url = clean_url(url)
-            
-            dish_image_selectors = [
-                {'type': 'xpath', 'value': '//img[contains(@class, "styles__StyledImg-sc-1322bgy-0")]'},
-                {'type': 'css', 'value': 'img.styles__StyledImg-sc-1322bgy-0.dfviTz'},
-                {'type': 'xpath', 'value': '//img[@alt]'},
-            ]
-            dish_images = find_elements_by_selectors(page, dish_image_selectors)
-
-            logger.debug(f"Number of images found: {len(dish_images)}")
-            if dish_images:
-                img_url = dish_images[0].attr('src')
-                logger.debug(f"Image URL: {img_url}")
-                data['dish_image'] = img_url if img_url else ''
-
-            for sec in data['hasMenu']['hasMenuSection'][0]:
-                for menu_item in sec['hasMenuItem']:
-                    menu_item_name = menu_item['name'].replace('&amp;', '&').replace('&apos;', "'").replace('&quot;', '"')
-                    menu_item['image'] = data.get('dish_image', '')
-                    price_str = menu_item.get('offers', {}).get('price')
-                    if price_str:
-                        menu_item['price'] = convert_price_to_integer(price_str) if price_str else None
-                    logger.debug(f"Menu item: {menu_item_name}, Image URL assigned: {menu_item['image']}, Price: {menu_item.get('price')}")
-
-            file_path = f'{data_path}/{cleaned_url}.json'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            logger.info(f"Saved: {file_path}")
-
-            # Add to master JSON list and save it immediately
-            master_json.append({
-                'name': restaurant_name,
-                'url': url,
-                'clean_url': cleaned_url
-            })
-
-            with open(master_file_path, 'w', encoding='utf-8') as master_file:
-                json.dump(master_json, master_file, ensure_ascii=False, indent=4)
-            logger.info(f"Updated master JSON with: {restaurant_name}")
-
-            processed_urls.add(url)
-    except json.JSONDecodeError:
+        # Fetch the raw HTML over HTTP first; the browser tab is only used when the ld+json is missing
+        data = None
+        if use_http_fetch:
+            html = fetch_store_html(url)
+            if html:
+                snapshots.save(url, html, 'doordash', city)  # Kept for offline replay
+                try:
+                    data = parse_store_page(html, url)
+                except (IndexError, KeyError) as e:
+                    logger.info(f"Incomplete store state over HTTP: {url}, {e!r}")
+            if data is None:
+                logger.info(f"No ld+json over HTTP, falling back to the browser: {url}")
+            else:
+                count_fetch('http')
+
+        if data is None:
+            polite_get(page, url)
+            time.sleep(3)
+
+            # Park a challenge page for later; the other tabs keep scraping
+            if park_if_challenged(page.run_js, url, 'doordash', city):
+                frontier.release(url, 'challenge')
+                return
+
+            html = page.html
+            snapshots.save(url, html, 'doordash', city)
+            data = parse_store_page(html, url)
+            count_fetch('browser')
+            if data is None:
+                logger.error(f"C *: {url}")
+                record_restaurant_failure(url, 'No ld+json on the store page', data_path, city, MISSING_SELECTOR)
+                return
+
+        save_restaurant(data, url, data_path, city)
+        frontier.mark_done(url)
+        challenge_queue.mark_done(url)
+        retry_scheduler.record_success(url)
+    except json.JSONDecodeError as e:
         logger.error(f"JSON: {url}")
+        record_restaurant_failure(url, e, data_path, city)
     except KeyError as e:
         logger.error(f": {url}, .: {e}")
-    except DrissionPage.errors.ElementNotFoundError:
+        record_restaurant_failure(url, e, data_path, city)
+    except DrissionPage.errors.ElementNotFoundError as e:
         logger.error(f"C *: {url}")
+        record_restaurant_failure(url, e, data_path, city)
+    except PageDisconnectedError as e:
+        logger.error(f"Tab disconnected: {url}")
+        record_restaurant_failure(url, e, data_path, city)
+        raise
     except Exception as e:
         logger.error(f"{url} : {str(e)}")
-    finally:
-        with open('processed_urls.txt', 'a', encoding='utf-8') as f:
-            f.write(url + '\n')
+        record_restaurant_failure(url, e, data_path, city)
+
+# Function to check that a worker tab still answers, raising PageDisconnectedError otherwise
+def check_tab(tab):
+    return tab.run_js('return 1;') == 1
 
 def scrape_data(page: ChromiumPage, url, data_path):
+    list_url = url
+    city = list_url.split('/')[-2].split('-')[0]
     try:
-        page.get(url)
-        time.sleep(3)
-        tab = page.new_tab()
-        city_urls = []
-        nums = 5000  #
-        for num in range(1, nums+1):
-            logger.info(f'{num}')
-            for _ in range(5):
-                try:
-                    url = page.ele('@aria-labelledby').attr('href')
-                    break
-                except DrissionPage.errors.ElementNotFoundError:
-                    time.sleep(0.5)
-            else:
-                logger.info(f'')
-                break
-            city_urls.append(url)
-            xpath = page.ele('@aria-labelledby').parent(2).xpath
-            page.run_js(
-                f'''document.evaluate('{xpath}', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue.remove()''')
-
-        for url in city_urls:
+        # Resume from the frontier instead of harvesting the city list again when it was already harvested
+        if frontier.is_page_harvested(list_url):
+            city_urls = frontier.pending('doordash', source_page=list_url)
+            logger.info(f"City list already harvested, {len(city_urls)} restaurants left: {list_url}")
+        else:
+            polite_get(page, url)
+            time.sleep(3)
+
+            # Collect the store links in batches: each JS call returns the new hrefs and loads the next batch
+            city_urls = harvest_links(page.run_js, {'type': 'css', 'value': 'a[aria-labelledby]'},
+                                      max_steps=5000, stable_time=3, label=list_url)
+
+            frontier.add(city_urls, 'doordash', city, list_url)
+            frontier.mark_page_harvested(list_url, 'doordash', city, len(city_urls))
+
+        # Scrape the restaurants with a pool of tabs, each recovering on its own when it disconnects
+        if pool_size > 1:
+            logger.info(f"Scraping {len(city_urls)} restaurants with {pool_size} tabs")
+            with BrowserPool(
+                lambda: block_tab_resources(page.new_tab()),
+                lambda worker_tab: worker_tab.close(),
+                size=pool_size,
+                crash_exceptions=(PageDisconnectedError,),
+                check_browser=check_tab,
+                item_retries=0,  # A disconnected restaurant is already queued by retry_scheduler
+            ) as pool:
+                pool.map(lambda worker_tab, store_url: process_restaurant(worker_tab, store_url, data_path, city), city_urls)
+        else:
+            # Without a pool one extra tab scrapes the restaurants while the list page stays open
+            tab = block_tab_resources(page.new_tab())
             try:
-                process_restaurant(tab, url, data_path)
-            except PageDisconnectedError:
-                logger.error(f"URL {url} ")
-                page = reconnect_page(page)
-                tab = page.new_tab()
-            except Exception as e:
-                logger.error(f"URL {url} : {str(e)}")
+                for url in city_urls:
+                    try:
+                        process_restaurant(tab, url, data_path, city)
+                    except PageDisconnectedError:
+                        logger.error(f"URL {url} ")
+                        page = reconnect_page(page)
+                        tab = block_tab_resources(page.new_tab())
+                    except Exception as e:
+                        logger.error(f"URL {url} : {str(e)}")
+            finally:
+                try:
+                    tab.close()
+                except Exception:
+                    pass
 
     except PageDisconnectedError:
         logger.error(f"ub{url}")
@@ -230,11 +225,44 @@ def scrape_data(page: ChromiumPage, url, data_path):
 
     return page  
 
+# Function to export master JSON file from the append-only index
+def export_master_json():
+    if os.path.exists(master_index_file_path):
+        count = export_master_list(master_index_file_path, master_file_path, merge_existing=True, indent=4)
+        logger.info(f"Master JSON file saved with {count} restaurants: {master_file_path}")
+
+# Function to re-run the extraction on stored store pages without starting a browser
+def replay_snapshots(date=None):
+    count = 0
+    for url, city, html in snapshots.iter_snapshots('doordash', date):
+        rest_data_path = f'{data_path}/dd_{city}'
+        os.makedirs(rest_data_path, exist_ok=True)
+        try:
+            data = parse_store_page(html, url)
+            if data is None:
+                logger.warning(f"No ld+json in the stored page: {url}")
+                continue
+            save_restaurant(data, url, rest_data_path, city)
+            count += 1
+        except Exception as e:
+            logger.error(f"Failed to replay {url}: {e!r}")
+
+    export_master_json()
+    logger.info(f"Replayed {count} store snapshots" + (f" from {date}" if date else ""))
+
+# Usage: python DOORDASH.py [--fresh] [--replay [--date YYYY-MM-DD]]
+#   --fresh  harvests every city list and scrapes every restaurant again, ignoring what earlier runs finished
 if __name__ == '__main__':
+    replay, replay_date = replay_arguments(sys.argv[1:])
+    if replay:
+        replay_snapshots(replay_date)
+        sys.exit(0)
+    if '--fresh' in sys.argv[1:]:
+        frontier.start_fresh()
 
-    co = ChromiumOptions()
-    options = co.set_local_port(10020)
-    page = ChromiumPage(options)
+    # Browser profile from SCRAPER_PROFILE ('fast' headless with heavy resources blocked, or 'debug')
+    options = chromium_options(local_port=10020)
+    page = block_tab_resources(ChromiumPage(options))
 
     city_urls = [
         'https://www.doordash.com/food-delivery/surrey-bc-restaurants/',
@@ -246,8 +274,6 @@ if __name__ == '__main__':
         'https://www.doordash.com/food-delivery/coquitlam-bc-restaurants/'
     ]
 
-    data_path = f'D:/All_Data/doordash_{formatted_date}_rawdata'
-
     for url in city_urls:
         cite_name = url.split('/')[-2].split('-')[0]
         rest_data_path = f'{data_path}/dd_{cite_name}'
@@ -262,9 +288,39 @@ if __name__ == '__main__':
             page = reconnect_page(page)
             continue
 
+    # Retry the restaurants that failed on a transient error, with backoff, before the parked ones
+    # Function to retry a failed restaurant, reconnecting the page when its tab disconnected
+    def retry_restaurant(url, rest_data_path, city):
+        global page
+        try:
+            process_restaurant(page, url, rest_data_path, city)
+        except PageDisconnectedError:
+            page = reconnect_page(page)
+
+    if retry_scheduler.pending():
+        retried = retry_scheduler.run(retry_restaurant)
+        logger.info(f"Retried {retried} failed restaurants")
+
+    # Retry the restaurants parked on a challenge page, in this run or an earlier one
+    for item in challenge_queue.due('doordash'):
+        logger.info(f"Retrying parked restaurant: {item['url']}")
+        rest_data_path = f"{data_path}/dd_{item['city']}"
+        os.makedirs(rest_data_path, exist_ok=True)
+        try:
+            process_restaurant(page, item['url'], rest_data_path, item['city'])
+        except PageDisconnectedError:
+            page = reconnect_page(page)
+
     page.close()
 
-    # Save master JSON file
-    with open(master_file_path, 'w', encoding='utf-8') as master_file:
-        json.dump(master_json, master_file, ensure_ascii=False, indent=4)
-    logger.info(f"Master JSON file saved: {master_file_path}")
+    # Export master JSON file from the append-only index
+    export_master_json()
+
+    print_frontier_report(frontier, 'doordash')
+    log_fetch_report()
+    print_scroll_report()
+    print_rate_report()
+    print_snapshot_report(snapshots)
+    print_challenge_report('doordash')
+    print_failure_report('doordash')
+    retry_scheduler.write_report(f'{data_path}/failure_report.json', 'doordash')
@@ -10,6 +10,8 @@ import DrissionPage.errors
 from DrissionPage.errors import PageDisconnectedError
 from pprint import pprint
 from datetime import datetime
+from doordash_parse import parse_operation_hours
+from rate_limiter import polite_get
 
 
 current_date = datetime.now()
@@ -59,7 +61,7 @@ def reconnect_page(page):
 
 def process_restaurant(page: ChromiumPage, url, data_path):
     try:
-        page.get(url)
+        polite_get(page, url)
         time.sleep(3)
         html = page.html
 
@@ -78,40 +80,8 @@ def process_restaurant(page: ChromiumPage, url, data_path):
             # data['phone'] = page.ele('@aria-label=Restaurant phone number link').ele('tag:span').text
             # print(data['phone'])
 
-            doordashOperationHourInfo = (re.findall(r'\"operationSchedule\\":\[(.*)\]}}(.*),\\"banners', html)[0][0]
-                                         .replace('\\', "")
-                                         .replace('{"__typename":"OperationHours",', "")
-                                         .replace("]}", "]"))
-
-            door_pattern = r'"dayOfWeek":"(\w+)".*?"timeSlotList":\["(.*?)"\]'
-            door_matches = re.findall(door_pattern, doordashOperationHourInfo, re.DOTALL)
-
-            #
-            doordashOperationHourInfo_result = {}
-            for day, slots in door_matches:
-                doordashOperationHourInfo_result[day] = [slots]
-
-            data['doordashOperationHourInfo'] = doordashOperationHourInfo_result
-            # data['doordashOperationHourInfo'] = json.loads(
-            #     re.findall(r'"doordashOperationHourInfo":(.+),"dayOfWeek"', html)[0][:-1])
-
-            storeOperationHourInfo_tmp = (
-                (re.findall(r'\"operationSchedule\\":\[(.*)\]},\\"doordashOperationHourInfo', html)[0].
-                 replace('\\', "").
-                 replace('{"__typename":"OperationHours",', "")).
-                replace("]}", "]"))
-
-            storeOperationHourInfo = json.loads(json.dumps(storeOperationHourInfo_tmp))
-
-            store_pattern = r'"dayOfWeek":"(\w+)".*?"timeSlotList":\["(.*?)"\]'
-            store_matches = re.findall(store_pattern, storeOperationHourInfo, re.DOTALL)
-
-            
-            storeOperationHourInfo_result = {}
-            for day, slots in store_matches:
-                storeOperationHourInfo_result[day] = [slots]
-
-            data['storeOperationHourInfo'] = storeOperationHourInfo_result
+            # Both schedules, with every time slot, from the decoded store state
+            data['doordashOperationHourInfo'], data['storeOperationHourInfo'] = parse_operation_hours(html)
 
             # pprint(data)
             # 
@@ -166,7 +136,7 @@ def scrape_data(page: ChromiumPage, url, data_path):
     try:
         # page.close_tabs(page.tab_ids[1:])
         # page.set.activate()
-        page.get(url)
+        polite_get(page, url)
         time.sleep(3)
         tab = page.new_tab()
         urls = []
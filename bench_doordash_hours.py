@@ -0,0 +1,57 @@
+# Micro-benchmark of the DoorDash operation schedule parsing on saved store pages: the old greedy
+# regexes over the whole page versus the structured parse of the decoded store state.
+# Usage: python bench_doordash_hours.py saved_store.html [saved_store.html ...] [--repeat 20]
+import sys
+import time
+from doordash_parse import parse_operation_hours, parse_operation_hours_legacy
+
+DEFAULT_REPEAT = 20
+
+# Function to time one parser on one page; returns (seconds per call, result or the error)
+def time_parser(parser, html, repeat):
+    start = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            result = parser(html)
+    except Exception as e:
+        return (time.perf_counter() - start) / repeat, e
+    return (time.perf_counter() - start) / repeat, result
+
+# Function to count the time slots in a pair of schedules
+def count_slots(schedules):
+    return sum(len(slots) for schedule in schedules for slots in schedule.values())
+
+# Function to describe a parser result as its slot count or its error
+def describe(result):
+    if isinstance(result, tuple):
+        return f"{count_slots(result)} slots"
+    return f"error ({result!r})"
+
+def main(paths, repeat=DEFAULT_REPEAT):
+    legacy_total = structured_total = 0.0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        legacy_seconds, legacy_result = time_parser(parse_operation_hours_legacy, html, repeat)
+        structured_seconds, structured_result = time_parser(parse_operation_hours, html, repeat)
+        legacy_total += legacy_seconds
+        structured_total += structured_seconds
+
+        print(f"{path} ({len(html) / 1e6:.1f} MB): legacy {legacy_seconds * 1000:.2f} ms, {describe(legacy_result)} | "
+              f"structured {structured_seconds * 1000:.2f} ms, {describe(structured_result)}")
+
+    if paths and structured_total:
+        print(f"\nTotal: legacy {legacy_total * 1000:.1f} ms, structured {structured_total * 1000:.1f} ms "
+              f"({legacy_total / structured_total:.1f}x faster)")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    repeat = DEFAULT_REPEAT
+    if '--repeat' in args:
+        index = args.index('--repeat')
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print("Usage: python bench_doordash_hours.py saved_store.html [saved_store.html ...] [--repeat 20]")
+        sys.exit(1)
+    main(args, repeat)
@@ -0,0 +1,82 @@
+# Benchmark of the selector fallback lookups on an Uber Eats merchant page: the element-by-element dish
+# extraction uber_city.scrape_merchant used, run once with one find_element call per selector (misses
+# raise NoSuchElementException and wait out the implicit wait) and once in fast-fail mode.
+# Usage: python bench_selector_lookup.py <merchant url | saved_page.html> [--implicit-wait 2] [--repeat 3]
+import os
+import sys
+import time
+from pathlib import Path
+import selector_lookup
+from selector_lookup import find_element_by_selectors, find_elements_by_selectors
+from selector_stats import SelectorStats
+from site_selectors import UBER_MERCHANT_SELECTORS
+from browser_factory import create_chrome_driver
+from page_ready import wait_until_ready
+from lazy_scroll import scroll_until_stable
+
+DEFAULT_IMPLICIT_WAIT = 2.0
+DEFAULT_REPEAT = 3
+
+# Function to extract every dish field with one fallback lookup per field, like the old element-based loop
+def extract_dishes(driver, stats):
+    dishes = []
+    for category in find_elements_by_selectors(driver, UBER_MERCHANT_SELECTORS['category'], stats):
+        find_element_by_selectors(category, UBER_MERCHANT_SELECTORS['category_name'], stats)
+        for dish in find_elements_by_selectors(category, UBER_MERCHANT_SELECTORS['dish_item'], stats):
+            dishes.append({
+                field: find_element_by_selectors(dish, UBER_MERCHANT_SELECTORS[field], stats) is not None
+                for field in ('dish_name', 'dish_price', 'dish_description', 'dish_image')
+            })
+    return dishes
+
+# Function to time one lookup mode; returns (seconds, dishes, stats)
+def time_mode(driver, fast_fail, repeat):
+    selector_lookup.use_fast_fail = fast_fail
+    stats = SelectorStats(None)  # Keep the benchmark out of selector_stats.json
+    start = time.perf_counter()
+    for _ in range(repeat):
+        dishes = extract_dishes(driver, stats)
+    return (time.perf_counter() - start) / repeat, dishes, stats
+
+# Function to describe a mode's result: time, dishes, lookups and misses
+def describe(seconds, dishes, stats, repeat):
+    misses = stats.run_misses // repeat
+    return (f"{seconds:.2f}s for {len(dishes)} dishes, {stats.run_lookups // repeat} lookups, "
+            f"{misses} selector misses")
+
+def main(target, implicit_wait=DEFAULT_IMPLICIT_WAIT, repeat=DEFAULT_REPEAT):
+    url = Path(target).resolve().as_uri() if os.path.exists(target) else target
+    driver = create_chrome_driver()
+    try:
+        driver.get(url)
+        wait_until_ready(driver, 'uber_merchant')
+        scroll_until_stable(driver, {'type': 'css', 'value': '#main-content ul li'}, max_steps=100, label=url)
+
+        # Compare both modes in declaration order with every selector tried, the miss-heavy case that dynamic
+        # ordering and dead-selector skipping would hide
+        selector_lookup.use_dynamic_order = False
+        selector_lookup.skip_dead_selectors = False
+        driver.implicitly_wait(implicit_wait)
+
+        before = time_mode(driver, False, repeat)
+        after = time_mode(driver, True, repeat)
+        print(f"Implicit wait {implicit_wait}s, {repeat} runs each")
+        print(f"  find_element per selector: {describe(*before, repeat)}")
+        print(f"  fast-fail batched lookup:  {describe(*after, repeat)}")
+        if after[0]:
+            print(f"  {before[0] / after[0]:.1f}x faster")
+    finally:
+        driver.quit()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--implicit-wait': DEFAULT_IMPLICIT_WAIT, '--repeat': DEFAULT_REPEAT}
+    for flag, default in list(options.items()):
+        if flag in args:
+            index = args.index(flag)
+            options[flag] = type(default)(args[index + 1])
+            del args[index:index + 2]
+    if not args:
+        print("Usage: python bench_selector_lookup.py <merchant url | saved_page.html> [--implicit-wait 2] [--repeat 3]")
+        sys.exit(1)
+    main(args[0], options['--implicit-wait'], options['--repeat'])
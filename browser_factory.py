@@ -0,0 +1,259 @@
+# Lazy, offline-capable WebDriver bootstrap. Importing a scraper no longer installs chromedriver or
+# launches Chrome: the driver binary is resolved from a configured path or a local cache without any
+# network access, and the browser only starts the first time the driver is actually used.
+import os
+import sys
+import glob
+import shutil
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import (
+    WebDriverException,
+    SessionNotCreatedException,
+    InvalidSessionIdException,
+    NoSuchWindowException,
+)
+from urllib3.exceptions import MaxRetryError
+
+# Environment variable pointing at a chromedriver binary; always wins when set
+CHROMEDRIVER_PATH_ENV = 'CHROMEDRIVER_PATH'
+
+# File remembering the last resolved chromedriver path between runs
+CHROMEDRIVER_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.zomi_chromedriver_path')
+
+# webdriver-manager's download cache (~/.wdm by default, overridable with WDM_LOCAL)
+WDM_CACHE_DIRS = [
+    os.path.join(os.getcwd(), '.wdm'),
+    os.path.join(os.path.expanduser('~'), '.wdm'),
+]
+
+CHROMEDRIVER_NAME = 'chromedriver.exe' if sys.platform.startswith('win') else 'chromedriver'
+
+resolved_chromedriver = None
+resolve_lock = threading.Lock()
+
+# Environment variable selecting the browser profile for a run ('fast' unless set)
+BROWSER_PROFILE_ENV = 'SCRAPER_PROFILE'
+DEFAULT_PROFILE = 'fast'
+
+# Named browser profiles shared by the Selenium and DrissionPage scrapers:
+#   fast  - headless, small viewport, no GPU/extensions, heavy resources blocked (scraping runs)
+#   debug - the visible 1920x1080 window the scripts always used, nothing blocked
+BROWSER_PROFILES = {
+    'fast': {
+        'headless': True,
+        'window_size': (1280, 800),
+        'arguments': ['--disable-gpu', '--disable-extensions'],
+        'block_resources': True,
+    },
+    'debug': {
+        'headless': False,
+        'window_size': (1920, 1080),
+        'arguments': [],
+        'block_resources': False,
+    },
+}
+
+# Requests blocked through CDP in the fast profile; the src/href attributes stay in the DOM
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*connect.facebook.net*',
+    '*segment.io*', '*segment.com*', '*hotjar.com*', '*sentry.io*', '*branch.io*', '*amplitude.com*',
+]
+
+# Function to check that a path points at an existing file
+def usable_path(path):
+    return bool(path) and os.path.isfile(path)
+
+# Function to find the newest chromedriver in the local webdriver-manager caches
+def find_cached_chromedriver():
+    candidates = []
+    for cache_dir in WDM_CACHE_DIRS:
+        pattern = os.path.join(cache_dir, 'drivers', 'chromedriver', '**', CHROMEDRIVER_NAME)
+        candidates.extend(glob.glob(pattern, recursive=True))
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+# Function to remember the resolved path for the next run
+def remember_chromedriver(path):
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+            f.write(path)
+    except OSError:
+        pass
+
+# Function to resolve the chromedriver binary: configured path, remembered path, local caches, PATH,
+# and only as a last resort webdriver-manager (which may download it)
+def resolve_chromedriver():
+    global resolved_chromedriver
+    with resolve_lock:
+        if usable_path(resolved_chromedriver):
+            return resolved_chromedriver
+
+        path = os.environ.get(CHROMEDRIVER_PATH_ENV)
+        if not usable_path(path) and os.path.exists(CHROMEDRIVER_CACHE_FILE):
+            with open(CHROMEDRIVER_CACHE_FILE, 'r', encoding='utf-8') as f:
+                path = f.read().strip()
+        if not usable_path(path):
+            path = find_cached_chromedriver()
+        if not usable_path(path):
+            path = shutil.which(CHROMEDRIVER_NAME)
+        if not usable_path(path):
+            print("No local chromedriver found, installing one with webdriver-manager")
+            return install_chromedriver()
+
+        remember_chromedriver(path)
+        resolved_chromedriver = path
+        return path
+
+# Function to install the chromedriver matching the installed Chrome with webdriver-manager and remember it
+# (caller holds resolve_lock)
+def install_chromedriver():
+    global resolved_chromedriver
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    remember_chromedriver(path)
+    resolved_chromedriver = path
+    return path
+
+# Function to replace a chromedriver that does not match the installed Chrome (e.g. after a Chrome update)
+def reinstall_chromedriver(stale_path):
+    with resolve_lock:
+        if resolved_chromedriver != stale_path and usable_path(resolved_chromedriver):
+            return resolved_chromedriver  # Another thread already replaced it
+        try:
+            os.remove(CHROMEDRIVER_CACHE_FILE)
+        except OSError:
+            pass
+        print(f"chromedriver at {stale_path} does not match Chrome, installing one with webdriver-manager")
+        return install_chromedriver()
+
+# Function to return the profile settings by name (the SCRAPER_PROFILE environment variable when omitted)
+def browser_profile(profile=None):
+    name = profile or os.environ.get(BROWSER_PROFILE_ENV, DEFAULT_PROFILE)
+    if name not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile {name!r}, expected one of {sorted(BROWSER_PROFILES)}")
+    return name, BROWSER_PROFILES[name]
+
+# Function to build Selenium Chrome options for a profile
+def chrome_options(profile=None):
+    name, settings = browser_profile(profile)
+    options = webdriver.ChromeOptions()
+    if settings['headless']:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size={},{}".format(*settings['window_size']))
+    for argument in settings['arguments']:
+        options.add_argument(argument)
+    options.scrape_profile = name
+    return options
+
+# Function to build DrissionPage ChromiumOptions for a profile
+def chromium_options(profile=None, local_port=None):
+    from DrissionPage import ChromiumOptions
+    name, settings = browser_profile(profile)
+    options = ChromiumOptions()
+    if local_port is not None:
+        options.set_local_port(local_port)
+    options.headless(settings['headless'])
+    options.set_argument('--window-size', '{},{}'.format(*settings['window_size']))
+    for argument in settings['arguments']:
+        options.set_argument(argument)
+    return options
+
+# Function to block heavy resources in the current tab of a Selenium driver when its profile asks for it
+def block_resources(driver):
+    profile = getattr(driver, 'scrape_profile', None)
+    if profile is None:
+        return  # Driver built from custom options
+    _, settings = browser_profile(profile)
+    if not settings['block_resources']:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except WebDriverException as e:
+        print(f"Could not enable resource blocking: {e}")
+
+# Function to block heavy resources in a DrissionPage tab when the profile asks for it; returns the tab
+def block_tab_resources(tab, profile=None):
+    _, settings = browser_profile(profile)
+    if settings['block_resources']:
+        tab.run_cdp('Network.enable')
+        tab.run_cdp('Network.setBlockedURLs', urls=BLOCKED_URL_PATTERNS)
+    return tab
+
+# Function to start Chrome with the given options (the run's profile when omitted) and the locally resolved driver
+def create_chrome_driver(options=None):
+    if options is None:
+        options = chrome_options()
+    path = resolve_chromedriver()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=options)
+    except SessionNotCreatedException:
+        # The remembered or cached driver no longer matches Chrome; retry once with a matching one
+        driver = webdriver.Chrome(service=Service(reinstall_chromedriver(path)), options=options)
+    # Remember the profile so tabs opened later get the same resource blocking
+    driver.scrape_profile = getattr(options, 'scrape_profile', None)
+    block_resources(driver)
+    return driver
+
+# Exceptions a dead browser or chromedriver can surface as; is_browser_crash tells them from failed commands
+BROWSER_CRASH_EXCEPTIONS = (WebDriverException, ConnectionError, MaxRetryError)
+
+# WebDriver error messages of a session whose browser died, as opposed to a command failing on a live page
+BROWSER_CRASH_MESSAGES = (
+    'invalid session id',
+    'session deleted',
+    'chrome not reachable',
+    'disconnected',
+    'tab crashed',
+    'target window already closed',
+)
+
+# Function to check whether an exception means the browser itself died, so the driver has to be rebuilt
+def is_browser_crash(error):
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException, ConnectionError, MaxRetryError)):
+        return True
+    if isinstance(error, WebDriverException):
+        message = (error.msg or '').lower()
+        return any(crash_message in message for crash_message in BROWSER_CRASH_MESSAGES)
+    return False
+
+class LazyDriver:
+    # Stands in for a WebDriver; the browser is created by create_driver on first attribute access
+    def __init__(self, create_driver):
+        self._create_driver = create_driver
+        self._driver = None
+        self._lock = threading.Lock()
+
+    # Function to return the real driver, starting the browser on first use. Not named get, which would hide
+    # WebDriver.get(url) from __getattr__.
+    def instance(self):
+        if self._driver is None:
+            with self._lock:
+                if self._driver is None:
+                    self._driver = self._create_driver()
+        return self._driver
+
+    @property
+    def started(self):
+        return self._driver is not None
+
+    # Function to quit the browser if it was ever started; the next use starts a new one
+    def quit(self):
+        if self._driver is not None:
+            driver, self._driver = self._driver, None
+            driver.quit()
+
+    def __getattr__(self, name):
+        return getattr(self.instance(), name)
+
+# Usage: python browser_factory.py - prints which chromedriver would be used
+if __name__ == "__main__":
+    print(resolve_chromedriver())
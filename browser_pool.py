@@ -0,0 +1,150 @@
+# Pool of workers that each own a browser (or tab) and pull merchant URLs from a shared queue.
+# A worker whose browser crashes rebuilds only its own browser and retries the item, like
+# reconnect_page but scoped to one worker. A worker that cannot start a browser at all hands its item back
+# to the others and stops.
+import time
+import queue
+import threading
+import traceback
+
+# Default number of parallel browsers
+DEFAULT_POOL_SIZE = 4
+
+class BrowserPool:
+    def __init__(self, create_browser, close_browser=None, size=DEFAULT_POOL_SIZE,
+                 crash_exceptions=(), check_browser=None, item_retries=1, create_retries=3):
+        self.create_browser = create_browser  # Called in the worker thread to build its browser
+        self.close_browser = close_browser  # Called with the browser to tear it down
+        self.size = max(1, size)
+        self.crash_exceptions = tuple(crash_exceptions)  # Exceptions meaning the browser itself died
+        self.check_browser = check_browser  # Health probe run after each item; raising or False means dead
+        self.item_retries = item_retries  # How many times an item is retried after a crash
+        self.create_retries = create_retries
+        self.tasks = queue.Queue()
+        self.workers = []
+        self.live_workers = 0  # Workers that have not given up on starting a browser
+        self.restarts = 0
+        self.lock = threading.Lock()
+
+    # Function to start the worker threads (browsers are created lazily by each worker)
+    def start(self):
+        if self.workers:
+            return self
+        self.live_workers = self.size
+        for index in range(self.size):
+            worker = threading.Thread(target=self._work, args=(index,), name=f"browser-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    # Function to run handler(browser, item) for every item across the pool and wait until all are done
+    def map(self, handler, items):
+        self.start()
+        with self.lock:
+            if not self.live_workers:
+                print(f"No browser available in any worker, skipping {len(items)} items")
+                return
+            for item in items:
+                self.tasks.put((handler, item, 0))
+        self.tasks.join()
+
+    # Function to stop the workers and close their browsers
+    def close(self):
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    # Function to build a browser for one worker, retrying a few times before giving up
+    def _open_browser(self, index):
+        for attempt in range(1, self.create_retries + 1):
+            try:
+                return self.create_browser()
+            except Exception as e:
+                print(f"Worker {index}: failed to start browser (attempt {attempt}/{self.create_retries}): {e}")
+                time.sleep(attempt)
+        return None
+
+    # Function to retire a worker that could not start a browser: its item goes back to the queue for the
+    # other workers, or, when no worker is left, the item and everything still queued are dropped
+    def _retire_worker(self, index, task):
+        with self.lock:
+            self.live_workers -= 1
+            if self.live_workers > 0:
+                print(f"Worker {index}: no browser available, stopping and handing {task[1]} back")
+                self.tasks.put(task)
+                return
+            print(f"Worker {index}: no browser available in any worker, skipping {task[1]}")
+            while True:
+                try:
+                    queued = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is not None:
+                    print(f"Worker {index}: no browser available in any worker, skipping {queued[1]}")
+                self.tasks.task_done()
+
+    # Function to close a worker's browser, ignoring errors from an already dead browser
+    def _close_browser(self, browser):
+        if browser is None or self.close_browser is None:
+            return
+        try:
+            self.close_browser(browser)
+        except Exception:
+            pass
+
+    # Function to check whether a worker's browser is still usable
+    def _browser_alive(self, browser):
+        if self.check_browser is None:
+            return True
+        try:
+            return self.check_browser(browser) is not False
+        except Exception:
+            return False
+
+    # Worker loop: pull items, run the handler, rebuild the browser when it crashes
+    def _work(self, index):
+        browser = None
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                self.tasks.task_done()
+                break
+            handler, item, attempts = task
+            try:
+                if browser is None:
+                    browser = self._open_browser(index)
+                    if browser is None:
+                        self._retire_worker(index, task)
+                        break
+                try:
+                    handler(browser, item)
+                except self.crash_exceptions as e:
+                    print(f"Worker {index}: browser crashed on {item}: {e}")
+                    self._close_browser(browser)
+                    browser = None
+                    with self.lock:
+                        self.restarts += 1
+                    if attempts < self.item_retries:
+                        self.tasks.put((handler, item, attempts + 1))
+                    continue
+                except Exception as e:
+                    print(f"Worker {index}: unexpected error on {item}: {e}")
+                    traceback.print_exc()
+
+                if not self._browser_alive(browser):
+                    print(f"Worker {index}: browser no longer responding, restarting it")
+                    self._close_browser(browser)
+                    browser = None
+                    with self.lock:
+                        self.restarts += 1
+            finally:
+                self.tasks.task_done()
+        self._close_browser(browser)
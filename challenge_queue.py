@@ -0,0 +1,201 @@
+# Challenge (CAPTCHA / bot wall) handling shared by the platform scrapers. A challenge page is detected with
+# one script call, its URL is parked in an append-only queue and the scraper moves on, so one challenge never
+# blocks the other workers or cities. Parked URLs are retried once their retry window has passed, or right
+# away after someone cleared them by hand (python challenge_queue.py --solve).
+import re
+import sys
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+from rate_limiter import rate_limiter
+
+# Default queue file shared by all scrapers (relative to the working directory)
+CHALLENGE_QUEUE_PATH = 'challenge_queue.jsonl'
+
+# Seconds a parked URL waits before the scrapers retry it on their own
+DEFAULT_RETRY_DELAY = 15 * 60
+
+# Item states
+PARKED = 'parked'
+DONE = 'done'
+
+# Returns why the current document is a challenge page, or null. Only visible elements count, and the
+# invisible reCAPTCHA badge that ordinary pages carry is ignored.
+CHALLENGE_DETECTOR_JS = """
+var checks = [
+    ['captcha element', '[class*="captcha"], [id*="captcha"], #px-captcha, #challenge-form, #cf-challenge-running'],
+    ['captcha frame', 'iframe[src*="recaptcha"], iframe[src*="hcaptcha"], iframe[src*="challenges.cloudflare.com"], iframe[src*="captcha"]']
+];
+function isChallenge(node) {
+    if (node.closest('.grecaptcha-badge') || (node.src || '').indexOf('size=invisible') !== -1) {
+        return false;
+    }
+    return node.getClientRects().length > 0;
+}
+for (var i = 0; i < checks.length; i++) {
+    var nodes = document.querySelectorAll(checks[i][1]);
+    for (var j = 0; j < nodes.length; j++) {
+        if (isChallenge(nodes[j])) {
+            return checks[i][0];
+        }
+    }
+}
+var title = (document.title || '').toLowerCase();
+if (title.indexOf('just a moment') !== -1 || title.indexOf('access denied') !== -1 || title.indexOf('attention required') !== -1) {
+    return 'challenge title';
+}
+var text = document.body ? document.body.innerText.slice(0, 2000).toLowerCase() : '';
+if (text.indexOf('verify you are human') !== -1 || text.indexOf('are you a robot') !== -1 || text.indexOf('press & hold') !== -1) {
+    return 'challenge text';
+}
+return null;
+"""
+
+# The same checks on raw HTML fetched without a browser. Visibility cannot be checked here, so only markers of a
+# real challenge page count: a generic *captcha* class or id also matches the grecaptcha-badge and the hidden
+# g-recaptcha-response textarea that ordinary pages carry.
+CHALLENGE_HTML_PATTERNS = [
+    ('captcha element', re.compile(r'''(?:class|id)=["'](?:[^"']*\s)?(?:challenge-form|cf-challenge-running|px-captcha)["'\s]''', re.IGNORECASE)),
+    ('captcha frame', re.compile(r'''<iframe[^>]+src=["'](?![^"']*size=invisible)[^"']*(?:recaptcha|hcaptcha|challenges\.cloudflare\.com)''', re.IGNORECASE)),
+    ('challenge title', re.compile(r'<title>\s*(?:just a moment|access denied|attention required)', re.IGNORECASE)),
+]
+
+# Function to check the current page with run_js (driver.execute_script or page.run_js); returns the reason or None
+def detect_challenge(run_js):
+    try:
+        return run_js(CHALLENGE_DETECTOR_JS)
+    except Exception:
+        return None  # A page that cannot run the check is handled by the scraper's own error path
+
+# Function to check raw HTML; returns the reason or None
+def detect_challenge_html(html):
+    for reason, pattern in CHALLENGE_HTML_PATTERNS:
+        if pattern.search(html or ''):
+            return reason
+    return None
+
+# Function to return the current time as an ISO timestamp
+def now_timestamp(offset_seconds=0):
+    return (datetime.now() + timedelta(seconds=offset_seconds)).isoformat(timespec='seconds')
+
+class ChallengeQueue:
+    def __init__(self, path=CHALLENGE_QUEUE_PATH, retry_delay=DEFAULT_RETRY_DELAY):
+        self.path = path
+        self.retry_delay = retry_delay
+        self.lock = threading.Lock()
+        self.items = {}  # Latest state per URL, the last line wins
+        self.parked_this_run = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self.items[item['url']] = item
+        except OSError:
+            pass
+
+    # Function to append the new state of an item (caller holds the lock)
+    def _append(self, item):
+        self.items[item['url']] = item
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    # Function to park a URL that hit a challenge; it becomes due after the retry delay
+    def park(self, url, platform, city=None, reason=''):
+        with self.lock:
+            previous = self.items.get(url, {})
+            self._append({
+                'url': url,
+                'platform': platform,
+                'city': city,
+                'reason': reason,
+                'state': PARKED,
+                'challenges': previous.get('challenges', 0) + 1,
+                'parked_at': now_timestamp(),
+                'retry_after': now_timestamp(self.retry_delay),
+            })
+            self.parked_this_run += 1
+
+    # Function to make parked URLs due right away (after they were cleared by hand); returns how many
+    def release(self, urls):
+        released = 0
+        with self.lock:
+            for url in urls:
+                item = self.items.get(url)
+                if item is not None and item['state'] == PARKED:
+                    self._append(dict(item, retry_after=now_timestamp()))
+                    released += 1
+        return released
+
+    # Function to mark a URL as scraped after a retry; URLs that were never parked are ignored
+    def mark_done(self, url):
+        with self.lock:
+            item = self.items.get(url)
+            if item is not None and item['state'] == PARKED:
+                self._append(dict(item, state=DONE))
+
+    # Function to list the parked items, optionally of one platform
+    def parked(self, platform=None):
+        with self.lock:
+            return [item for item in self.items.values()
+                    if item['state'] == PARKED and (platform is None or item['platform'] == platform)]
+
+    # Function to list the parked items whose retry window has passed
+    def due(self, platform=None):
+        now = now_timestamp()
+        return [item for item in self.parked(platform) if item['retry_after'] <= now]
+
+# Queue shared by every scraper in the process
+challenge_queue = ChallengeQueue()
+
+# Function to park the URL when the current page is a challenge, slowing its host down; returns True when
+# it was parked
+def park_if_challenged(run_js, url, platform, city=None, queue=challenge_queue):
+    reason = detect_challenge(run_js)
+    if not reason:
+        return False
+    queue.park(url, platform, city, reason)
+    rate_limiter.slow_down(url, reason)
+    print(f"Challenge page ({reason}), parked for later: {url}")
+    return True
+
+# Function to print how many URLs were parked this run and how many are still waiting
+def print_challenge_report(platform=None, queue=challenge_queue):
+    parked = queue.parked(platform)
+    if queue.parked_this_run or parked:
+        print(f"\nChallenges: {queue.parked_this_run} URLs parked this run, {len(parked)} still parked "
+              f"({len(queue.due(platform))} due for retry) in {queue.path}")
+
+# Function to open every parked URL in a visible browser, wait for a person to clear the challenge and
+# make the URL due right away
+def solve_parked(queue, platform=None, timeout=300):
+    from browser_factory import create_chrome_driver, chrome_options
+    driver = create_chrome_driver(chrome_options('debug'))
+    try:
+        for item in queue.parked(platform):
+            driver.get(item['url'])
+            print(f"Clear the challenge for {item['url']} ...")
+            deadline = time.monotonic() + timeout
+            while detect_challenge(driver.execute_script) and time.monotonic() < deadline:
+                time.sleep(1)
+            if detect_challenge(driver.execute_script):
+                print(f"Still challenged, left parked: {item['url']}")
+            else:
+                queue.release([item['url']])
+    finally:
+        driver.quit()
+
+# Usage: python challenge_queue.py                       - lists the parked URLs
+#        python challenge_queue.py --release URL [...]   - makes parked URLs due right away
+#        python challenge_queue.py --solve [platform]    - clears the challenges by hand in a visible browser
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ['--release']:
+        print(f"Released {challenge_queue.release(args[1:])} URLs")
+    elif args[:1] == ['--solve']:
+        solve_parked(challenge_queue, args[1] if len(args) > 1 else None)
+    else:
+        for item in challenge_queue.parked():
+            print(f"[{item['platform']}/{item['city']}] {item['url']} - {item['reason']}, "
+                  f"{item['challenges']} challenges, retry after {item['retry_after']}")
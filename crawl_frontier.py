@@ -0,0 +1,207 @@
+# SQLite-backed crawl frontier shared by the Uber, Skip and DoorDash entry points.
+# Every merchant URL moves discovered -> in_flight -> done/failed with timestamps and attempt counts,
+# and list pages that were fully harvested are remembered, so a restarted run resumes where it stopped
+# without re-scrolling city pages. Harvested pages and done URLs expire after max_age_days (or right away
+# with --fresh), so later runs still discover new merchants and re-scrape changed menus.
+import sys
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# Default database shared by all scrapers (relative to the working directory)
+FRONTIER_DB_PATH = 'crawl_frontier.db'
+
+# URL states
+DISCOVERED = 'discovered'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+# Failed URLs are retried on later runs until they reach this many attempts
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Days a harvested list page or a done URL counts as current; older ones are harvested or scraped again
+DEFAULT_MAX_AGE_DAYS = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    city TEXT,
+    source_page TEXT,
+    state TEXT NOT NULL DEFAULT 'discovered',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    discovered_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (platform, state);
+CREATE INDEX IF NOT EXISTS frontier_source_page ON frontier (source_page, state);
+CREATE TABLE IF NOT EXISTS list_pages (
+    page_url TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    city TEXT,
+    url_count INTEGER NOT NULL DEFAULT 0,
+    harvested_at TEXT NOT NULL
+);
+"""
+
+# Function to return the current time as an ISO timestamp
+def now_timestamp(offset_days=0):
+    return (datetime.now() - timedelta(days=offset_days)).isoformat(timespec='seconds')
+
+class CrawlFrontier:
+    def __init__(self, db_path=FRONTIER_DB_PATH, max_attempts=DEFAULT_MAX_ATTEMPTS, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        # Harvested pages and done URLs updated before the cutoff are treated as not seen
+        self.cutoff = now_timestamp(max_age_days)
+        # One connection shared by the pool workers, serialised by a lock; opened on first use, so importing
+        # a scraper does not create the database
+        self.lock = threading.Lock()
+        self.connection = None
+
+    # Function to open the database on first use (caller holds the lock)
+    def _connect(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+        return self.connection
+
+    # Function to ignore everything harvested or scraped before this run (--fresh)
+    def start_fresh(self):
+        self.cutoff = now_timestamp()
+
+    # Function to run one write statement in its own transaction
+    def _write(self, sql, params=()):
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                return connection.execute(sql, params)
+
+    # Function to run one read query
+    def _read(self, sql, params=()):
+        with self.lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    # Function to register newly discovered URLs; URLs already known keep their state
+    def add(self, urls, platform, city=None, source_page=None):
+        timestamp = now_timestamp()
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    'INSERT OR IGNORE INTO frontier (url, platform, city, source_page, state, discovered_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(url, platform, city, source_page, DISCOVERED, timestamp, timestamp) for url in urls],
+                )
+
+    # Function to mark a URL as being scraped; returns False when it is done (since the cutoff) or has used up
+    # its attempts. A URL done before the cutoff is scraped again with a fresh attempt count.
+    def claim(self, url, platform, city=None):
+        timestamp = now_timestamp()
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'INSERT OR IGNORE INTO frontier (url, platform, city, state, discovered_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (url, platform, city, DISCOVERED, timestamp, timestamp),
+                )
+                cursor = connection.execute(
+                    'UPDATE frontier SET state = ?, attempts = CASE WHEN state = ? THEN 1 ELSE attempts + 1 END, '
+                    'updated_at = ? '
+                    'WHERE url = ? AND NOT (state = ? AND updated_at >= ?) AND NOT (state = ? AND attempts >= ?)',
+                    (IN_FLIGHT, DONE, timestamp, url, DONE, self.cutoff, FAILED, self.max_attempts),
+                )
+                return cursor.rowcount > 0
+
+    # Function to mark a URL as successfully scraped
+    def mark_done(self, url):
+        self._write('UPDATE frontier SET state = ?, last_error = NULL, updated_at = ? WHERE url = ?',
+                    (DONE, now_timestamp(), url))
+
+    # Function to mark a URL as failed, keeping the error for the report; a permanent failure uses up the
+    # remaining attempts so later runs do not retry it
+    def mark_failed(self, url, error='', permanent=False):
+        self._write('UPDATE frontier SET state = ?, last_error = ?, updated_at = ?, '
+                    'attempts = CASE WHEN ? THEN MAX(attempts, ?) ELSE attempts END WHERE url = ?',
+                    (FAILED, str(error)[:1000], now_timestamp(), permanent, self.max_attempts, url))
+
+    # Function to hand a claimed URL back without using up an attempt (it was parked, not failed)
+    def release(self, url, reason=''):
+        self._write('UPDATE frontier SET state = ?, attempts = MAX(attempts - 1, 0), last_error = ?, updated_at = ? '
+                    'WHERE url = ? AND state = ?', (DISCOVERED, str(reason)[:1000], now_timestamp(), url, IN_FLIGHT))
+
+    # Function to check whether a URL has already been scraped successfully since the cutoff
+    def is_done(self, url):
+        return bool(self._read('SELECT 1 FROM frontier WHERE url = ? AND state = ? AND updated_at >= ?',
+                               (url, DONE, self.cutoff)))
+
+    # Function to list URLs still to scrape: never tried, interrupted mid-scrape, failed under the attempt cap,
+    # or done before the cutoff
+    def pending(self, platform, city=None, source_page=None):
+        sql = ('SELECT url FROM frontier WHERE platform = ? AND '
+               '(state IN (?, ?) OR (state = ? AND attempts < ?) OR (state = ? AND updated_at < ?))')
+        params = [platform, DISCOVERED, IN_FLIGHT, FAILED, self.max_attempts, DONE, self.cutoff]
+        if city is not None:
+            sql += ' AND city = ?'
+            params.append(city)
+        if source_page is not None:
+            sql += ' AND source_page = ?'
+            params.append(source_page)
+        sql += ' ORDER BY discovered_at, rowid'
+        return [row[0] for row in self._read(sql, params)]
+
+    # Function to remember that a list page (city or category) has been fully harvested
+    def mark_page_harvested(self, page_url, platform, city=None, url_count=0):
+        self._write('INSERT OR REPLACE INTO list_pages (page_url, platform, city, url_count, harvested_at) '
+                    'VALUES (?, ?, ?, ?, ?)', (page_url, platform, city, url_count, now_timestamp()))
+
+    # Function to check whether a list page was harvested since the cutoff
+    def is_page_harvested(self, page_url):
+        return bool(self._read('SELECT 1 FROM list_pages WHERE page_url = ? AND harvested_at >= ?',
+                               (page_url, self.cutoff)))
+
+    # Function to count URLs per state, optionally for one platform
+    def counts(self, platform=None):
+        if platform is None:
+            rows = self._read('SELECT state, COUNT(*) FROM frontier GROUP BY state')
+        else:
+            rows = self._read('SELECT state, COUNT(*) FROM frontier WHERE platform = ? GROUP BY state', (platform,))
+        return dict(rows)
+
+    # Function to list failed URLs with their attempt count and last error
+    def failures(self, platform=None):
+        sql = 'SELECT url, platform, city, attempts, last_error, updated_at FROM frontier WHERE state = ?'
+        params = [FAILED]
+        if platform is not None:
+            sql += ' AND platform = ?'
+            params.append(platform)
+        return self._read(sql, params)
+
+    # Function to list the platforms present in the frontier
+    def platforms(self):
+        return [row[0] for row in self._read('SELECT DISTINCT platform FROM frontier ORDER BY platform')]
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+# Function to print the frontier state counts for one platform
+def print_frontier_report(frontier, platform):
+    counts = frontier.counts(platform)
+    summary = ', '.join(f"{counts.get(state, 0)} {state}" for state in (DONE, FAILED, IN_FLIGHT, DISCOVERED))
+    print(f"\nCrawl frontier ({platform}): {summary}")
+
+# Usage: python crawl_frontier.py [crawl_frontier.db] - prints the state of every platform and the failed URLs
+if __name__ == "__main__":
+    frontier = CrawlFrontier(sys.argv[1] if len(sys.argv) > 1 else FRONTIER_DB_PATH)
+    for platform in frontier.platforms():
+        print_frontier_report(frontier, platform)
+    for url, platform, city, attempts, last_error, updated_at in frontier.failures():
+        print(f"  [{platform}/{city}] {url} attempts={attempts} at {updated_at}: {last_error}")
@@ -0,0 +1,90 @@
+# HTTP fast path for DoorDash store pages: the raw HTML is fetched over a keep-alive requests
+# session (one per worker thread) instead of rendering the store in a Chromium tab.
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from rate_limiter import rate_limiter
+from challenge_queue import detect_challenge_html
+
+# Timeout in seconds for one store page request
+DEFAULT_TIMEOUT = 20
+
+# Headers of a regular desktop Chrome so the server returns the same page the browser gets
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-CA,en;q=0.9',
+}
+
+# One session per thread: requests sessions keep their connections alive but are not shared safely
+session_store = threading.local()
+
+# How many pages came over HTTP and how many needed the browser
+fetch_counts = {'http': 0, 'browser': 0}
+counts_lock = threading.Lock()
+
+# Function to build a session with a keep-alive connection pool
+def create_session(headers=DEFAULT_HEADERS, pool_size=4):
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# Function to return the calling thread's session, creating it on first use
+def get_session():
+    session = getattr(session_store, 'session', None)
+    if session is None:
+        session = session_store.session = create_session()
+    return session
+
+# Status codes that mean the server is throttling or blocking us
+BLOCKED_STATUS_CODES = (403, 429, 503)
+
+# Function to read a Retry-After header given in seconds, 0 when missing or a date
+def retry_after_seconds(response):
+    try:
+        return max(0, int(response.headers.get('Retry-After', 0)))
+    except ValueError:
+        return 0
+
+# Function to fetch a page's HTML at the host's pace, None when the request fails or is not a 200
+def fetch_html(url, timeout=DEFAULT_TIMEOUT):
+    rate_limiter.wait(url)
+    try:
+        response = get_session().get(url, timeout=timeout)
+    except requests.RequestException as e:
+        logger.warning(f"HTTP fetch failed for {url}: {e}")
+        rate_limiter.slow_down(url, type(e).__name__)
+        return None
+    if response.status_code != 200:
+        logger.warning(f"HTTP {response.status_code} for {url}")
+        if response.status_code in BLOCKED_STATUS_CODES:
+            rate_limiter.slow_down(url, f"HTTP {response.status_code}", retry_after_seconds(response))
+        return None
+    rate_limiter.record_success(url)
+    return response.text
+
+# Function to fetch a store page for the HTTP fast path; None when the request failed or a challenge page came
+# back, in which case the caller renders the store in the browser
+def fetch_store_html(url, timeout=DEFAULT_TIMEOUT):
+    html = fetch_html(url, timeout)
+    if html and detect_challenge_html(html):
+        logger.info(f"Challenge page over HTTP, falling back to the browser: {url}")
+        rate_limiter.slow_down(url, 'challenge over HTTP')
+        return None
+    return html
+
+# Function to count which path served a page ('http' or 'browser')
+def count_fetch(path):
+    with counts_lock:
+        fetch_counts[path] += 1
+
+# Function to log how many pages the HTTP path served without a browser
+def log_fetch_report():
+    total = fetch_counts['http'] + fetch_counts['browser']
+    if total:
+        logger.info(f"Store pages: {fetch_counts['http']}/{total} over HTTP, {fetch_counts['browser']} needed the browser")
@@ -0,0 +1,161 @@
+# Pure extraction of a DoorDash store page from its HTML: the application/ld+json block, the escaped
+# store state (address, phone, operation schedule) and the cuisine/dish image nodes. Works the same on
+# HTML fetched over HTTP, page.html from a browser tab, or a saved file.
+import re
+import sys
+import json
+from parsel import Selector
+from loguru import logger
+from site_selectors import DOORDASH_STORE_SELECTORS
+from page_parser import select_first, node_text
+
+ADDRESS_RE = re.compile(r'"displayAddress\\":\\"(.*?)\\"')
+PHONE_RE = re.compile(r'"phoneno\\":\\"(.*?)\\"')
+DOORDASH_SCHEDULE_RE = re.compile(r'"operationSchedule\\":\[(.*)\]}}(.*),\\"banners')
+STORE_SCHEDULE_RE = re.compile(r'"operationSchedule\\":\[(.*)\]},\\"doordashOperationHourInfo')
+DAY_SLOTS_RE = re.compile(r'"dayOfWeek":"(\w+)".*?"timeSlotList":\["(.*?)"\]', re.DOTALL)
+
+# Body of a JS string literal up to its closing quote (unrolled so long strings never backtrack)
+JS_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+
+# Store state keys holding the two operation schedules
+SCHEDULE_KEYS = ('doordashOperationHourInfo', 'storeOperationHourInfo')
+
+json_decoder = json.JSONDecoder()
+WHITESPACE_RE = re.compile(r'\s*')
+
+# Function to convert a price string like "$12.50+" to integer cents
+def convert_price_to_integer(price_str):
+    try:
+        # Remove currency symbols and special characters like '+'
+        cleaned_price = re.sub(r'[^0-9.]', '', price_str)
+        return int(float(cleaned_price) * 100)
+    except ValueError:
+        logger.error(f"Failed to convert price: {price_str}")
+        return None
+
+# Function to read the store's ld+json block; the Restaurant block wins, else the first one, None if absent
+def parse_ld_json(root):
+    blocks = []
+    for text in root.xpath('//script[@type="application/ld+json"]/text()').getall():
+        try:
+            blocks.append(json.loads(text))
+        except json.JSONDecodeError:
+            continue
+    for block in blocks:
+        if isinstance(block, dict) and block.get('@type') == 'Restaurant':
+            return block
+    return blocks[0] if blocks else None
+
+# Function to turn the de-escaped schedule text into {day: [slots]}
+def schedule_days(schedule_text):
+    return {day: [slots] for day, slots in DAY_SLOTS_RE.findall(schedule_text)}
+
+# Function to read both operation schedules with the old regexes over the whole page (kept for the benchmark);
+# it keeps only the first time slot of each day
+def parse_operation_hours_legacy(html):
+    doordash_schedule = (DOORDASH_SCHEDULE_RE.findall(html)[0][0]
+                         .replace('\\', "")
+                         .replace('{"__typename":"OperationHours",', "")
+                         .replace("]}", "]"))
+    store_schedule = (STORE_SCHEDULE_RE.findall(html)[0]
+                      .replace('\\', "")
+                      .replace('{"__typename":"OperationHours",', "")
+                      .replace("]}", "]"))
+    return schedule_days(doordash_schedule), schedule_days(store_schedule)
+
+# Function to decode the serialized store state from the first schedule key onwards.
+# The state is embedded as an escaped JS string (\"key\":{...}), so only that string is decoded with a
+# real JSON decoder; pages carrying it as plain JSON are read as they are.
+def decode_schedule_state(html, keys=SCHEDULE_KEYS):
+    positions = [html.find(f'\\"{key}\\":') for key in keys]
+    positions = [position for position in positions if position != -1]
+    if positions:
+        start = min(positions)
+        body = JS_STRING_BODY_RE.match(html, start).group(0)
+        try:
+            return json.loads(f'"{body}"')
+        except json.JSONDecodeError:
+            # JS-only escapes such as \x26 are not valid JSON; unescaping the quotes is enough for the schedule
+            return body.replace('\\"', '"')
+    positions = [html.find(f'"{key}":') for key in keys]
+    positions = [position for position in positions if position != -1]
+    return html[min(positions):] if positions else ''
+
+# Function to read one JSON value that follows "key": in the decoded state, None if absent
+def read_state_value(state, key):
+    position = state.find(f'"{key}":')
+    if position == -1:
+        return None
+    value, _ = json_decoder.raw_decode(state, WHITESPACE_RE.match(state, position + len(key) + 3).end())
+    return value
+
+# Function to turn an operation hour info object into {day: [every time slot]}
+def schedule_slots(hour_info):
+    if not isinstance(hour_info, dict):
+        return {}
+    return {
+        entry['dayOfWeek']: list(entry.get('timeSlotList') or [])
+        for entry in hour_info.get('operationSchedule') or []
+        if entry.get('dayOfWeek')
+    }
+
+# Function to read both operation schedules in one pass over the decoded store state
+def parse_operation_hours(html):
+    state = decode_schedule_state(html)
+    schedules = []
+    for key in SCHEDULE_KEYS:
+        hour_info = read_state_value(state, key)
+        if hour_info is None:
+            # The key sits in another serialized chunk of the page
+            hour_info = read_state_value(decode_schedule_state(html, (key,)), key)
+        schedules.append(schedule_slots(hour_info))
+    return tuple(schedules)
+
+# Function to read the cuisine label shown under the store name
+def parse_cuisine(root):
+    node = select_first(root, DOORDASH_STORE_SELECTORS['cuisine'])
+    return node_text(node) if node is not None else "Not found"
+
+# Function to read the first dish image URL, '' when the page has none
+def parse_dish_image(root):
+    node = select_first(root, DOORDASH_STORE_SELECTORS['dish_image'])
+    return node.attrib.get('src', '') if node is not None else ''
+
+# Function to assign the dish image and integer cent prices to every menu item
+def apply_menu_items(data):
+    for sec in data['hasMenu']['hasMenuSection'][0]:
+        for menu_item in sec['hasMenuItem']:
+            menu_item['image'] = data.get('dish_image', '')
+            price_str = menu_item.get('offers', {}).get('price')
+            if price_str:
+                menu_item['price'] = convert_price_to_integer(price_str)
+
+# Function to build the saved store record from the page HTML.
+# Returns None when the page has no ld+json (e.g. a bot wall served to plain HTTP), so the caller can
+# fall back to the browser. Missing store state raises IndexError/KeyError like the inline code did.
+def parse_store_page(html, url):
+    root = Selector(text=html)
+    data = parse_ld_json(root)
+    if data is None:
+        return None
+    if data.get('@type') != 'Restaurant':
+        return data
+
+    data['url'] = url
+    data['address'] = ADDRESS_RE.findall(html)[0]
+    data['phone'] = PHONE_RE.findall(html)[0]
+    data['doordashOperationHourInfo'], data['storeOperationHourInfo'] = parse_operation_hours(html)
+    data['merchant_cuisine'] = parse_cuisine(root)
+
+    dish_image = parse_dish_image(root)
+    if dish_image:
+        data['dish_image'] = dish_image
+    apply_menu_items(data)
+    return data
+
+# Usage: python doordash_parse.py saved_store.html [store_url] - prints the parsed store record
+if __name__ == "__main__":
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        store = parse_store_page(f.read(), sys.argv[2] if len(sys.argv) > 2 else '')
+    print(json.dumps(store, ensure_ascii=False, indent=4))
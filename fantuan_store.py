@@ -0,0 +1,102 @@
+# SQLite store of the Fantuan merchants keyed by URL. Each scraped merchant is one upsert instead of
+# reading the whole merchants_chinese.xlsx back, concatenating and rewriting it on every run; the Excel
+# workbook is only generated on demand.
+import sys
+import sqlite3
+import threading
+from datetime import datetime
+
+# Default database next to the scraped data
+FANTUAN_DB_NAME = 'fantuan_merchants.db'
+
+# Columns of the Excel export, in the order the scraper always wrote them
+EXPORT_COLUMNS = ['name', 'url', 'description']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS merchants (
+    url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    city TEXT,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS merchants_city ON merchants (city);
+"""
+
+# Function to return the current time as an ISO timestamp
+def now_timestamp():
+    return datetime.now().isoformat(timespec='seconds')
+
+class FantuanStore:
+    def __init__(self, db_path=FANTUAN_DB_NAME):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    # Function to insert or update merchants by URL; returns how many were new
+    def upsert(self, merchants, city=None):
+        timestamp = now_timestamp()
+        rows = [(merchant['url'], merchant['name'], merchant.get('description', ''), city, timestamp, timestamp)
+                for merchant in merchants if merchant.get('url')]
+        with self.lock:
+            before = self.connection.execute('SELECT COUNT(*) FROM merchants').fetchone()[0]
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO merchants (url, name, description, city, first_seen, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(url) DO UPDATE SET name = excluded.name, description = excluded.description, '
+                    'city = COALESCE(excluded.city, merchants.city), updated_at = excluded.updated_at',
+                    rows,
+                )
+            return self.connection.execute('SELECT COUNT(*) FROM merchants').fetchone()[0] - before
+
+    # Function to count the stored merchants
+    def count(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM merchants').fetchone()[0]
+
+    # Function to list merchants as {name, url, description} dicts, optionally of one city
+    def merchants(self, city=None):
+        sql = 'SELECT name, url, description FROM merchants'
+        params = []
+        if city is not None:
+            sql += ' WHERE city = ?'
+            params.append(city)
+        with self.lock:
+            rows = self.connection.execute(sql + ' ORDER BY rowid', params).fetchall()
+        return [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+
+    # Function to load a workbook written by earlier runs, so its merchants stay in the store
+    def import_excel(self, excel_path, city=None):
+        import pandas as pd
+        df = pd.read_excel(excel_path).fillna('')
+        return self.upsert(df.to_dict('records'), city)
+
+    # Function to write the merchants to an Excel workbook (the slow part, only run on demand)
+    def export_excel(self, excel_path, city=None):
+        import pandas as pd
+        merchants = self.merchants(city)
+        pd.DataFrame(merchants, columns=EXPORT_COLUMNS).to_excel(excel_path, index=False)
+        return len(merchants)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# Usage: python fantuan_store.py <fantuan_merchants.db> [--excel merchants_chinese.xlsx] [--city white-rock-bc]
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print("Usage: python fantuan_store.py <fantuan_merchants.db> [--excel merchants_chinese.xlsx] [--city white-rock-bc]")
+        sys.exit(1)
+    store = FantuanStore(args[0])
+    city = args[args.index('--city') + 1] if '--city' in args else None
+    if '--excel' in args:
+        excel_path = args[args.index('--excel') + 1]
+        print(f"Exported {store.export_excel(excel_path, city)} merchants to {excel_path}")
+    else:
+        print(f"{store.count()} merchants in {args[0]}")
@@ -0,0 +1,158 @@
+# Scroll-until-stable lazy loading: jump to the bottom of the page and stop as soon as the page
+# stops growing, instead of always running a fixed number of small scroll steps.
+import time
+
+# Installs a MutationObserver counting nodes added to the page (once per document)
+INSTALL_OBSERVER_JS = """
+if (!window.__lazyScrollObserver && document.body) {
+    window.__lazyScrollAdded = 0;
+    window.__lazyScrollObserver = new MutationObserver(function (records) {
+        for (var i = 0; i < records.length; i++) {
+            window.__lazyScrollAdded += records[i].addedNodes.length;
+        }
+    });
+    window.__lazyScrollObserver.observe(document.body, {childList: true, subtree: true});
+}
+"""
+
+# One scroll step: jump to the bottom, then report page height, added node count and item count
+SCROLL_STEP_JS = """
+var itemSelector = arguments[0];
+window.scrollTo(0, document.body.scrollHeight);
+var items = -1;
+if (itemSelector) {
+    if (itemSelector.type === 'xpath') {
+        items = document.evaluate('count(' + itemSelector.value + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+    } else {
+        items = document.querySelectorAll(itemSelector.value).length;
+    }
+}
+return [document.body.scrollHeight, window.__lazyScrollAdded || 0, items];
+"""
+
+# Returns the hrefs of matching links not returned before, then jumps to the bottom to load the next batch.
+# Each node is tagged with the href it was harvested with, so recycled list nodes showing a new store still count.
+HARVEST_LINKS_JS = """
+var itemSelector = arguments[0];
+var marker = 'data-lazy-harvested';
+var seen = window.__lazyHarvestSeen || (window.__lazyHarvestSeen = {});
+var nodes = [];
+if (itemSelector.type === 'xpath') {
+    var result = document.evaluate(itemSelector.value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (var i = 0; i < result.snapshotLength; i++) {
+        nodes.push(result.snapshotItem(i));
+    }
+} else {
+    nodes = document.querySelectorAll(itemSelector.value);
+}
+var hrefs = [];
+for (var j = 0; j < nodes.length; j++) {
+    var href = nodes[j].href || nodes[j].getAttribute('href');
+    if (!href || nodes[j].getAttribute(marker) === String(href)) {
+        continue;
+    }
+    nodes[j].setAttribute(marker, String(href));
+    if (!seen[href]) {
+        seen[href] = true;
+        hrefs.push(String(href));
+    }
+}
+window.scrollTo(0, document.body.scrollHeight);
+return [hrefs, document.body.scrollHeight];
+"""
+
+# Default time in seconds the page must stay unchanged before scrolling stops
+DEFAULT_STABLE_TIME = 1.0
+
+# One entry per scrolled page: label, steps used, step budget, items found and seconds spent
+scroll_reports = []
+
+# Function to scroll until the item count (or, without a selector, the DOM) stops growing. While the item
+# selector matches nothing the page has not rendered yet, so it never counts as stable before max_steps.
+def scroll_until_stable(driver, item_selector=None, max_steps=100, stable_time=DEFAULT_STABLE_TIME, step_pause=0.1, label=''):
+    start = time.monotonic()
+    driver.execute_script(INSTALL_OBSERVER_JS)
+
+    steps = 0
+    items = -1
+    last_state = None
+    stable_since = time.monotonic()
+    while steps < max_steps:
+        height, added, items = driver.execute_script(SCROLL_STEP_JS, item_selector)
+        steps += 1
+
+        # With an item selector only the height and item count matter; otherwise watch added nodes
+        state = (height, items) if item_selector else (height, added)
+        now = time.monotonic()
+        if state != last_state or items == 0:
+            last_state = state
+            stable_since = now
+        elif now - stable_since >= stable_time:
+            break
+        time.sleep(step_pause)
+
+    seconds = time.monotonic() - start
+    scroll_reports.append({
+        'label': label,
+        'steps': steps,
+        'max_steps': max_steps,
+        'items': items,
+        'seconds': round(seconds, 2),
+    })
+    print(f"Scrolled {label or 'page'} in {steps}/{max_steps} steps ({seconds:.1f}s, {items if items >= 0 else 'n/a'} items)")
+    return steps
+
+# Function to print how many scroll steps were needed compared to the old fixed loops
+def print_scroll_report():
+    if not scroll_reports:
+        return
+    steps = sum(report['steps'] for report in scroll_reports)
+    budget = sum(report['max_steps'] for report in scroll_reports)
+    seconds = sum(report['seconds'] for report in scroll_reports)
+    print(f"\nScrolling: {len(scroll_reports)} pages, {steps} steps used out of {budget} "
+          f"({budget - steps} saved), {seconds:.0f}s spent")
+
+# Function to yield each batch of new items returned by a harvest script, until it stops finding any and
+# its scroll state stops changing. The script returns [new items, scroll state] and scrolls for the next
+# batch in the same call; run_js is driver.execute_script (Selenium) or page.run_js (DrissionPage).
+def iter_new_items(run_js, script, script_args=(), max_steps=500, stable_time=DEFAULT_STABLE_TIME, step_pause=0.2, label=''):
+    start = time.monotonic()
+    steps = 0
+    found = 0
+    last_state = None
+    stable_since = time.monotonic()
+    try:
+        while steps < max_steps:
+            items, state = run_js(script, *script_args)
+            steps += 1
+            if items or state != last_state:
+                last_state = state
+                if items:
+                    found += len(items)
+                    yield items
+                stable_since = time.monotonic()
+            elif time.monotonic() - stable_since >= stable_time:
+                break
+            time.sleep(step_pause)
+    finally:
+        seconds = time.monotonic() - start
+        scroll_reports.append({
+            'label': label,
+            'steps': steps,
+            'max_steps': max_steps,
+            'items': found,
+            'seconds': round(seconds, 2),
+        })
+        print(f"Harvested {found} items from {label or 'page'} in {steps} rounds ({seconds:.1f}s)")
+
+# Function to yield each batch of newly loaded link hrefs, scrolling for more until the list stops growing;
+# one call per round both returns the new hrefs and triggers the next lazy-load batch
+def iter_new_links(run_js, item_selector, max_steps=500, stable_time=DEFAULT_STABLE_TIME, step_pause=0.2, label=''):
+    return iter_new_items(run_js, HARVEST_LINKS_JS, (item_selector,), max_steps, stable_time, step_pause, label)
+
+# Function to collect every link of a lazy-loaded list in a handful of round trips
+def harvest_links(run_js, item_selector, max_steps=500, stable_time=DEFAULT_STABLE_TIME, step_pause=0.2, label=''):
+    links = []
+    for hrefs in iter_new_links(run_js, item_selector, max_steps, stable_time, step_pause, label):
+        links.extend(hrefs)
+    return links
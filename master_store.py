@@ -0,0 +1,111 @@
+# Append-only master index: every saved merchant appends one JSON line instead of rewriting the
+# whole master JSON file. The legacy master.json shapes are produced on demand by the export functions.
+import os
+import sys
+import json
+import threading
+
+# Lock so parallel workers never interleave lines
+append_lock = threading.Lock()
+
+# Function to derive the index path (master.jsonl) that sits next to a legacy master JSON file
+def master_index_path(master_json_path):
+    return os.path.splitext(master_json_path)[0] + '.jsonl'
+
+# Function to append one merchant record to the index
+def append_master_record(index_path, record):
+    line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+    with append_lock:
+        with open(index_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+# Function to empty the index at the start of a run that rebuilds its master list from scratch
+def reset_master_index(index_path):
+    with append_lock:
+        with open(index_path, 'w', encoding='utf-8'):
+            pass
+
+# Function to read the index with upsert semantics: the last record per key wins, first-seen order is kept
+def read_master_records(index_path, key_field='url'):
+    records = {}
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line after a crash is skipped rather than failing the export
+                print(f"Skipping unreadable line {line_number} in {index_path}")
+                continue
+            records[record.get(key_field)] = record
+    return list(records.values())
+
+# Function to rewrite the index keeping only the latest record per key
+def compact_master_index(index_path, key_field='url'):
+    records = read_master_records(index_path, key_field)
+    tmp_path = index_path + '.tmp'
+    with append_lock:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, index_path)
+    return len(records)
+
+# Function to write a JSON file atomically so readers never see a half-written master file
+def write_json_atomic(json_path, data, indent=2):
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, json_path)
+
+# Function to export the legacy {merchant_name: {...}} master.json used by the Uber scripts
+def export_master_dict(index_path, json_path, name_field='merchant_name', key_field='url', merge_existing=True, indent=2):
+    master_data = {}
+    if merge_existing and os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            master_data = json.load(f)
+    for record in read_master_records(index_path, key_field):
+        record = dict(record)
+        master_data[record.pop(name_field)] = record
+    write_json_atomic(json_path, master_data, indent)
+    return len(master_data)
+
+# Function to export the legacy [{...}, ...] master list used by the Skip and DoorDash scripts
+def export_master_list(index_path, json_path, key_field='url', merge_existing=False, indent=2):
+    master_list = []
+    if merge_existing and os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            master_list = json.load(f)
+    positions = {entry.get(key_field): index for index, entry in enumerate(master_list)}
+    for record in read_master_records(index_path, key_field):
+        key = record.get(key_field)
+        if key in positions:
+            master_list[positions[key]] = record
+        else:
+            positions[key] = len(master_list)
+            master_list.append(record)
+    write_json_atomic(json_path, master_list, indent)
+    return len(master_list)
+
+# Usage:
+#   python master_store.py compact master.jsonl
+#   python master_store.py export-dict master.jsonl master.json
+#   python master_store.py export-list all_merchants.jsonl all_merchants.json
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('compact', 'export-dict', 'export-list'):
+        print("Usage: python master_store.py <compact|export-dict|export-list> index.jsonl [master.json]")
+        sys.exit(1)
+    command, index_path = sys.argv[1], sys.argv[2]
+    if command == 'compact':
+        print(f"{compact_master_index(index_path)} records kept in {index_path}")
+    else:
+        json_path = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(index_path)[0] + '.json'
+        if command == 'export-dict':
+            count = export_master_dict(index_path, json_path)
+        else:
+            count = export_master_list(index_path, json_path, merge_existing=True)
+        print(f"{count} merchants exported to {json_path}")
@@ -0,0 +1,185 @@
+# Single round-trip menu extraction: the selector fallback lists are walked inside the browser
+# by one execute_script call instead of one WebDriver request per element.
+from site_selectors import UBER_MERCHANT_SELECTORS, UBER_CATEGORIES_TO_EXCLUDE
+
+# JavaScript that resolves a whole extraction spec against the live DOM and returns plain JSON
+EXTRACT_MENU_JS = """
+var spec = arguments[0];
+
+function findAll(context, selectors) {
+    for (var i = 0; i < selectors.length; i++) {
+        var selector = selectors[i];
+        var found = [];
+        try {
+            if (selector.type === 'xpath') {
+                var snapshot = document.evaluate(selector.value, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                for (var j = 0; j < snapshot.snapshotLength; j++) {
+                    found.push(snapshot.snapshotItem(j));
+                }
+            } else if (selector.type === 'css') {
+                found = Array.prototype.slice.call(context.querySelectorAll(selector.value));
+            }
+        } catch (e) {
+            continue;
+        }
+        if (found.length) {
+            return found;
+        }
+    }
+    return [];
+}
+
+function findOne(context, selectors) {
+    for (var i = 0; i < selectors.length; i++) {
+        var selector = selectors[i];
+        var element = null;
+        try {
+            if (selector.type === 'xpath') {
+                element = document.evaluate(selector.value, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } else if (selector.type === 'css') {
+                element = context.querySelector(selector.value);
+            }
+        } catch (e) {
+            continue;
+        }
+        if (element) {
+            return element;
+        }
+    }
+    return null;
+}
+
+function readField(context, field) {
+    var element = findOne(context, field.selectors);
+    if (!element) {
+        return null;
+    }
+    if (field.attr === 'text') {
+        return element.innerText !== undefined ? element.innerText : element.textContent;
+    }
+    if (field.attr === 'textContent') {
+        return element.textContent;
+    }
+    var value = element[field.attr];
+    if (value === undefined || value === null) {
+        value = element.getAttribute(field.attr);
+    }
+    return value;
+}
+
+function readFields(context, fields) {
+    var result = {};
+    for (var name in fields) {
+        result[name] = readField(context, fields[name]);
+    }
+    return result;
+}
+
+var categories = findAll(document, spec.category).map(function (category) {
+    return {
+        name: readField(category, spec.category_name),
+        dishes: findAll(category, spec.dish_item).map(function (dish) {
+            return readFields(dish, spec.dish_fields);
+        })
+    };
+});
+
+return {fields: readFields(document, spec.fields), categories: categories};
+"""
+
+# Function to build the extraction spec passed to EXTRACT_MENU_JS from a selector table
+def build_uber_spec(selectors):
+    return {
+        'fields': {
+            'merchant_name': {'selectors': selectors['merchant_name'], 'attr': 'text'},
+            'address': {'selectors': selectors['address'], 'attr': 'text'},
+            'banner_image_url': {'selectors': selectors['banner_image'], 'attr': 'src'},
+        },
+        'category': selectors['category'],
+        'category_name': {'selectors': selectors['category_name'], 'attr': 'text'},
+        'dish_item': selectors['dish_item'],
+        'dish_fields': {
+            'dish_name': {'selectors': selectors['dish_name'], 'attr': 'text'},
+            'dish_price': {'selectors': selectors['dish_price'], 'attr': 'text'},
+            'dish_description': {'selectors': selectors['dish_description'], 'attr': 'text'},
+            'dish_img_url': {'selectors': selectors['dish_image'], 'attr': 'src'},
+        },
+    }
+
+# Function to convert an Uber price label such as "$12.50" to integer cents
+def convert_uber_price(price_text):
+    try:
+        price_text = price_text.replace('$', '').replace('£', '').replace('€', '').replace(',', '').strip()
+        return int(float(price_text) * 100)
+    except Exception as e:
+        print(f"Dish price not found or could not be processed: {e}")
+        return None
+
+# Function to turn the raw categories returned by the browser into the {category: [dish...]} menu
+def build_uber_menu(raw_categories, categories_to_exclude=UBER_CATEGORIES_TO_EXCLUDE):
+    menu = {}
+    for raw_category in raw_categories:
+        category_name = (raw_category['name'] or '').strip() or "Uncategorized"
+
+        # Skip the category if it's in the exclusion list
+        if category_name in categories_to_exclude:
+            print(f"Skipping category: {category_name}")
+            continue
+
+        menu[category_name] = []
+        for raw_dish in raw_category['dishes']:
+            dish_name = raw_dish['dish_name']
+            if dish_name is None:
+                dish_name = "Not found"
+                print("Dish name not found")
+            else:
+                dish_name = dish_name.strip()
+
+            if raw_dish['dish_price'] is None:
+                dish_price = None
+                print("Dish price element not found")
+            else:
+                dish_price = convert_uber_price(raw_dish['dish_price'])
+
+            menu[category_name].append({
+                'dish_name': dish_name,
+                'dish_description': (raw_dish['dish_description'] or '').strip(),
+                'dish_img_url': raw_dish['dish_img_url'] or "",
+                'dish_price': dish_price
+            })
+    return menu
+
+# Function to extract merchant details and the full menu of an Uber store page in one WebDriver call
+def extract_uber_merchant(driver, selectors=UBER_MERCHANT_SELECTORS, categories_to_exclude=UBER_CATEGORIES_TO_EXCLUDE):
+    result = driver.execute_script(EXTRACT_MENU_JS, build_uber_spec(selectors))
+    fields = result['fields']
+
+    merchant_name = fields['merchant_name']
+    if merchant_name is None:
+        merchant_name = "Not found"
+        print("Merchant name not found")
+    else:
+        merchant_name = merchant_name.strip()
+
+    address = fields['address']
+    if address is None:
+        address = "Not found"
+        print("Address not found")
+    else:
+        address = address.strip()
+
+    banner_image_url = fields['banner_image_url']
+    if banner_image_url is None:
+        banner_image_url = "Not found"
+        print("Banner image not found")
+
+    if not result['categories']:
+        print("No categories found")
+
+    return {
+        'merchant_name': merchant_name,
+        'address': address,
+        'banner_image_url': banner_image_url,
+        'menu': build_uber_menu(result['categories'], categories_to_exclude),
+        'category_count': len(result['categories']),
+    }
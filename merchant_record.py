@@ -0,0 +1,262 @@
+# One typed merchant/menu record for every platform. The scrapers keep writing their own JSON files,
+# and also emit a MerchantRecord through append_record into a records.jsonl file. Each line is compact and
+# versioned, and categories and dishes are stored as arrays instead of repeated keys, so every platform
+# is loaded by one reader (read_records) instead of a JSON walker per output shape.
+import os
+import sys
+import json
+import time
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+
+# Version written into every line; bump it when the layout changes and keep a decoder for the old one
+SCHEMA_VERSION = 1
+
+# File name of the record stream next to each scraper's output
+RECORDS_FILE_NAME = 'records.jsonl'
+
+@dataclass(slots=True)
+class Dish:
+    name: str
+    price: int | None = None  # Integer cents, None when missing or not a price ("sold out")
+    description: str = ''
+    image_url: str = ''
+
+@dataclass(slots=True)
+class MenuCategory:
+    name: str
+    dishes: list[Dish] = field(default_factory=list)
+
+@dataclass(slots=True)
+class MerchantRecord:
+    platform: str
+    url: str
+    name: str
+    address: str = ''
+    cities: list[str] = field(default_factory=list)
+    banner_image_url: str = ''
+    phone: str = ''
+    cuisine: str = ''
+    description: str = ''
+    opening_hours: dict[str, list[str]] = field(default_factory=dict)
+    menu: list[MenuCategory] = field(default_factory=list)
+    fetched_at: str = ''
+    schema_version: int = SCHEMA_VERSION
+
+    # Function to count the dishes over all categories
+    def dish_count(self):
+        return sum(len(category.dishes) for category in self.menu)
+
+# Function to return the current time as an ISO timestamp
+def now_timestamp():
+    return datetime.now().isoformat(timespec='seconds')
+
+# Function to keep integer cent prices and drop anything else
+def cents(price):
+    return price if isinstance(price, int) and not isinstance(price, bool) else None
+
+# Function to read the {category: [dish dicts]} menu the Uber and Skip scrapers save
+def menu_from_category_dict(menu):
+    return [
+        MenuCategory(category_name, [
+            Dish(dish.get('dish_name') or '', cents(dish.get('dish_price')),
+                 dish.get('dish_description') or '', dish.get('dish_img_url') or '')
+            for dish in dishes
+        ])
+        for category_name, dishes in (menu or {}).items()
+    ]
+
+# Function to convert a saved Uber merchant (uber_final.py) into a record
+def from_uber(data, city=None):
+    return MerchantRecord(
+        platform='uber',
+        url=data.get('merchant_url', ''),
+        name=data.get('merchant_name', ''),
+        address=data.get('address', ''),
+        cities=list(data.get('cities') or ([city] if city else [])),
+        banner_image_url=data.get('banner_image_url', ''),
+        opening_hours=data.get('opening_times') or {},
+        menu=menu_from_category_dict(data.get('menu')),
+        fetched_at=now_timestamp(),
+    )
+
+# Function to convert a saved Skip merchant (skip_city.py) into a record
+def from_skip(data, city=None):
+    city = data.get('city') or city
+    return MerchantRecord(
+        platform='skip',
+        url=data.get('merchant_url', ''),
+        name=data.get('merchant_name', ''),
+        address=data.get('address', ''),
+        cities=[city] if city else [],
+        banner_image_url=data.get('banner_image_url', ''),
+        menu=menu_from_category_dict(data.get('menu')),
+        fetched_at=now_timestamp(),
+    )
+
+# Function to format a schema.org address: a PostalAddress dict joined in postal order, or a plain string
+def postal_address(address):
+    if isinstance(address, str):
+        return address
+    if not isinstance(address, dict):
+        return ''
+    parts = [address.get(part) for part in
+             ('streetAddress', 'addressLocality', 'addressRegion', 'postalCode', 'addressCountry')]
+    # addressCountry may itself be a schema.org Country
+    parts = [part.get('name') if isinstance(part, dict) else part for part in parts]
+    return ', '.join(str(part).strip() for part in parts if part)
+
+# Function to convert a saved DoorDash store (schema.org Restaurant from DOORDASH.py) into a record
+def from_doordash(data, city=None):
+    menu = []
+    sections = (data.get('hasMenu') or {}).get('hasMenuSection') or [[]]
+    for section in sections[0]:
+        menu.append(MenuCategory(section.get('name', ''), [
+            Dish(item.get('name', ''), cents(item.get('price')), item.get('description', ''), item.get('image', ''))
+            for item in section.get('hasMenuItem') or []
+        ]))
+    image = data.get('image', '')
+    return MerchantRecord(
+        platform='doordash',
+        url=data.get('url', ''),
+        name=data.get('name', ''),
+        address=postal_address(data.get('address')),
+        cities=[city] if city else [],
+        banner_image_url=image[0] if isinstance(image, list) and image else image if isinstance(image, str) else '',
+        phone=data.get('telephone') or data.get('phone', ''),
+        cuisine=data.get('merchant_cuisine', ''),
+        opening_hours=data.get('storeOperationHourInfo') or {},
+        menu=menu,
+        fetched_at=now_timestamp(),
+    )
+
+# Function to convert one Fantuan merchant row (name, url, description) into a record
+def from_fantuan(row, city=None):
+    return MerchantRecord(
+        platform='fantuan',
+        url=row.get('url', ''),
+        name=row.get('name', ''),
+        cities=[city] if city else [],
+        description=row.get('description', ''),
+        fetched_at=now_timestamp(),
+    )
+
+# Converters from each scraper's saved shape, keyed by platform name
+CONVERTERS = {
+    'uber': from_uber,
+    'skip': from_skip,
+    'doordash': from_doordash,
+    'fantuan': from_fantuan,
+}
+
+# Function to encode a record as one compact JSON line (categories and dishes as arrays)
+def encode_record(record):
+    return json.dumps({
+        'v': SCHEMA_VERSION,
+        'platform': record.platform,
+        'url': record.url,
+        'name': record.name,
+        'address': record.address,
+        'cities': record.cities,
+        'banner': record.banner_image_url,
+        'phone': record.phone,
+        'cuisine': record.cuisine,
+        'description': record.description,
+        'hours': record.opening_hours,
+        'fetched_at': record.fetched_at,
+        'menu': [
+            [category.name, [[dish.name, dish.price, dish.description, dish.image_url] for dish in category.dishes]]
+            for category in record.menu
+        ],
+    }, ensure_ascii=False, separators=(',', ':'))
+
+# Function to decode a version 1 line
+def decode_v1(data):
+    return MerchantRecord(
+        data['platform'], data['url'], data['name'], data['address'], data['cities'], data['banner'],
+        data['phone'], data['cuisine'], data['description'], data['hours'],
+        [MenuCategory(name, [Dish(*dish) for dish in dishes]) for name, dishes in data['menu']],
+        data['fetched_at'], 1,
+    )
+
+# Decoders for every schema version still found in stored files
+DECODERS = {
+    1: decode_v1,
+}
+
+# Function to decode one line into a record, whatever schema version it was written with
+def decode_record(line):
+    data = json.loads(line)
+    decoder = DECODERS.get(data.get('v'))
+    if decoder is None:
+        raise ValueError(f"Unsupported merchant record schema version: {data.get('v')!r}")
+    return decoder(data)
+
+# Lock so parallel workers never interleave lines
+append_lock = threading.Lock()
+
+# Function to append one record to a records.jsonl file
+def append_record(path, record):
+    line = encode_record(record)
+    with append_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+# Function to read the records of one or more files, optionally of one platform only
+def read_records(paths, platform=None):
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = decode_record(line)
+                if platform is None or record.platform == platform:
+                    yield record
+
+# Function to keep the last record per (platform, url), first-seen order kept
+def latest_records(paths, platform=None):
+    records = {}
+    for record in read_records(paths, platform):
+        records[(record.platform, record.url)] = record
+    return list(records.values())
+
+# Function to read the per-merchant JSON files a scraper wrote (<base>/<city>/*.json) as records
+def iter_legacy_records(base_directory, platform):
+    convert = CONVERTERS[platform]
+    for city_directory in sorted(os.listdir(base_directory)):
+        city_path = os.path.join(base_directory, city_directory)
+        if not os.path.isdir(city_path):
+            continue
+        city = city_directory[3:] if city_directory.startswith('dd_') else city_directory
+        for file_name in sorted(os.listdir(city_path)):
+            if not file_name.endswith('.json'):
+                continue
+            with open(os.path.join(city_path, file_name), 'r', encoding='utf-8') as f:
+                yield convert(json.load(f), city)
+
+# Usage: python merchant_record.py records.jsonl [records.jsonl ...] - prints record counts per platform
+#        python merchant_record.py --convert <uber|skip|doordash> <base_directory> <records.jsonl>
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ['--convert'] and len(args) == 4:
+        platform, base_directory, records_path = args[1:]
+        count = 0
+        for record in iter_legacy_records(base_directory, platform):
+            append_record(records_path, record)
+            count += 1
+        print(f"Converted {count} {platform} merchants into {records_path}")
+    elif args:
+        start = time.perf_counter()
+        records = latest_records(args)
+        seconds = time.perf_counter() - start
+        for platform in sorted({record.platform for record in records}):
+            platform_records = [record for record in records if record.platform == platform]
+            print(f"{platform}: {len(platform_records)} merchants, "
+                  f"{sum(record.dish_count() for record in platform_records)} dishes")
+        print(f"Loaded {len(records)} merchants in {seconds:.2f}s")
+    else:
+        print("Usage: python merchant_record.py records.jsonl [...] | --convert <platform> <base_directory> <records.jsonl>")
+        sys.exit(1)
@@ -0,0 +1,193 @@
+# Offline parsing of a captured page_source snapshot with parsel/lxml.
+# Runs the same XPath/CSS fallback lists as the live scrapers, so one driver.page_source call
+# replaces hundreds of WebDriver element queries and stored HTML files can be re-parsed without a browser.
+import re
+import sys
+import json
+from urllib.parse import urljoin
+from parsel import Selector
+from site_selectors import (
+    UBER_MERCHANT_SELECTORS,
+    UBER_CATEGORIES_TO_EXCLUDE,
+    SKIP_MERCHANT_SELECTORS,
+    SKIP_INNER_MERCHANT_SELECTORS,
+)
+from menu_extract import build_uber_menu
+
+# Function to find the first node matching one of several selectors
+def select_first(context, selectors):
+    for selector in selectors:
+        if selector['type'] == 'xpath':
+            nodes = context.xpath(selector['value'])
+        elif selector['type'] == 'css':
+            nodes = context.css(selector['value'])
+        else:
+            continue
+        if nodes:
+            return nodes[0]
+    return None  # If none of the selectors match
+
+# Function to find all nodes matching the first selector that matches anything
+def select_all(context, selectors):
+    for selector in selectors:
+        if selector['type'] == 'xpath':
+            nodes = context.xpath(selector['value'])
+        elif selector['type'] == 'css':
+            nodes = context.css(selector['value'])
+        else:
+            continue
+        if nodes:
+            return nodes
+    return []  # If none of the selectors match
+
+# Function to read the visible text of a node, whitespace collapsed and script/style contents left out like WebElement.text
+def node_text(node):
+    return ' '.join(''.join(node.xpath('.//text()[not(ancestor::script or ancestor::style)]').getall()).split())
+
+# Function to read an attribute of a node, resolving relative URLs against the page URL
+def node_url(node, attribute, page_url):
+    value = node.attrib.get(attribute, '')
+    if value and page_url:
+        return urljoin(page_url, value)
+    return value
+
+# Function to read one field (text or url attribute) from the first matching node, None if absent
+def read_field(context, selectors, attribute=None, page_url=''):
+    node = select_first(context, selectors)
+    if node is None:
+        return None
+    if attribute:
+        return node_url(node, attribute, page_url)
+    return node_text(node)
+
+# Function to collect categories and dish fields in the same raw shape EXTRACT_MENU_JS returns
+def read_raw_categories(root, selectors, page_url=''):
+    raw_categories = []
+    for category in select_all(root, selectors['category']):
+        raw_categories.append({
+            'name': read_field(category, selectors['category_name']),
+            'dishes': [
+                {
+                    'dish_name': read_field(dish, selectors['dish_name']),
+                    'dish_price': read_field(dish, selectors['dish_price']),
+                    'dish_description': read_field(dish, selectors['dish_description']),
+                    'dish_img_url': read_field(dish, selectors['dish_image'], 'src', page_url),
+                }
+                for dish in select_all(category, selectors['dish_item'])
+            ],
+        })
+    return raw_categories
+
+# Function to parse an Uber Eats store page snapshot into merchant details and menu
+def parse_uber_merchant(html, page_url='', selectors=UBER_MERCHANT_SELECTORS, categories_to_exclude=UBER_CATEGORIES_TO_EXCLUDE):
+    root = Selector(text=html)
+
+    merchant_name = read_field(root, selectors['merchant_name'])
+    if merchant_name is None:
+        merchant_name = "Not found"
+        print("Merchant name not found")
+
+    address = read_field(root, selectors['address'])
+    if address is None:
+        address = "Not found"
+        print("Address not found")
+
+    banner_image_url = read_field(root, selectors['banner_image'], 'src', page_url)
+    if banner_image_url is None:
+        banner_image_url = "Not found"
+        print("Banner image not found")
+
+    raw_categories = read_raw_categories(root, selectors, page_url)
+    if not raw_categories:
+        print("No categories found")
+
+    return {
+        'merchant_name': merchant_name,
+        'address': address,
+        'banner_image_url': banner_image_url,
+        'menu': build_uber_menu(raw_categories, categories_to_exclude),
+    }
+
+# Function to convert a Skip price label to integer cents
+def convert_skip_price(price_text, merchant_url='', price_error_value="sold out"):
+    price_text = re.sub(r'[^\d\.]', '', price_text.strip())
+    try:
+        return int(float(price_text) * 100)  # Convert to cents
+    except ValueError:
+        print(f"Could not convert price: {price_text} at {merchant_url}")
+        return price_error_value
+
+# Function to parse a SkipTheDishes merchant page snapshot into merchant details and menu
+def parse_skip_merchant(html, page_url='', selectors=SKIP_MERCHANT_SELECTORS, price_error_value="sold out", missing_banner="Not found"):
+    root = Selector(text=html)
+
+    merchant_name = read_field(root, selectors['merchant_name'])
+    if merchant_name is None:
+        merchant_name = "Not found"
+        print(f"Merchant name not found at {page_url}")
+
+    address = read_field(root, selectors['address'])
+    if address is None:
+        address = "Not found"
+        print(f"Address not found at {page_url}")
+
+    banner_image_url = read_field(root, selectors['banner_image'], 'src', page_url)
+    if banner_image_url is None:
+        banner_image_url = missing_banner
+        print(f"Banner image not found at {page_url}")
+
+    menu = {}
+    raw_categories = read_raw_categories(root, selectors, page_url)
+    if not raw_categories:
+        print(f"No categories found at {page_url}")
+
+    for raw_category in raw_categories:
+        category_name = raw_category['name'] if raw_category['name'] is not None else "Uncategorized"
+        menu[category_name] = []
+        for raw_dish in raw_category['dishes']:
+            dish_name = raw_dish['dish_name']
+            if dish_name is None:
+                dish_name = "Not found"
+                print(f"Dish name not found at {page_url}")
+
+            if raw_dish['dish_price'] is None:
+                dish_price = None
+                print(f"Dish price not found for {dish_name} at {page_url}")
+            else:
+                dish_price = convert_skip_price(raw_dish['dish_price'], page_url, price_error_value)
+
+            menu[category_name].append({
+                'dish_name': dish_name,
+                'dish_description': raw_dish['dish_description'] or "",
+                'dish_img_url': raw_dish['dish_img_url'] or "",
+                'dish_price': dish_price
+            })
+
+    return {
+        'merchant_name': merchant_name,
+        'address': address,
+        'banner_image_url': banner_image_url,
+        'menu': menu,
+    }
+
+# Parsers available for stored HTML files, keyed by platform name
+PARSERS = {
+    'uber': parse_uber_merchant,
+    'skip': parse_skip_merchant,
+    'skip_inner': lambda html, page_url='': parse_skip_merchant(
+        html, page_url, SKIP_INNER_MERCHANT_SELECTORS, price_error_value=None, missing_banner=""),
+}
+
+# Function to parse a stored HTML file without a browser
+def parse_file(path, platform, page_url=''):
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    return PARSERS[platform](html, page_url)
+
+# Usage: python page_parser.py <uber|skip|skip_inner> page.html [page.html ...]
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in PARSERS:
+        print(f"Usage: python page_parser.py <{'|'.join(PARSERS)}> page.html [page.html ...]")
+        sys.exit(1)
+    for html_path in sys.argv[2:]:
+        print(json.dumps(parse_file(html_path, sys.argv[1]), ensure_ascii=False, indent=2))
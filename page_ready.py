@@ -0,0 +1,110 @@
+# Adaptive readiness waits: instead of a flat time.sleep after every driver.get, wait until the
+# elements a page type needs are present and the network has gone idle, bounded by a hard timeout.
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from challenge_queue import CHALLENGE_DETECTOR_JS
+
+# Hard timeout in seconds for any readiness wait
+DEFAULT_READY_TIMEOUT = 10
+
+# How long the resource count must stay unchanged before the network counts as idle
+NETWORK_IDLE_TIME = 0.5
+
+# Locators that must all be present before a page of each type is considered ready
+PAGE_READY_CONDITIONS = {
+    'uber_city': [(By.CSS_SELECTOR, 'a[href*="/ca/category/"]')],
+    'uber_category': [(By.CSS_SELECTOR, 'a[href*="/ca/store/"]')],
+    'uber_merchant': [(By.CSS_SELECTOR, 'h1'), (By.CSS_SELECTOR, '#main-content ul li')],
+    'doordash_city': [(By.CSS_SELECTOR, 'a[href*="/store/"]')],
+    'doordash_store': [(By.CSS_SELECTOR, 'h1')],
+    'skip_city': [(By.XPATH, '//*[@id="root"]/div/main/div/div/div/div/div[3]/div[2]/div/a')],
+    'skip_merchant': [(By.CSS_SELECTOR, 'h1'), (By.CSS_SELECTOR, 'h3')],
+    'fantuan_city': [(By.ID, 'scrollableDiv'), (By.CSS_SELECTOR, '#scrollableDiv a')],
+}
+
+# Number of resources the page has requested so far (the timing buffer is enlarged so it keeps counting)
+RESOURCE_COUNT_JS = """
+if (!window.__readyBufferSet && performance.setResourceTimingBufferSize) {
+    performance.setResourceTimingBufferSize(100000);
+    window.__readyBufferSet = true;
+}
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+# Actual wait time of every page: dicts with page_type, url, seconds, ready and challenge
+ready_timings = []
+
+# Function to build the wait condition: every locator present, or a challenge page (which stops the wait
+# early instead of running into the timeout)
+def ready_or_challenged(locators):
+    all_present = EC.all_of(*[EC.presence_of_element_located(locator) for locator in locators])
+    def condition(driver):
+        if driver.execute_script(CHALLENGE_DETECTOR_JS):
+            return 'challenge'
+        return all_present(driver)
+    return condition
+
+# Function to wait until the page stops requesting new resources, or the deadline passes
+def wait_for_network_idle(driver, deadline, idle_time=NETWORK_IDLE_TIME, poll_interval=0.1):
+    last_count = None
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        ready_state, count = driver.execute_script(RESOURCE_COUNT_JS)
+        now = time.monotonic()
+        if ready_state != 'complete' or count != last_count:
+            last_count = count
+            stable_since = now
+        elif now - stable_since >= idle_time:
+            return True
+        time.sleep(poll_interval)
+    return False
+
+# Function to wait until a page of the given type is ready; returns True if it became ready in time
+def wait_until_ready(driver, page_type, timeout=DEFAULT_READY_TIMEOUT, network_idle=True):
+    start = time.monotonic()
+    deadline = start + timeout
+    locators = PAGE_READY_CONDITIONS.get(page_type, [])
+    ready = True
+    challenge = False
+    try:
+        if locators:
+            result = WebDriverWait(driver, timeout, poll_frequency=0.1).until(ready_or_challenged(locators))
+            challenge = result == 'challenge'
+            ready = not challenge
+        if network_idle and ready:
+            ready = wait_for_network_idle(driver, deadline)
+    except TimeoutException:
+        ready = False
+    except WebDriverException as e:
+        print(f"Readiness check failed for {page_type}: {e}")
+        ready = False
+
+    seconds = time.monotonic() - start
+    try:
+        url = driver.current_url
+    except WebDriverException:
+        url = ''
+    ready_timings.append({'page_type': page_type, 'url': url, 'seconds': round(seconds, 3), 'ready': ready,
+                          'challenge': challenge})
+    if challenge:
+        print(f"Challenge page after {seconds:.1f}s ({page_type}): {url}")
+    elif not ready:
+        print(f"Page not ready after {seconds:.1f}s ({page_type}): {url}")
+    return ready
+
+# Function to print the average and maximum wait per page type
+def print_ready_report():
+    if not ready_timings:
+        return
+    print("\nPage readiness waits:")
+    page_types = sorted({timing['page_type'] for timing in ready_timings})
+    for page_type in page_types:
+        timings = [timing for timing in ready_timings if timing['page_type'] == page_type]
+        seconds = [timing['seconds'] for timing in timings]
+        challenges = sum(1 for timing in timings if timing['challenge'])
+        timeouts = sum(1 for timing in timings if not timing['ready']) - challenges
+        print(f"  {page_type}: {len(timings)} pages, avg {sum(seconds) / len(seconds):.2f}s, "
+              f"max {max(seconds):.2f}s, {timeouts} timed out, {challenges} challenges, {sum(seconds):.0f}s total")
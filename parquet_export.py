@@ -0,0 +1,190 @@
+# Columnar export of the scraped merchants and dishes for analytics. The merchant records
+# (records.jsonl, see merchant_record.py) are flattened into two Parquet tables partitioned by
+# platform/city/date, with dictionary-encoded strings and integer cent prices. A manifest keeps the
+# content hash and current version of every merchant, so an export only appends merchants that changed,
+# and load_snapshot reads the current version of every merchant in one vectorized read.
+import os
+import sys
+import json
+import time
+import hashlib
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from master_store import write_json_atomic
+from merchant_record import latest_records
+
+# Default export directory (relative to the working directory)
+PARQUET_DIR = 'menu_parquet'
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# Columns partitioning both tables on disk (hive style: platform=uber/city=richmond/date=2026-10-18)
+PARTITION_COLUMNS = ['platform', 'city', 'date']
+
+# Low-cardinality strings are stored dictionary-encoded and read back as categoricals
+DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
+MERCHANT_SCHEMA = pa.schema([
+    ('platform', DICTIONARY),
+    ('city', DICTIONARY),
+    ('date', DICTIONARY),
+    ('version', pa.string()),
+    ('url', pa.string()),
+    ('name', pa.string()),
+    ('address', pa.string()),
+    ('banner_image_url', pa.string()),
+    ('phone', pa.string()),
+    ('cuisine', DICTIONARY),
+    ('description', pa.string()),
+    ('opening_hours', pa.string()),  # JSON {day: [slots]}
+    ('dish_count', pa.int32()),
+    ('fetched_at', pa.string()),
+])
+
+DISH_SCHEMA = pa.schema([
+    ('platform', DICTIONARY),
+    ('city', DICTIONARY),
+    ('date', DICTIONARY),
+    ('version', pa.string()),
+    ('merchant_url', pa.string()),
+    ('category', DICTIONARY),
+    ('dish_name', pa.string()),
+    ('price_cents', pa.int32()),
+    ('description', pa.string()),
+    ('image_url', pa.string()),
+])
+
+# Function to hash what a merchant contains (not when it was fetched), so unchanged merchants are skipped
+def content_hash(record):
+    content = json.dumps([
+        record.platform, record.url, record.name, record.address, record.cities, record.banner_image_url,
+        record.phone, record.cuisine, record.description, record.opening_hours,
+        [[category.name, [[dish.name, dish.price, dish.description, dish.image_url] for dish in category.dishes]]
+         for category in record.menu],
+    ], ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+# Function to return the partition values of a record
+def partition_values(record):
+    city = record.cities[0] if record.cities else 'unknown'
+    date = record.fetched_at[:10] if record.fetched_at else datetime.now().date().isoformat()
+    return record.platform, city, date
+
+# Function to flatten records into the merchant and dish column lists, every row tagged with its version
+def flatten_records(records, versions):
+    merchants = {name: [] for name in MERCHANT_SCHEMA.names}
+    dishes = {name: [] for name in DISH_SCHEMA.names}
+    for record, version in zip(records, versions):
+        platform, city, date = partition_values(record)
+        for name, value in (
+            ('platform', platform), ('city', city), ('date', date), ('version', version),
+            ('url', record.url), ('name', record.name), ('address', record.address),
+            ('banner_image_url', record.banner_image_url), ('phone', record.phone), ('cuisine', record.cuisine),
+            ('description', record.description),
+            ('opening_hours', json.dumps(record.opening_hours, ensure_ascii=False)),
+            ('dish_count', record.dish_count()), ('fetched_at', record.fetched_at),
+        ):
+            merchants[name].append(value)
+        for category in record.menu:
+            for dish in category.dishes:
+                dishes['platform'].append(platform)
+                dishes['city'].append(city)
+                dishes['date'].append(date)
+                dishes['version'].append(version)
+                dishes['merchant_url'].append(record.url)
+                dishes['category'].append(category.name)
+                dishes['dish_name'].append(dish.name)
+                dishes['price_cents'].append(dish.price)
+                dishes['description'].append(dish.description)
+                dishes['image_url'].append(dish.image_url)
+    return (pa.Table.from_pydict(merchants, schema=MERCHANT_SCHEMA),
+            pa.Table.from_pydict(dishes, schema=DISH_SCHEMA))
+
+# Function to read the manifest {"platform url": {"hash", "version", "city", "date"}}
+def read_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Function to append one table's new rows as a new file in each partition
+def append_table(table, output_dir, table_name, export_id):
+    if table.num_rows == 0:
+        return
+    pq.write_to_dataset(
+        table,
+        os.path.join(output_dir, table_name),
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"part-{export_id}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        compression='zstd',
+    )
+
+# Function to export the merchants whose content changed since the last export; returns (changed, unchanged)
+def export_records(records_paths, output_dir=PARQUET_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(output_dir)
+
+    changed, hashes = [], []
+    unchanged = 0
+    for record in latest_records(records_paths):
+        record_hash = content_hash(record)
+        key = f"{record.platform} {record.url}"
+        if manifest.get(key, {}).get('hash') == record_hash:
+            unchanged += 1
+            continue
+        changed.append(record)
+        hashes.append(record_hash)
+
+    if changed:
+        # A version is unique per export, so a merchant changing back to older content is not read twice
+        export_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        versions = [f"{record_hash[:16]}-{export_id}" for record_hash in hashes]
+        merchants, dishes = flatten_records(changed, versions)
+        append_table(merchants, output_dir, 'merchants', export_id)
+        append_table(dishes, output_dir, 'dishes', export_id)
+
+        for record, record_hash, version in zip(changed, hashes, versions):
+            platform, city, date = partition_values(record)
+            manifest[f"{record.platform} {record.url}"] = {'hash': record_hash, 'version': version,
+                                                           'city': city, 'date': date}
+        # The manifest is written last, so an interrupted export is simply redone on the next run
+        write_json_atomic(os.path.join(output_dir, MANIFEST_FILE_NAME), manifest)
+
+    return len(changed), unchanged
+
+# Function to read the current version of every merchant (or their dishes) in one vectorized read.
+# Older versions of changed merchants stay on disk and are filtered out by the manifest's versions.
+def load_snapshot(output_dir=PARQUET_DIR, table_name='dishes', platform=None, city=None, columns=None):
+    current_versions = pa.array(sorted(entry['version'] for entry in read_manifest(output_dir).values()), pa.string())
+    dataset = ds.dataset(os.path.join(output_dir, table_name), format='parquet',
+                         partitioning=ds.HivePartitioning.discover(infer_dictionary=True))
+    expression = pc.field('version').isin(current_versions)
+    if platform is not None:
+        expression = expression & (pc.field('platform') == platform)
+    if city is not None:
+        expression = expression & (pc.field('city') == city)
+    return dataset.to_table(columns=columns, filter=expression)
+
+# Usage: python parquet_export.py <output_dir> records.jsonl [records.jsonl ...] - appends changed merchants
+#        python parquet_export.py <output_dir> --load                              - times a full snapshot read
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python parquet_export.py <output_dir> records.jsonl [...] | <output_dir> --load")
+        sys.exit(1)
+    output_dir = sys.argv[1]
+    if sys.argv[2] == '--load':
+        start = time.perf_counter()
+        merchants = load_snapshot(output_dir, 'merchants')
+        dishes = load_snapshot(output_dir, 'dishes')
+        print(f"Loaded {merchants.num_rows} merchants and {dishes.num_rows} dishes "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        start = time.perf_counter()
+        changed, unchanged = export_records(sys.argv[2:], output_dir)
+        print(f"Exported {changed} changed merchants ({unchanged} unchanged) to {output_dir} "
+              f"in {time.perf_counter() - start:.2f}s")
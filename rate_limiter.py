@@ -0,0 +1,140 @@
+# Per-host request pacing shared by every scraper. Each platform host has a token bucket (requests per
+# second plus a burst); every driver.get / page.get goes through polite_get, which takes a token first.
+# The rate adapts AIMD style: it creeps up after every successful load and is halved on error pages,
+# disconnects and challenges, so throughput settles just below the point where a site starts blocking.
+import time
+import threading
+from urllib.parse import urlparse
+
+# Starting rate (requests per second), burst and rate ceiling per platform host; matched on the host suffix
+HOST_RATES = {
+    'ubereats.com': {'rate': 2.0, 'burst': 4, 'max_rate': 8.0},
+    'skipthedishes.com': {'rate': 2.0, 'burst': 4, 'max_rate': 8.0},
+    'doordash.com': {'rate': 1.0, 'burst': 2, 'max_rate': 4.0},
+    'fantuanorder.com': {'rate': 0.5, 'burst': 1, 'max_rate': 2.0},
+}
+
+# Any other host
+DEFAULT_HOST_RATE = {'rate': 1.0, 'burst': 2, 'max_rate': 4.0}
+
+# Requests per second added after every successful load
+ADDITIVE_INCREASE = 0.05
+
+# Factor the rate is multiplied with when a host starts blocking, and the floor it never drops below
+BACKOFF_FACTOR = 0.5
+MIN_RATE = 0.05
+
+class HostLimiter:
+    def __init__(self, host, rate, burst, max_rate):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0.0
+        self.slowdowns = 0
+        self.peak_rate = rate
+
+    # Function to add the tokens earned since the last update (caller holds the lock)
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Function to take a token, sleeping until it is available; returns the seconds waited.
+    # The token is reserved under the lock and the sleep happens outside it, so parallel workers queue up
+    # one interval apart instead of all waking at once.
+    def acquire(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.requests += 1
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    # Function to raise the rate a little after a successful load
+    def speed_up(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + ADDITIVE_INCREASE)
+            self.peak_rate = max(self.peak_rate, self.rate)
+
+    # Function to halve the rate and drop the saved-up burst; pause keeps the host idle that many seconds
+    def slow_down(self, pause=0):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = max(MIN_RATE, self.rate * BACKOFF_FACTOR)
+            self.tokens = min(self.tokens, 0) - pause * self.rate
+            self.slowdowns += 1
+            return self.rate
+
+class RateLimiter:
+    def __init__(self, host_rates=HOST_RATES, default_rate=DEFAULT_HOST_RATE):
+        self.host_rates = host_rates
+        self.default_rate = default_rate
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    # Function to return the limiter of a URL's host, created on first use
+    def for_url(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            limiter = self.hosts.get(host)
+            if limiter is None:
+                settings = next((rate for suffix, rate in self.host_rates.items() if host.endswith(suffix)),
+                                self.default_rate)
+                limiter = self.hosts[host] = HostLimiter(host, **settings)
+            return limiter
+
+    # Function to wait for the URL's host to allow the next request; returns the seconds waited
+    def wait(self, url):
+        return self.for_url(url).acquire()
+
+    # Function to record a successful load
+    def record_success(self, url):
+        self.for_url(url).speed_up()
+
+    # Function to record an error page, disconnect or challenge on the URL's host
+    def slow_down(self, url, reason='', pause=0):
+        limiter = self.for_url(url)
+        rate = limiter.slow_down(pause)
+        print(f"Slowing down {limiter.host} to {rate:.2f} requests/s ({reason})")
+
+# Limiter shared by every scraper and pool worker in the process
+rate_limiter = RateLimiter()
+
+# Function to load a URL in a Selenium driver or DrissionPage tab at the pace its host allows. Exceptions
+# (timeouts, disconnects) and a failed DrissionPage load (get returns False) slow the host down; the
+# exception is re-raised for the caller's own handling.
+def polite_get(browser, url, limiter=rate_limiter):
+    limiter.wait(url)
+    try:
+        result = browser.get(url)
+    except Exception as e:
+        limiter.slow_down(url, type(e).__name__)
+        raise
+    if result is False:
+        limiter.slow_down(url, 'load failed')
+    else:
+        limiter.record_success(url)
+    return result
+
+# Function to print the requests, waiting time and final rate per host
+def print_rate_report(limiter=rate_limiter):
+    if not limiter.hosts:
+        return
+    print("\nRequest pacing:")
+    for host, host_limiter in sorted(limiter.hosts.items()):
+        print(f"  {host}: {host_limiter.requests} requests, {host_limiter.waited:.0f}s waited, "
+              f"rate {host_limiter.rate:.2f}/s (peak {host_limiter.peak_rate:.2f}/s), "
+              f"{host_limiter.slowdowns} slowdowns")
+
+# Usage: python rate_limiter.py - prints the configured rate per host
+if __name__ == "__main__":
+    for suffix, settings in list(HOST_RATES.items()) + [('(other hosts)', DEFAULT_HOST_RATE)]:
+        print(f"{suffix}: {settings['rate']}/s, burst {settings['burst']}, up to {settings['max_rate']}/s")
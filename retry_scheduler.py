@@ -0,0 +1,178 @@
+# In-run retries for failed merchant pages. Each failure is classified from its exception type as permanent
+# (missing selectors, broken JSON, parse errors) or retryable (timeouts, browser disconnects and crashes,
+# connection errors, and any error not recognised). Retryable URLs are re-enqueued with jittered exponential backoff up to an attempt
+# cap and retried before the run ends. The run finishes with a structured failure report instead of only
+# the printed error_log.
+import sys
+import json
+import time
+import heapq
+import random
+import threading
+from datetime import datetime
+from crawl_frontier import DEFAULT_MAX_ATTEMPTS
+from master_store import write_json_atomic
+
+# Backoff before the first retry in seconds, doubled on every further attempt up to the maximum
+BASE_RETRY_DELAY = 5
+MAX_RETRY_DELAY = 120
+
+# Failure classes
+TIMEOUT = 'timeout'
+DISCONNECTED = 'disconnected'
+BROWSER_ERROR = 'browser_error'
+CONNECTION_ERROR = 'connection_error'
+MISSING_SELECTOR = 'missing_selector'
+BAD_JSON = 'bad_json'
+PARSE_ERROR = 'parse_error'
+UNKNOWN = 'unknown'
+
+# Exception class names mapped to their failure class, matched on the exception's class hierarchy from the
+# most specific class up. Names are used so DrissionPage and requests need not be imported here.
+EXCEPTION_CLASSES = {
+    'NoSuchElementException': MISSING_SELECTOR,
+    'ElementNotFoundError': MISSING_SELECTOR,
+    'TimeoutException': TIMEOUT,
+    'TimeoutError': TIMEOUT,
+    'PageDisconnectedError': DISCONNECTED,
+    'WebDriverException': BROWSER_ERROR,
+    'RequestException': CONNECTION_ERROR,
+    'ConnectionError': CONNECTION_ERROR,
+    'JSONDecodeError': BAD_JSON,
+    'KeyError': PARSE_ERROR,
+    'IndexError': PARSE_ERROR,
+}
+
+# Failure classes proven not to go away on a retry; every other class, including unknown errors, is retried
+# up to the normal attempt cap
+PERMANENT_CLASSES = {MISSING_SELECTOR, BAD_JSON, PARSE_ERROR}
+
+# Function to classify an exception (or an error message) into a failure class
+def classify(error):
+    if isinstance(error, BaseException):
+        for cls in type(error).__mro__:
+            if cls.__name__ in EXCEPTION_CLASSES:
+                return EXCEPTION_CLASSES[cls.__name__]
+    return UNKNOWN
+
+# Function to return the jittered backoff before the given retry (1 for the first retry)
+def backoff_delay(attempt, base_delay=BASE_RETRY_DELAY, max_delay=MAX_RETRY_DELAY):
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+# Function to return the current time as an ISO timestamp
+def now_timestamp():
+    return datetime.now().isoformat(timespec='seconds')
+
+class RetryScheduler:
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=BASE_RETRY_DELAY, max_delay=MAX_RETRY_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.failures = {}  # url -> failure entry of the report
+        self.queue = []  # Heap of (due time, sequence, url, handler arguments)
+        self.sequence = 0
+
+    # Function to record a failed URL and re-enqueue it when the failure is retryable and attempts are left;
+    # returns whether the failure class is retryable. failure_class overrides the classification.
+    def record_failure(self, url, error, platform, city=None, args=(), failure_class=None):
+        failure_class = failure_class or classify(error)
+        retryable = failure_class not in PERMANENT_CLASSES
+        with self.lock:
+            entry = self.failures.get(url)
+            if entry is None:
+                entry = self.failures[url] = {'url': url, 'platform': platform, 'city': city, 'attempts': 0,
+                                              'first_failed_at': now_timestamp()}
+            entry['attempts'] += 1
+            entry.update({
+                'failure_class': failure_class,
+                'retryable': retryable,
+                'error_type': type(error).__name__ if isinstance(error, BaseException) else 'error',
+                'error': str(error)[:1000],
+                'last_failed_at': now_timestamp(),
+            })
+            if retryable and entry['attempts'] < self.max_attempts:
+                delay = backoff_delay(entry['attempts'], self.base_delay, self.max_delay)
+                heapq.heappush(self.queue, (time.monotonic() + delay, self.sequence, url, args))
+                self.sequence += 1
+                entry['outcome'] = 'retrying'
+                print(f"Retrying {url} in {delay:.0f}s ({failure_class}, attempt {entry['attempts']}/{self.max_attempts})")
+            else:
+                entry['outcome'] = 'gave_up' if retryable else 'permanent'
+        return retryable
+
+    # Function to record a successful scrape; URLs that failed before are reported as recovered
+    def record_success(self, url):
+        with self.lock:
+            entry = self.failures.get(url)
+            if entry is not None:
+                entry['outcome'] = 'recovered'
+
+    # Function to count the URLs waiting for a retry
+    def pending(self):
+        with self.lock:
+            return len(self.queue)
+
+    # Function to retry the queued URLs in due order with handler(url, *args), sleeping until each is due.
+    # Retries that fail again are re-enqueued by the handler's own record_failure until the cap is reached.
+    def run(self, handler):
+        retried = 0
+        while True:
+            with self.lock:
+                if not self.queue:
+                    break
+                due, _, url, args = heapq.heappop(self.queue)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self.lock:
+                # Stays so when the handler neither fails nor succeeds (skipped by the frontier, or parked)
+                self.failures[url]['outcome'] = 'not_retried'
+            handler(url, *args)
+            retried += 1
+        return retried
+
+    # Function to return the report entries, optionally of one platform
+    def report(self, platform=None):
+        with self.lock:
+            return [dict(entry) for entry in self.failures.values() if platform is None or entry['platform'] == platform]
+
+    # Function to write the report as JSON
+    def write_report(self, path, platform=None):
+        entries = self.report(platform)
+        write_json_atomic(path, entries)
+        return len(entries)
+
+# Scheduler shared by every scraper and pool worker in the process
+retry_scheduler = RetryScheduler()
+
+# Function to print the failures per outcome and failure class, and the URLs that are still failing
+def print_failure_report(platform=None, scheduler=retry_scheduler):
+    entries = scheduler.report(platform)
+    if not entries:
+        return
+    print("\nFailures:")
+    for outcome in ('recovered', 'gave_up', 'permanent', 'not_retried', 'retrying'):
+        outcome_entries = [entry for entry in entries if entry['outcome'] == outcome]
+        if not outcome_entries:
+            continue
+        classes = {}
+        for entry in outcome_entries:
+            classes[entry['failure_class']] = classes.get(entry['failure_class'], 0) + 1
+        summary = ', '.join(f"{count} {failure_class}" for failure_class, count in sorted(classes.items()))
+        print(f"  {outcome}: {len(outcome_entries)} URLs ({summary})")
+    for entry in entries:
+        if entry['outcome'] in ('gave_up', 'permanent'):
+            print(f"  [{entry['platform']}/{entry['city']}] {entry['url']} {entry['failure_class']} "
+                  f"after {entry['attempts']} attempts: {entry['error_type']}: {' '.join(entry['error'].split())[:200]}")
+
+# Usage: python retry_scheduler.py failure_report.json - summarizes a written failure report
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python retry_scheduler.py failure_report.json")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        report_scheduler = RetryScheduler()
+        report_scheduler.failures = {entry['url']: entry for entry in json.load(f)}
+    print_failure_report(scheduler=report_scheduler)
@@ -0,0 +1,151 @@
+# Shared WebDriver lookups through XPath/CSS fallback lists ({'type': 'xpath'|'css', 'value': ...}).
+# Each attempt is timed and counted per list in selector_stats; each list is tried most successful first and
+# selectors with a dead record are skipped.
+# In fast-fail mode the whole fallback list is evaluated in one injected script, so a miss costs neither a
+# WebDriver round trip, a NoSuchElementException nor the driver's implicit wait.
+import time
+from contextlib import contextmanager
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.common.exceptions import NoSuchElementException, JavascriptException
+from selector_stats import selector_stats, list_key
+
+# Try each fallback list in order of observed success rate instead of declaration order. A broad late fallback
+# (e.g. the generic span of dish_name) only moves ahead after the specific selectors kept missing; turn this
+# off when a page matches both and the declared priority has to win.
+use_dynamic_order = True
+
+# Skip selectors that never matched in many attempts (see selector_stats.DEAD_SELECTOR_MIN_ATTEMPTS)
+skip_dead_selectors = True
+
+# Evaluate each fallback list in one batched script call instead of one find_element call per selector
+use_fast_fail = True
+
+SELECTOR_BY = {
+    'xpath': By.XPATH,
+    'css': By.CSS_SELECTOR,
+}
+
+# Tries the selectors in order under the context node (the document when null) and returns
+# [index of the first selector that matched or -1, its elements (only the first when asked)]
+FIND_FIRST_MATCH_JS = """
+var context = arguments[0] || document, selectors = arguments[1], firstOnly = arguments[2];
+for (var i = 0; i < selectors.length; i++) {
+    var nodes = [];
+    if (selectors[i].type === 'xpath') {
+        var result = document.evaluate(selectors[i].value, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var j = 0; j < result.snapshotLength; j++) {
+            if (result.snapshotItem(j).nodeType === 1) {
+                nodes.push(result.snapshotItem(j));
+            }
+        }
+    } else {
+        nodes = Array.prototype.slice.call(context.querySelectorAll(selectors[i].value));
+    }
+    if (nodes.length) {
+        return [i, firstOnly ? nodes.slice(0, 1) : nodes];
+    }
+}
+return [-1, []];
+"""
+
+# Function to return the list's stats key and the selectors to try, in the order they should be tried
+def ordered_selectors(selectors, stats):
+    selectors = [selector for selector in selectors if selector['type'] in SELECTOR_BY]
+    key = list_key(selectors)  # Keyed on the declared list, so reordering never changes the key
+    if len(selectors) > 1:
+        if skip_dead_selectors:
+            selectors = stats.live(key, selectors)
+        if use_dynamic_order:
+            selectors = stats.order(key, selectors)
+    return key, selectors
+
+# Function to return the driver behind a lookup context (a driver or a WebElement)
+def context_driver(context):
+    return context.parent if isinstance(context, WebElement) else context
+
+# Function to run the driver with no implicit wait, so find_elements returns an empty list at once on a miss
+@contextmanager
+def no_implicit_wait(driver):
+    implicit_wait = driver.timeouts.implicit_wait
+    if implicit_wait:
+        driver.implicitly_wait(0)
+    try:
+        yield
+    finally:
+        if implicit_wait:
+            driver.implicitly_wait(implicit_wait)
+
+# Function to evaluate a fallback list in one script call; returns (index, elements) or None when a selector
+# could not be evaluated. A stale context or a dead session is raised, not counted as a miss.
+def find_first_match(context, key, selectors, stats, first_only):
+    node = context if isinstance(context, WebElement) else None
+    start = time.perf_counter()
+    try:
+        index, elements = context_driver(context).execute_script(FIND_FIRST_MATCH_JS, node, selectors, first_only)
+    except JavascriptException:
+        return None  # Invalid selector: the per-selector path raises InvalidSelectorException for it
+    tried = selectors if index == -1 else selectors[:index + 1]
+    seconds = (time.perf_counter() - start) / len(tried)
+    for position, selector in enumerate(tried):
+        stats.record(key, selector, position == index, seconds)
+    return index, elements
+
+# Function to try the selectors one find_elements call at a time without an implicit wait. A miss is an empty
+# list; an invalid selector, a stale context or a dead session is raised, not counted as a miss.
+def find_elements_one_by_one(context, key, selectors, stats):
+    with no_implicit_wait(context_driver(context)):
+        for selector in selectors:
+            start = time.perf_counter()
+            elements = context.find_elements(SELECTOR_BY[selector['type']], selector['value'])
+            stats.record(key, selector, bool(elements), time.perf_counter() - start)
+            if elements:
+                return elements
+    return []
+
+# Function to find an element using multiple selectors
+def find_element_by_selectors(context, selectors, stats=selector_stats):
+    stats.record_lookup()
+    key, selectors = ordered_selectors(selectors, stats)
+    if not selectors:
+        return None
+    if use_fast_fail:
+        match = find_first_match(context, key, selectors, stats, True)
+        if match is None:
+            elements = find_elements_one_by_one(context, key, selectors, stats)
+            return elements[0] if elements else None
+        return match[1][0] if match[1] else None
+
+    for selector in selectors:
+        start = time.perf_counter()
+        try:
+            element = context.find_element(SELECTOR_BY[selector['type']], selector['value'])
+        except NoSuchElementException:
+            stats.record(key, selector, False, time.perf_counter() - start)
+            continue
+        stats.record(key, selector, True, time.perf_counter() - start)
+        return element
+    return None  # If none of the selectors match
+
+# Function to find multiple elements using multiple selectors
+def find_elements_by_selectors(context, selectors, stats=selector_stats):
+    stats.record_lookup()
+    key, selectors = ordered_selectors(selectors, stats)
+    if not selectors:
+        return []
+    if use_fast_fail:
+        match = find_first_match(context, key, selectors, stats, False)
+        if match is None:
+            return find_elements_one_by_one(context, key, selectors, stats)
+        return match[1]
+
+    for selector in selectors:
+        start = time.perf_counter()
+        try:
+            elements = context.find_elements(SELECTOR_BY[selector['type']], selector['value'])
+        except NoSuchElementException:
+            elements = []
+        stats.record(key, selector, bool(elements), time.perf_counter() - start)
+        if elements:
+            return elements
+    return []  # If none of the selectors match
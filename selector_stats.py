@@ -0,0 +1,136 @@
+# Per-selector hit/miss counts and lookup latency for the XPath/CSS fallback lists, persisted across runs.
+# Counts are kept per fallback list, since the same selector can mean different things in different lists.
+# Each list is tried most successful first (ties keep the declared order), so a stale first-choice selector
+# stops costing an attempt on every lookup; selectors with a real dead record are skipped and reported.
+import sys
+import json
+import atexit
+import hashlib
+import threading
+from master_store import write_json_atomic
+
+# Default statistics file shared by all scrapers (relative to the working directory)
+SELECTOR_STATS_PATH = 'selector_stats.json'
+
+# A selector with at least this many attempts and no hit ever is dead: reported and no longer tried
+DEAD_SELECTOR_MIN_ATTEMPTS = 50
+
+# Statistics are written to disk every this many recorded attempts (and at exit)
+SAVE_EVERY = 500
+
+# Function to build the key a selector is counted under within its list
+def selector_key(selector):
+    return f"{selector['type']}:{selector['value']}"
+
+# Function to build the key of a fallback list from its selectors
+def list_key(selectors):
+    keys = json.dumps([selector_key(selector) for selector in selectors], ensure_ascii=False)
+    return hashlib.sha1(keys.encode('utf-8')).hexdigest()[:12]
+
+# Function to check whether a statistics entry marks a dead selector
+def is_dead(entry, min_attempts=DEAD_SELECTOR_MIN_ATTEMPTS):
+    return entry['hits'] == 0 and entry['misses'] >= min_attempts
+
+class SelectorStats:
+    # path=None keeps the statistics in memory only
+    def __init__(self, path=SELECTOR_STATS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.lists = {}  # list key -> selector key -> {hits, misses, seconds}
+        self.pending_writes = 0
+        # This run only: lookups and the WebDriver attempts they needed
+        self.run_lookups = 0
+        self.run_attempts = 0
+        self.run_misses = 0
+        if path is None:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Files written before the counts were kept per list hold flat entries; they are dropped
+            self.lists = {key: entries for key, entries in data.items() if 'hits' not in entries}
+        except (OSError, ValueError):
+            pass
+
+    # Function to record one attempt of a selector of a fallback list
+    def record(self, key, selector, hit, seconds):
+        with self.lock:
+            entries = self.lists.setdefault(key, {})
+            entry = entries.setdefault(selector_key(selector), {'hits': 0, 'misses': 0, 'seconds': 0.0})
+            entry['hits' if hit else 'misses'] += 1
+            entry['seconds'] += seconds
+            self.run_attempts += 1
+            if not hit:
+                self.run_misses += 1
+            self.pending_writes += 1
+            if self.pending_writes >= SAVE_EVERY:
+                self._save()
+
+    # Function to count one lookup through a fallback list
+    def record_lookup(self):
+        with self.lock:
+            self.run_lookups += 1
+
+    # Function to estimate how likely a selector of a list is to match; untried selectors start at 0.5
+    def success_rate(self, key, selector):
+        entry = self.lists.get(key, {}).get(selector_key(selector))
+        if entry is None:
+            return 0.5
+        return (entry['hits'] + 1) / (entry['hits'] + entry['misses'] + 2)
+
+    # Function to order a list by success rate; sorted is stable, so ties keep the declared order
+    def order(self, key, selectors):
+        with self.lock:
+            return sorted(selectors, key=lambda selector: self.success_rate(key, selector), reverse=True)
+
+    # Function to return the selectors of a list still worth trying, in declared order: dead ones are skipped,
+    # unless every selector of the list is dead
+    def live(self, key, selectors):
+        with self.lock:
+            entries = self.lists.get(key, {})
+            live = [selector for selector in selectors
+                    if not is_dead(entries.get(selector_key(selector), {'hits': 0, 'misses': 0}))]
+        return live or selectors
+
+    # Function to list (list key, selector key, misses) of the dead selectors
+    def dead_selectors(self, min_attempts=DEAD_SELECTOR_MIN_ATTEMPTS):
+        with self.lock:
+            return sorted((key, selector, entry['misses']) for key, entries in self.lists.items()
+                          for selector, entry in entries.items() if is_dead(entry, min_attempts))
+
+    def _save(self):
+        if self.path is not None:
+            write_json_atomic(self.path, self.lists)
+        self.pending_writes = 0
+
+    # Function to write the statistics to disk
+    def save(self):
+        with self.lock:
+            if self.pending_writes:
+                self._save()
+
+# Statistics shared by every lookup in the process, written at exit
+selector_stats = SelectorStats()
+atexit.register(selector_stats.save)
+
+# Function to print the selector attempts of this run and the dead selectors
+def print_selector_report(stats=selector_stats):
+    if not stats.run_lookups:
+        return
+    print(f"\nSelector lookups: {stats.run_lookups} lookups, {stats.run_attempts} attempts "
+          f"({stats.run_attempts / stats.run_lookups:.2f} per lookup)")
+    dead = stats.dead_selectors()
+    if dead:
+        print("Dead selectors (never matched, skipped):")
+        for key, selector, misses in dead:
+            print(f"  [{key}] {selector} ({misses} misses)")
+
+# Usage: python selector_stats.py [selector_stats.json] - prints every list's selectors in declared order, dead ones marked
+if __name__ == "__main__":
+    stats = SelectorStats(sys.argv[1] if len(sys.argv) > 1 else SELECTOR_STATS_PATH)
+    for key, entries in stats.lists.items():
+        print(f"List {key}:")
+        for selector, entry in entries.items():
+            attempts = entry['hits'] + entry['misses']
+            print(f"  {'DEAD ' if is_dead(entry) else '     '}{entry['hits']:>6}/{attempts:<6} "
+                  f"{entry['seconds'] / max(1, attempts) * 1000:7.1f} ms  {selector}")
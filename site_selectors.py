@@ -0,0 +1,159 @@
+# Selector fallback lists shared by the scrapers, the in-browser extractor and the offline parser.
+# Each list is tried in order; the first selector that matches wins.
+
+# Uber Eats merchant page
+UBER_MERCHANT_SELECTORS = {
+    'merchant_name': [
+        {'type': 'css', 'value': 'h1'},
+        {'type': 'xpath', 'value': '//h1'},
+    ],
+    'address': [
+        {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[2]/div/div/div[3]/div/section/ul/button[1]/div[2]/div[1]/p[1]'},
+        {'type': 'css', 'value': 'address'},
+        {'type': 'xpath', 'value': '//button[@data-testid="store-info-address"]'},
+    ],
+    'banner_image': [
+        {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[1]/div/div[1]/img'},
+        {'type': 'css', 'value': 'img[data-test-id="store-banner-image"]'},
+        {'type': 'xpath', 'value': '//img[contains(@class, "ce ce")]'},
+    ],
+    'category': [
+        {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[7]/div/div/div/div/ul/li'},
+        {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[6]/div/div/div/div/ul/li'},
+        {'type': 'xpath', 'value': '//div[@data-test="store-menu-category"]'},
+        {'type': 'xpath', 'value': '//ul[contains(@class, "c9 c2 c8")]/li'},
+        {'type': 'xpath', 'value': '//h3/ancestor::div[contains(@class, "store-menu-section")]'},
+    ],
+    'category_name': [
+        {'type': 'xpath', 'value': './/div/div/div/div[1]/div/h3'},
+        {'type': 'xpath', 'value': './/h3'},
+        {'type': 'css', 'value': 'h3'},
+    ],
+    'dish_item': [
+        {'type': 'xpath', 'value': './/div/ul/li'},
+        {'type': 'xpath', 'value': './/ul/li'},
+        {'type': 'xpath', 'value': './/div[@role="listitem"]'},
+    ],
+    'dish_name': [
+        {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[1]/span'},
+        {'type': 'xpath', 'value': './/h4'},
+        {'type': 'xpath', 'value': './/span[contains(@class, "c1e c1f")]'},
+        {'type': 'css', 'value': 'a > div > div > div > div > span'},
+    ],
+    'dish_price': [
+        {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[2]/span'},
+        {'type': 'xpath', 'value': './/div[contains(@class, "c1i")]/span'},
+        {'type': 'css', 'value': 'a > div > div > div > div > span[data-test="menu-item-price"]'},
+        {'type': 'xpath', 'value': './/span[contains(@data-test, "menu-item-price")]'},
+    ],
+    'dish_description': [
+        {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[3]/div/span'},
+        {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[2]/div/span'},
+        {'type': 'xpath', 'value': './/p[contains(@class, "menu-item-description")]'},
+        {'type': 'xpath', 'value': './/div[contains(@class, "c1h c1k")]/span'},
+        {'type': 'css', 'value': 'a > div > div > div > div > div > span'},
+    ],
+    'dish_image': [
+        {'type': 'xpath', 'value': './/a/div/div[1]/div[2]/div[1]/picture/img'},
+        {'type': 'xpath', 'value': './/img[contains(@class, "c1l")]'},
+        {'type': 'css', 'value': 'img[data-test="menu-item-image"]'},
+        {'type': 'xpath', 'value': './/img[contains(@src, "menu-items")]'},
+    ],
+}
+
+# List of Uber category names to exclude
+UBER_CATEGORIES_TO_EXCLUDE = ["Buy 1, Get 1 Free", "Offers"]
+
+# SkipTheDishes merchant page (skip_city.py and #finalskip.py)
+SKIP_MERCHANT_SELECTORS = {
+    'merchant_name': [
+        {'type': 'xpath', 'value': '//*[@id="partner-details-wrapper"]/div/div[1]/div/h1'},
+        {'type': 'css', 'value': '#partner-details-wrapper > div > div.sc-bbf989ce-2.gwyuah > div > h1'},
+    ],
+    'address': [
+        {'type': 'xpath', 'value': '//*[@id="partner-details-wrapper"]/div/div[1]/div/div/span[1]'},
+        {'type': 'css', 'value': '#partner-details-wrapper > div > div.sc-bbf989ce-2.gwyuah > div > div > span.sc-7e19ab74-3.kmUxCA'},
+    ],
+    'banner_image': [
+        {'type': 'xpath', 'value': '//*[@id="__next"]/div/main/div[2]/img'},
+        {'type': 'css', 'value': '#__next > div > main > div.sc-c8e71b1-0.dYcQJi > img'},
+    ],
+    'category': [
+        {'type': 'xpath', 'value': '//div[@id and .//h2[@class="sc-8992fe5b-3 ljZFdy"]]'},
+    ],
+    'category_name': [
+        {'type': 'xpath', 'value': './/h2[@class="sc-8992fe5b-3 ljZFdy"]'},
+        {'type': 'css', 'value': 'h2.sc-8992fe5b-3.ljZFdy'},
+    ],
+    'dish_item': [
+        {'type': 'xpath', 'value': './/div[contains(@class, "sc-fUnMCh sc-87c0b655-0")]'},
+        {'type': 'css', 'value': 'div.sc-fUnMCh.sc-87c0b655-0'},
+    ],
+    'dish_name': [
+        {'type': 'xpath', 'value': './/h3[@class="sc-87c0b655-1 jscDUi"]'},
+        {'type': 'css', 'value': 'h3.sc-87c0b655-1.jscDUi'},
+    ],
+    'dish_price': [
+        {'type': 'xpath', 'value': './/h4[@class="sc-87c0b655-3 fXBchI"]'},
+        {'type': 'css', 'value': 'h4.sc-87c0b655-3.fXBchI'},
+    ],
+    'dish_description': [
+        {'type': 'xpath', 'value': './/p'},
+        {'type': 'css', 'value': 'p'},
+    ],
+    'dish_image': [
+        {'type': 'xpath', 'value': './/img[@class="sc-87c0b655-7 hcMNRH"]'},
+        {'type': 'css', 'value': 'img.sc-87c0b655-7.hcMNRH'},
+    ],
+}
+
+# SkipTheDishes merchant page with the data-testid fallbacks used by Skip_inner.py
+SKIP_INNER_MERCHANT_SELECTORS = {
+    'merchant_name': SKIP_MERCHANT_SELECTORS['merchant_name'] + [
+        {'type': 'xpath', 'value': '//h1[@data-testid="restaurant-name"]'},
+    ],
+    'address': SKIP_MERCHANT_SELECTORS['address'] + [
+        {'type': 'xpath', 'value': '//div[@data-testid="restaurant-address"]'},
+    ],
+    'banner_image': SKIP_MERCHANT_SELECTORS['banner_image'] + [
+        {'type': 'xpath', 'value': '//img[@data-testid="restaurant-image"]'},
+    ],
+    'category': [
+        {'type': 'xpath', 'value': '//div[@id and .//h2]'},
+        {'type': 'css', 'value': 'div.menu-category'},
+    ],
+    'category_name': [
+        {'type': 'xpath', 'value': './/h2'},
+        {'type': 'css', 'value': 'h2'},
+    ],
+    'dish_item': [
+        {'type': 'xpath', 'value': './/div[contains(@class, "menu-item")]'},
+        {'type': 'css', 'value': 'div.menu-item'},
+    ],
+    'dish_name': [
+        {'type': 'xpath', 'value': './/h3'},
+        {'type': 'css', 'value': 'h3'},
+    ],
+    'dish_price': [
+        {'type': 'xpath', 'value': './/span[contains(@class, "price-amount")]'},
+        {'type': 'css', 'value': 'span.price-amount'},
+    ],
+    'dish_description': SKIP_MERCHANT_SELECTORS['dish_description'],
+    'dish_image': [
+        {'type': 'xpath', 'value': './/img'},
+        {'type': 'css', 'value': 'img'},
+    ],
+}
+
+# DoorDash store page fields read outside the ld+json block (DOORDASH.py)
+DOORDASH_STORE_SELECTORS = {
+    'cuisine': [
+        {'type': 'xpath', 'value': '//span[contains(@class, "iCdfhy") and contains(@class, "gZPeMs")]'},
+        {'type': 'css', 'value': '.iCdfhy.gZPeMs'},
+    ],
+    'dish_image': [
+        {'type': 'xpath', 'value': '//img[contains(@class, "styles__StyledImg-sc-1322bgy-0")]'},
+        {'type': 'css', 'value': 'img.styles__StyledImg-sc-1322bgy-0.dfviTz'},
+        {'type': 'xpath', 'value': '//img[@alt]'},
+    ],
+}
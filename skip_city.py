@@ -2,277 +2,202 @@ import time
 import os
 import re
 import json
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+import sys
 from selenium.common.exceptions import (
-    NoSuchElementException,
     TimeoutException,
-    WebDriverException,
 )
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-# Function to find an element using multiple selectors
-def find_element_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                return context.find_element(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                return context.find_element(By.CSS_SELECTOR, selector['value'])
-        except NoSuchElementException:
-            continue
-    return None  # If none of the selectors match
-
-# Function to find multiple elements using multiple selectors
-def find_elements_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                elements = context.find_elements(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                elements = context.find_elements(By.CSS_SELECTOR, selector['value'])
-            if elements:
-                return elements
-        except NoSuchElementException:
-            continue
-    return []  # If none of the selectors match
+from browser_factory import LazyDriver, create_chrome_driver, chrome_options, is_browser_crash, BROWSER_CRASH_EXCEPTIONS
+from page_ready import wait_until_ready, print_ready_report
+from lazy_scroll import scroll_until_stable, iter_new_links, print_scroll_report
+from rate_limiter import polite_get, print_rate_report
+from tab_manager import tab_manager_for, quit_driver, print_tab_report
+from master_store import append_master_record, master_index_path, export_master_list
+from page_parser import parse_skip_merchant
+from browser_pool import BrowserPool
+from crawl_frontier import CrawlFrontier, print_frontier_report
+from snapshot_store import SnapshotStore, print_snapshot_report, replay_arguments
+from merchant_record import append_record, from_skip, RECORDS_FILE_NAME
+from challenge_queue import challenge_queue, park_if_challenged, print_challenge_report
+from retry_scheduler import retry_scheduler, print_failure_report
 
 # Function to sanitize filenames
 def sanitize_filename(name):
     return re.sub(r'[<>:"/\\|?*]', '', name)
 
-# Setup Chrome options
-options = webdriver.ChromeOptions()
-# options.add_argument("--headless")  # Uncomment this if you want to run headless
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--window-size=1920,1080")  # Set a larger window size
+# Setup Chrome options from the run's browser profile (SCRAPER_PROFILE=debug for a visible 1920x1080 window)
+options = chrome_options()
 
-# Initialize the WebDriver
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# Function to create a new WebDriver with the options above
+def create_driver():
+    return create_chrome_driver(options)
 
-# Base URL
-base_url = 'https://www.skipthedishes.com'
+# Initialize the WebDriver lazily: Chrome starts on the first page load, not at import
+driver = LazyDriver(create_driver)
 
-# Function to scroll down incrementally
-def scroll_down(driver, scroll_pause_time=0.5, scroll_increment=500):
-    driver.execute_script(f"window.scrollBy(0, {scroll_increment});")
-    time.sleep(scroll_pause_time)
+# Function to return the shared WebDriver that holds the city list pages
+def get_driver():
+    return driver
 
-# Function to scrape a single merchant page using your correct inner code
-def scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory):
-    try:
-        # Open a new tab
-        driver.execute_script("window.open('');")
-        # Switch to the new tab
-        driver.switch_to.window(driver.window_handles[-1])
-        # Navigate to the merchant URL
-        driver.get(merchant_url)
-        wait = WebDriverWait(driver, 10)
+# Number of parallel browsers used to scrape merchants (1 disables the pool)
+pool_size = 4
 
-        # Scroll to load all content
-        def scroll_to_bottom(driver, scrolls=100):
-            for _ in range(scrolls):
-                driver.execute_script("window.scrollBy(0, 200);")  # Scroll down by 200 pixels
-                time.sleep(0.1)  # Wait for new content to load
-
-        scroll_to_bottom(driver)
-
-        # Scrape clean URL for the merchant
-        clean_url = merchant_url.split("/")[-1]
-
-        # Scrape merchant name
-        merchant_name_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="partner-details-wrapper"]/div/div[1]/div/h1'},
-            {'type': 'css', 'value': '#partner-details-wrapper > div > div.sc-bbf989ce-2.gwyuah > div > h1'},
-        ]
-        merchant_name_element = find_element_by_selectors(driver, merchant_name_selectors)
-        if merchant_name_element:
-            merchant_name = merchant_name_element.text.strip()
-        else:
-            merchant_name = "Not found"
-            print(f"Merchant name not found at {merchant_url}")
-
-        # Scrape address
-        address_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="partner-details-wrapper"]/div/div[1]/div/div/span[1]'},
-            {'type': 'css', 'value': '#partner-details-wrapper > div > div.sc-bbf989ce-2.gwyuah > div > div > span.sc-7e19ab74-3.kmUxCA'},
-        ]
-        address_element = find_element_by_selectors(driver, address_selectors)
-        if address_element:
-            address = address_element.text.strip()
-        else:
-            address = "Not found"
-            print(f"Address not found at {merchant_url}")
-
-        # Scrape banner image
-        banner_image_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="__next"]/div/main/div[2]/img'},
-            {'type': 'css', 'value': '#__next > div > main > div.sc-c8e71b1-0.dYcQJi > img'},
-        ]
-        image_elements = find_elements_by_selectors(driver, banner_image_selectors)
-        if image_elements:
-            banner_image_url = image_elements[0].get_attribute('src')
-        else:
-            banner_image_url = "Not found"
-            print(f"Banner image not found at {merchant_url}")
+# Persistent frontier keeping track of discovered, processed and failed merchants across runs
+frontier = CrawlFrontier()
 
-        # Initialize the menu dictionary
-        menu = {}
+# Base URL
+base_url = 'https://www.skipthedishes.com'
 
-        # Find all category containers
-        category_selectors = [
-            {'type': 'xpath', 'value': '//div[@id and .//h2[@class="sc-8992fe5b-3 ljZFdy"]]'},
-        ]
+# Base directory where the JSON files will be saved
+base_save_directory = r'D:\skip\Skip_menu'  # Update the path as needed
+
+# Compressed store of every merchant page, re-parsed without a browser by --replay
+snapshots = SnapshotStore()
+
+# Function to save one merchant's JSON file and append it to the master list index
+def save_merchant(details, merchant_url, city, save_directory, base_save_directory):
+    merchant_name = details['merchant_name']
+    address = details['address']
+    banner_image_url = details['banner_image_url']
+    menu = details['menu']
+
+    # Scrape clean URL for the merchant
+    clean_url = merchant_url.split("/")[-1]
+
+    # Prepare to save the data
+    # Ensure save_directory exists
+    os.makedirs(save_directory, exist_ok=True)
+
+    # Use the clean URL for filename
+    filename = sanitize_filename(clean_url)
+
+    # Full path to save the JSON file
+    file_path = os.path.join(save_directory, f"{filename}.json")
+
+    # Create a data structure to save
+    data_to_save = {
+        'merchant_name': merchant_name,
+        'address': address,
+        'menu': menu,
+        'city': city,
+        'merchant_url': merchant_url,
+        'banner_image_url': banner_image_url
+    }
+
+    # Save the data to a JSON file
+    with open(file_path, 'w', encoding='utf-8') as json_file:
+        json.dump(data_to_save, json_file, ensure_ascii=False, indent=2)
+
+    print(f"Merchant data saved to {file_path}")
+
+    # Add merchant information to the master list
+    merchant_info = {
+        'merchant_name': merchant_name,
+        'url': merchant_url,
+        'address': address,
+        'merchant_icon': banner_image_url,
+        'clean_url': clean_url
+    }
+    # Append to the master list index (all_merchants.json is exported at the end of the run)
+    master_list_path = os.path.join(base_save_directory, "all_merchants.json")
+    append_master_record(master_index_path(master_list_path), merchant_info)
+
+    # Emit the merchant in the shared record format
+    append_record(os.path.join(base_save_directory, RECORDS_FILE_NAME), from_skip(data_to_save))
+
+# Function to record a failed merchant in the frontier and queue it for a retry when the failure is transient
+def record_merchant_failure(merchant_url, error, error_log, city, save_directory, base_save_directory):
+    retryable = retry_scheduler.record_failure(merchant_url, error, 'skip', city,
+                                               (error_log, city, save_directory, base_save_directory))
+    frontier.mark_failed(merchant_url, error, permanent=not retryable)
+
+# Function to scrape a single merchant page using your correct inner code. On a pool worker's browser
+# (driver given) a browser crash is raised again after it is recorded, so the pool rebuilds that browser.
+def scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory, driver=None):
+    # Skip merchants already scraped in this or an earlier run
+    if not frontier.claim(merchant_url, 'skip', city):
+        print(f"Merchant already scraped: {merchant_url}")
+        return
+
+    pool_worker = driver is not None
+    if driver is None:
+        driver = get_driver()
+    tabs = tab_manager_for(driver)
+    try:
+        # Navigate the long-lived worker tab to the merchant URL (the list tab is left untouched)
+        tabs.navigate(merchant_url)
+        wait_until_ready(driver, 'skip_merchant')  # Wait for the rendered menu instead of a fixed sleep
 
-        categories = find_elements_by_selectors(driver, category_selectors)
+        # Park a challenge page for later instead of blocking this browser on it
+        if park_if_challenged(driver.execute_script, merchant_url, 'skip', city):
+            frontier.release(merchant_url, 'challenge')
+            return
 
-        if not categories:
-            print(f"No categories found at {merchant_url}")
-        else:
-            for category in categories:
-                # Extract category name
-                category_name_selectors = [
-                    {'type': 'xpath', 'value': './/h2[@class="sc-8992fe5b-3 ljZFdy"]'},
-                    {'type': 'css', 'value': 'h2.sc-8992fe5b-3.ljZFdy'},
-                ]
-                category_name_element = find_element_by_selectors(category, category_name_selectors)
-                if category_name_element:
-                    category_name = category_name_element.text.strip()
-                else:
-                    category_name = "Uncategorized"
-
-                # Initialize the list for dishes in this category
-                menu[category_name] = []
-
-                # Find all dish items within this category
-                dish_item_selectors = [
-                    {'type': 'xpath', 'value': './/div[contains(@class, "sc-fUnMCh sc-87c0b655-0")]'},
-                    {'type': 'css', 'value': 'div.sc-fUnMCh.sc-87c0b655-0'},
-                ]
-                dish_items = find_elements_by_selectors(category, dish_item_selectors)
-
-                for dish in dish_items:
-                    dish_name = "Not found"
-                    dish_price = None
-                    dish_description = ""
-                    dish_img_url = ""
-
-                    # Dish name
-                    dish_name_selectors = [
-                        {'type': 'xpath', 'value': './/h3[@class="sc-87c0b655-1 jscDUi"]'},
-                        {'type': 'css', 'value': 'h3.sc-87c0b655-1.jscDUi'},
-                    ]
-                    dish_name_element = find_element_by_selectors(dish, dish_name_selectors)
-                    if dish_name_element:
-                        dish_name = dish_name_element.text.strip()
-                    else:
-                        print(f"Dish name not found at {merchant_url}")
-
-                    # Dish price
-                    dish_price_selectors = [
-                        {'type': 'xpath', 'value': './/h4[@class="sc-87c0b655-3 fXBchI"]'},
-                        {'type': 'css', 'value': 'h4.sc-87c0b655-3.fXBchI'},
-                    ]
-                    dish_price_element = find_element_by_selectors(dish, dish_price_selectors)
-                    if dish_price_element:
-                        price_text = dish_price_element.text.strip()
-                        # Process the price text to extract numerical value
-                        price_text = re.sub(r'[^\d\.]', '', price_text)
-                        try:
-                            dish_price = int(float(price_text) * 100)  # Convert to cents
-                        except ValueError:
-                            print(f"Could not convert price: {price_text} at {merchant_url}")
-                            dish_price = "sold out"
-                    else:
-                        print(f"Dish price not found for {dish_name} at {merchant_url}")
-
-                    # Dish description
-                    dish_description_selectors = [
-                        {'type': 'xpath', 'value': './/p'},
-                        {'type': 'css', 'value': 'p'},
-                    ]
-                    dish_description_element = find_element_by_selectors(dish, dish_description_selectors)
-                    if dish_description_element:
-                        dish_description = dish_description_element.text.strip()
-                    else:
-                        dish_description = ""
-
-                    # Dish image
-                    dish_image_selectors = [
-                        {'type': 'xpath', 'value': './/img[@class="sc-87c0b655-7 hcMNRH"]'},
-                        {'type': 'css', 'value': 'img.sc-87c0b655-7.hcMNRH'},
-                    ]
-                    dish_img_element = find_element_by_selectors(dish, dish_image_selectors)
-                    if dish_img_element:
-                        dish_img_url = dish_img_element.get_attribute('src')
-                    else:
-                        dish_img_url = ""
-
-                    # Add the dish to the category list
-                    menu[category_name].append({
-                        'dish_name': dish_name,
-                        'dish_description': dish_description,
-                        'dish_img_url': dish_img_url,
-                        'dish_price': dish_price
-                    })
-
-        # Prepare to save the data
-        # Ensure save_directory exists
-        os.makedirs(save_directory, exist_ok=True)
+        # Scroll to load all content
+        scroll_until_stable(driver, {'type': 'css', 'value': 'h3'}, max_steps=100, label=merchant_url)
+
+        # Snapshot the rendered page once and parse it in-process instead of querying live elements
+        html = driver.page_source
+        snapshots.save(merchant_url, html, 'skip', city)  # Kept for offline replay
+        details = parse_skip_merchant(html, merchant_url)
 
-        # Use the clean URL for filename
-        filename = sanitize_filename(clean_url)
-
-        # Full path to save the JSON file
-        file_path = os.path.join(save_directory, f"{filename}.json")
-
-        # Create a data structure to save
-        data_to_save = {
-            'merchant_name': merchant_name,
-            'address': address,
-            'menu': menu,
-            'city': city,
-            'merchant_url': merchant_url,
-            'banner_image_url': banner_image_url
-        }
-
-        # Save the data to a JSON file
-        with open(file_path, 'w', encoding='utf-8') as json_file:
-            json.dump(data_to_save, json_file, ensure_ascii=False, indent=2)
-
-        print(f"Merchant data saved to {file_path}")
-
-        # Add merchant information to the master list
-        merchant_info = {
-            'merchant_name': merchant_name,
-            'url': merchant_url,
-            'address': address,
-            'merchant_icon': banner_image_url,
-            'clean_url': clean_url
-        }
-        all_merchants.append(merchant_info)
-
-        # Update the master list JSON
-        master_list_path = os.path.join(base_save_directory, "all_merchants.json")
-        with open(master_list_path, 'w', encoding='utf-8') as master_file:
-            json.dump(all_merchants, master_file, ensure_ascii=False, indent=2)
+        save_merchant(details, merchant_url, city, save_directory, base_save_directory)
+        frontier.mark_done(merchant_url)
+        challenge_queue.mark_done(merchant_url)
+        retry_scheduler.record_success(merchant_url)
 
     except Exception as e:
         error_log.append(f"Failed to scrape merchant at {merchant_url}: {e}")
         print(f"Failed to scrape merchant at {merchant_url}: {e}")
+        record_merchant_failure(merchant_url, e, error_log, city, save_directory, base_save_directory)
+        if pool_worker and is_browser_crash(e):
+            raise
     finally:
-        # Close the merchant tab and switch back to the main window
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
+        # Switch back to the list tab; the worker tab stays open for the next merchant
+        tabs.release()
+
+# Function to retry the parked merchants whose retry window has passed (or that were cleared by hand)
+def retry_parked_merchants(error_log, pool=None):
+    due_by_city = {}
+    for item in challenge_queue.due('skip'):
+        due_by_city.setdefault(item['city'], []).append(item['url'])
+    for city, merchant_urls in due_by_city.items():
+        print(f"\nRetrying {len(merchant_urls)} parked merchants in {city}")
+        save_directory = os.path.join(base_save_directory, city or '')
+        os.makedirs(save_directory, exist_ok=True)
+        if pool is not None:
+            pool.map(
+                lambda worker_driver, merchant_url: scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory, worker_driver),
+                merchant_urls,
+            )
+        else:
+            for merchant_url in merchant_urls:
+                scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory)
+
+# Function to re-run the extraction on stored merchant pages without starting a browser
+def replay_snapshots(date=None):
+    error_log = []
+    count = 0
+    for merchant_url, city, html in snapshots.iter_snapshots('skip', date):
+        try:
+            details = parse_skip_merchant(html, merchant_url)
+            save_merchant(details, merchant_url, city, os.path.join(base_save_directory, city or ''), base_save_directory)
+            count += 1
+        except Exception as e:
+            error_log.append(f"Failed to replay merchant at {merchant_url}: {e}")
+            print(f"Failed to replay merchant at {merchant_url}: {e}")
+
+    master_list_path = os.path.join(base_save_directory, "all_merchants.json")
+    if os.path.exists(master_index_path(master_list_path)):
+        exported = export_master_list(master_index_path(master_list_path), master_list_path)
+        print(f"Master list exported with {exported} merchants: {master_list_path}")
+    print(f"\nReplayed {count} merchant snapshots" + (f" from {date}" if date else ""))
+    for error in error_log:
+        print(error)
 
 # Main function to scrape merchants for a list of cities
 def main():
-    global all_merchants, base_save_directory
-    all_merchants = []  # Initialize a list to store all merchants' data
+    global base_save_directory
     cities = [
         "richmond",
         "vancouver",
@@ -295,10 +220,20 @@ def main():
     # Base directory where the JSON files will be saved
     base_save_directory = r'D:\skip\Skip_menu'  # Update the path as needed
 
-    # Create the master list JSON file at the start
+    # The master list index is kept across runs so merchants finished in an earlier run stay in the export
     master_list_path = os.path.join(base_save_directory, "all_merchants.json")
-    with open(master_list_path, 'w', encoding='utf-8') as master_file:
-        json.dump(all_merchants, master_file, ensure_ascii=False, indent=2)
+
+    # Pool of worker browsers for merchant pages; the main driver keeps scrolling the city list
+    pool = None
+    if pool_size > 1:
+        pool = BrowserPool(
+            create_driver,
+            quit_driver,
+            size=pool_size,
+            crash_exceptions=BROWSER_CRASH_EXCEPTIONS,
+            check_browser=lambda worker_driver: worker_driver.window_handles,
+            item_retries=0,  # A crashed merchant is already queued by retry_scheduler
+        )
 
     for city in cities:
         print(f"\nProcessing city: {city}")
@@ -307,54 +242,80 @@ def main():
         save_directory = os.path.join(base_save_directory, city)
         os.makedirs(save_directory, exist_ok=True)
 
-        # Open the city restaurants page
         city_url = f'{base_url}/{city}/restaurants'
-        driver.get(city_url)
-        time.sleep(5)  # Wait for the page to load
-
-        # Initialize variables
-        processed_merchants = set()
-        scroll_times = 0
-        max_scroll_times = 50  # Adjust as needed
-
-        while scroll_times < max_scroll_times:
-            scroll_times += 1
-            print(f"Scrolling down... ({scroll_times}/{max_scroll_times})")
-            # Scroll down to load new merchants
-            scroll_down(driver, scroll_pause_time=1, scroll_increment=500)
-
-            # Find all merchant links currently visible
-            merchant_xpath = '//*[@id="root"]/div/main/div/div/div/div/div[3]/div[2]/div/a'
-            merchant_elements = driver.find_elements(By.XPATH, merchant_xpath)
-
-            # Extract merchant URLs
-            current_merchant_urls = []
-            for element in merchant_elements:
-                href = element.get_attribute('href')
-                if href and href not in processed_merchants:
-                    if href.startswith('/'):
-                        full_url = base_url + href
-                    elif href.startswith('http'):
-                        full_url = href
-                    else:
-                        full_url = base_url + '/' + href
-                    current_merchant_urls.append(full_url)
-                    processed_merchants.add(href)
-
-            if not current_merchant_urls:
-                print("No new merchants found in this scroll.")
-                continue
 
+        # Resume from the frontier instead of scrolling the city list again when it was already harvested
+        if frontier.is_page_harvested(city_url):
+            pending_urls = frontier.pending('skip', city=city)
+            print(f"City list already harvested, {len(pending_urls)} merchants left.")
+            if pool is not None:
+                pool.map(
+                    lambda worker_driver, merchant_url: scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory, worker_driver),
+                    pending_urls,
+                )
+            else:
+                for merchant_url in pending_urls:
+                    scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory)
+            print(f"Finished processing city: {city}")
+            continue
+
+        # Open the city restaurants page
+        polite_get(driver, city_url)
+        wait_until_ready(driver, 'skip_city')  # Wait for the merchant list instead of a fixed sleep
+
+        # Discover merchants incrementally: each round returns only the anchors appended since the last
+        # round (tagged in the DOM) and stops as soon as the list stops growing
+        merchant_xpath = '//*[@id="root"]/div/main/div/div/div/div/div[3]/div[2]/div/a'
+        merchant_count = 0
+        max_scroll_rounds = 1000  # Safety cap
+        for current_merchant_urls in iter_new_links(driver.execute_script, {'type': 'xpath', 'value': merchant_xpath},
+                                                    max_steps=max_scroll_rounds, stable_time=3, label=city_url):
+            merchant_count += len(current_merchant_urls)
             print(f"Found {len(current_merchant_urls)} new merchants.")
+            frontier.add(current_merchant_urls, 'skip', city, city_url)
+
+            # Hand the new merchants to the browser pool when one is running
+            if pool is not None:
+                pool.map(
+                    lambda worker_driver, merchant_url: scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory, worker_driver),
+                    current_merchant_urls,
+                )
+                continue
 
             # For each new merchant, open in a new tab and scrape data
             for merchant_url in current_merchant_urls:
                 scrape_merchant(merchant_url, error_log, city, save_directory, base_save_directory)
 
+        # Remember the city list as harvested so a restarted run does not scroll it again
+        frontier.mark_page_harvested(city_url, 'skip', city, merchant_count)
         print(f"Finished processing city: {city}")
 
-    # Close the WebDriver
-    driver.quit()
+    # Retry the merchants that failed on a transient error, with backoff, before the parked ones
+    if retry_scheduler.pending():
+        print(f"\nRetried {retry_scheduler.run(scrape_merchant)} failed merchants")
+
+    # Retry the merchants parked on a challenge page, in this run or an earlier one
+    retry_parked_merchants(error_log, pool)
+
+    # Export the legacy all_merchants.json from the append-only index
+    count = export_master_list(master_index_path(master_list_path), master_list_path)
+    print(f"Master list exported with {count} merchants: {master_list_path}")
+
+    # Close the worker browsers and the WebDriver
+    if pool is not None:
+        pool.close()
+    quit_driver(driver)
+
+    # Report the frontier state, how long pages took to become ready and how much scrolling was needed
+    print_frontier_report(frontier, 'skip')
+    print_ready_report()
+    print_scroll_report()
+    print_rate_report()
+    print_tab_report()
+    print_snapshot_report(snapshots)
+    print_challenge_report('skip')
+    print_failure_report('skip')
+    retry_scheduler.write_report(os.path.join(base_save_directory, 'failure_report.json'), 'skip')
 
     # Report errors
     if error_log:
@@ -364,5 +325,13 @@ def main():
     else:
         print("\nNo errors encountered during scraping.")
 
+# Usage: python skip_city.py [--fresh] [--replay [--date YYYY-MM-DD]]
+#   --fresh  harvests every list page and scrapes every merchant again, ignoring what earlier runs finished
 if __name__ == "__main__":
-    main()
+    replay, replay_date = replay_arguments(sys.argv[1:])
+    if replay:
+        replay_snapshots(replay_date)
+    else:
+        if '--fresh' in sys.argv[1:]:
+            frontier.start_fresh()
+        main()
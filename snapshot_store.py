@@ -0,0 +1,229 @@
+# Raw HTML snapshot cache shared by the Uber, Skip and DoorDash scrapers. Every fetched page is stored
+# gzip-compressed under its SHA-256 (identical pages share one blob) and indexed by canonical URL and fetch
+# date in SQLite, so the extraction code can be re-run on stored pages without a browser (--replay).
+# The store is size-bounded: once the blobs exceed the limit the oldest snapshots are evicted.
+import os
+import sys
+import gzip
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from url_utils import canonical_url
+
+# Default snapshot directory (relative to the working directory)
+SNAPSHOT_DIR = 'snapshots'
+
+# Compressed size in bytes the blobs may take before the oldest snapshots are evicted
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Eviction goes down to this fraction of the limit, so it does not run again on the next save
+EVICT_TO_RATIO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT NOT NULL,
+    fetch_date TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    city TEXT,
+    fetched_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (url, fetch_date)
+);
+CREATE INDEX IF NOT EXISTS snapshots_platform ON snapshots (platform, fetch_date);
+CREATE INDEX IF NOT EXISTS snapshots_sha256 ON snapshots (sha256);
+CREATE INDEX IF NOT EXISTS snapshots_fetched_at ON snapshots (fetched_at);
+"""
+
+# Compressed size of every distinct blob still referenced by the index
+TOTAL_SIZE_SQL = 'SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM snapshots GROUP BY sha256)'
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR, max_bytes=DEFAULT_MAX_BYTES, compress_level=6):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        # One connection shared by the pool workers, serialised by a lock; opened on first use, so importing
+        # a scraper does not create the snapshot directory
+        self.lock = threading.Lock()
+        self.connection = None
+        self.total_bytes = 0
+        self.saved = 0
+        self.evicted = 0
+
+    # Function to create the store and open its index on first use (caller holds the lock)
+    def _connect(self):
+        if self.connection is None:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            self.connection = sqlite3.connect(os.path.join(self.root, 'index.db'), check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            self.total_bytes = self.connection.execute(TOTAL_SIZE_SQL).fetchone()[0]
+        return self.connection
+
+    # Function to return the blob path of a hash (objects/ab/abcdef....html.gz)
+    def blob_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.html.gz")
+
+    # Function to write a blob once (caller holds the lock); an existing blob with the same hash already holds the same page
+    def _write_blob(self, sha256, compressed):
+        path = self.blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+    # Function to store the HTML of a fetched page; a page fetched again on the same day replaces that day's snapshot
+    def save(self, url, html, platform, city=None):
+        if not html:
+            return None
+        data = html.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        # Compress outside the lock so pool workers only serialise on the disk write and the index update
+        compressed = gzip.compress(data, compresslevel=self.compress_level)
+        fetched_at = datetime.now()
+        key = canonical_url(url)
+        with self.lock:
+            self._connect()
+            size = self._write_blob(sha256, compressed)
+            known = self.connection.execute('SELECT 1 FROM snapshots WHERE sha256 = ? LIMIT 1', (sha256,)).fetchone()
+            with self.connection:
+                replaced = self.connection.execute(
+                    'SELECT sha256 FROM snapshots WHERE url = ? AND fetch_date = ?',
+                    (key, fetched_at.date().isoformat()),
+                ).fetchone()
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO snapshots (url, fetch_date, source_url, platform, city, fetched_at, sha256, size) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, fetched_at.date().isoformat(), url, platform, city,
+                     fetched_at.isoformat(timespec='seconds'), sha256, size),
+                )
+            if not known:
+                self.total_bytes += size
+            if replaced and replaced[0] != sha256:
+                self._delete_unreferenced([replaced[0]])
+            self.saved += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+        return sha256
+
+    # Function to delete the blobs of the given hashes that no snapshot references any more
+    def _delete_unreferenced(self, hashes):
+        for sha256 in set(hashes):
+            if self.connection.execute('SELECT 1 FROM snapshots WHERE sha256 = ? LIMIT 1', (sha256,)).fetchone():
+                continue
+            path = self.blob_path(sha256)
+            try:
+                self.total_bytes -= os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                pass
+
+    # Function to drop the oldest snapshots until the blobs fit under the limit again (caller holds the lock)
+    def _evict(self, batch_size=200):
+        target = self.max_bytes * EVICT_TO_RATIO
+        while self.total_bytes > target:
+            rows = self.connection.execute(
+                'SELECT rowid, sha256 FROM snapshots ORDER BY fetched_at, rowid LIMIT ?', (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            with self.connection:
+                self.connection.executemany('DELETE FROM snapshots WHERE rowid = ?', [(row[0],) for row in rows])
+            self.evicted += len(rows)
+            self._delete_unreferenced([row[1] for row in rows])
+        print(f"Snapshot store over {self.max_bytes / 1024 ** 2:.0f} MB, evicted down to {self.total_bytes / 1024 ** 2:.0f} MB")
+
+    # Function to read a stored blob back as HTML
+    def _read_blob(self, sha256):
+        with gzip.open(self.blob_path(sha256), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    # Function to load the HTML of a URL: the snapshot of the given date (YYYY-MM-DD) or the latest one, None if absent
+    def load(self, url, date=None):
+        sql = 'SELECT sha256 FROM snapshots WHERE url = ?'
+        params = [canonical_url(url)]
+        if date is not None:
+            sql += ' AND fetch_date = ?'
+            params.append(date)
+        with self.lock:
+            row = self._connect().execute(sql + ' ORDER BY fetched_at DESC LIMIT 1', params).fetchone()
+        if row is None:
+            return None
+        try:
+            return self._read_blob(row[0])
+        except OSError:
+            return None
+
+    # Function to list (source_url, city, sha256) of a platform: one row per URL, the given date or the latest fetch
+    def list_snapshots(self, platform, date=None, city=None):
+        sql = ('SELECT source_url, city, sha256 FROM snapshots s WHERE platform = ? AND fetched_at = '
+               '(SELECT MAX(fetched_at) FROM snapshots WHERE url = s.url AND platform = s.platform')
+        params = [platform]
+        if date is not None:
+            sql += ' AND fetch_date = ?'
+            params.append(date)
+        sql += ')'
+        if city is not None:
+            sql += ' AND city = ?'
+            params.append(city)
+        with self.lock:
+            return self._connect().execute(sql + ' ORDER BY fetched_at, rowid', params).fetchall()
+
+    # Function to yield (url, city, html) for the stored pages of a platform, reading one blob at a time
+    def iter_snapshots(self, platform, date=None, city=None):
+        for source_url, snapshot_city, sha256 in self.list_snapshots(platform, date, city):
+            try:
+                html = self._read_blob(sha256)
+            except OSError:
+                print(f"Snapshot blob missing for {source_url}")
+                continue
+            yield source_url, snapshot_city, html
+
+    # Function to count snapshots and their compressed size per platform
+    def stats(self):
+        with self.lock:
+            return self._connect().execute(
+                'SELECT platform, COUNT(*), COUNT(DISTINCT url), MIN(fetch_date), MAX(fetch_date) '
+                'FROM snapshots GROUP BY platform ORDER BY platform'
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+# Function to print how many pages were stored this run and the size of the store
+def print_snapshot_report(store):
+    if store.saved or store.evicted:
+        print(f"\nSnapshots: {store.saved} pages stored, {store.evicted} evicted, "
+              f"{store.total_bytes / 1024 ** 2:.1f} MB on disk in {store.root}")
+
+# Function to read the --replay and --date flags of a scraper's command line; returns (replay, date).
+# A --date without a YYYY-MM-DD value prints the usage and exits.
+def replay_arguments(args):
+    date = None
+    if '--date' in args:
+        index = args.index('--date') + 1
+        date = args[index] if index < len(args) else ''
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            print(f"Usage: python {os.path.basename(sys.argv[0])} [--fresh] [--replay [--date YYYY-MM-DD]]")
+            sys.exit(2)
+    return '--replay' in args, date
+
+# Usage: python snapshot_store.py [snapshots_dir] - prints the stored snapshots per platform
+if __name__ == "__main__":
+    store = SnapshotStore(sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_DIR)
+    for platform, count, urls, first_date, last_date in store.stats():
+        print(f"{platform}: {count} snapshots of {urls} URLs from {first_date} to {last_date}")
+    print(f"{store.total_bytes / 1024 ** 2:.1f} MB of compressed blobs")
@@ -0,0 +1,121 @@
+# Long-lived worker tabs for merchant pages: instead of window.open/close per merchant, each driver keeps
+# one worker tab next to its list tab and reuses it for every navigation. The tab is recycled (closed and
+# reopened) after a number of navigations or when its JS heap grows too large, bounding renderer bloat.
+import threading
+from selenium.common.exceptions import WebDriverException
+from browser_factory import block_resources
+from rate_limiter import polite_get
+
+# Navigations served by one worker tab before it is replaced
+DEFAULT_MAX_NAVIGATIONS = 50
+
+# JS heap size in MB above which the worker tab is replaced after the current merchant
+DEFAULT_MAX_HEAP_MB = 512
+
+# Heap in use by the current document (Chrome only; 0 elsewhere)
+HEAP_SIZE_JS = "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0;"
+
+class TabManager:
+    def __init__(self, driver, max_navigations=DEFAULT_MAX_NAVIGATIONS, max_heap_mb=DEFAULT_MAX_HEAP_MB):
+        self.driver = driver
+        self.max_navigations = max_navigations
+        self.max_heap_bytes = max_heap_mb * 1024 * 1024
+        self.list_handle = driver.current_window_handle  # The tab the manager was created from is never navigated
+        self.worker_handle = None
+        self.navigations = 0
+        self.needs_recycle = False
+        self.total_navigations = 0
+        self.recycles = 0
+
+    # Function to open a fresh worker tab and switch to it
+    def _open_worker(self):
+        self.driver.switch_to.new_window('tab')
+        self.worker_handle = self.driver.current_window_handle
+        block_resources(self.driver)  # Resource blocking is per tab
+        self.navigations = 0
+        self.needs_recycle = False
+
+    # Function to close the worker tab, ignoring a tab that is already gone
+    def _close_worker(self):
+        if self.worker_handle is None:
+            return
+        try:
+            if self.worker_handle in self.driver.window_handles:
+                self.driver.switch_to.window(self.worker_handle)
+                self.driver.close()
+        except WebDriverException:
+            pass
+        self.worker_handle = None
+
+    # Function to navigate the worker tab to a URL, replacing the tab first when it is due for recycling
+    def navigate(self, url):
+        if self.worker_handle is not None and (self.needs_recycle or self.navigations >= self.max_navigations):
+            self._close_worker()
+            self.recycles += 1
+        if self.worker_handle is None or self.worker_handle not in self.driver.window_handles:
+            self._open_worker()
+        else:
+            self.driver.switch_to.window(self.worker_handle)
+        self.navigations += 1
+        self.total_navigations += 1
+        polite_get(self.driver, url)
+
+    # Function to switch back to the list tab, checking the worker tab's heap on the way out. Never raises, so a
+    # caller's finally does not hide the error that broke the page.
+    def release(self):
+        try:
+            if self.worker_handle is not None and self.driver.current_window_handle == self.worker_handle:
+                heap = self.driver.execute_script(HEAP_SIZE_JS) or 0
+                if heap > self.max_heap_bytes:
+                    print(f"Worker tab heap at {heap / 1024 / 1024:.0f} MB, recycling it")
+                    self.needs_recycle = True
+            self.driver.switch_to.window(self.list_handle)
+        except WebDriverException:
+            # A crashed tab or browser: forget the worker tab so the next navigation opens a new one
+            self.needs_recycle = True
+            self.worker_handle = None
+
+    # Function to close the worker tab and return to the list tab
+    def close(self):
+        self._close_worker()
+        try:
+            self.driver.switch_to.window(self.list_handle)
+        except WebDriverException:
+            pass
+
+# One manager per driver, so pool workers each keep their own worker tab
+tab_managers = {}
+tab_managers_lock = threading.Lock()
+
+# Navigations and recycles of the managers of drivers that already quit, kept for the report
+retired_tab_stats = {'drivers': 0, 'navigations': 0, 'recycles': 0}
+
+# Function to return the tab manager of a driver, created on first use from its current tab
+def tab_manager_for(driver):
+    with tab_managers_lock:
+        manager = tab_managers.get(id(driver))
+        if manager is None or manager.driver is not driver:
+            manager = tab_managers[id(driver)] = TabManager(driver)
+        return manager
+
+# Function to quit a driver and drop its tab manager, so the registry does not keep dead drivers alive and a
+# new driver that reuses the id does not inherit the old manager
+def quit_driver(driver):
+    with tab_managers_lock:
+        manager = tab_managers.pop(id(driver), None)
+        if manager is not None and manager.driver is driver:
+            retired_tab_stats['drivers'] += 1
+            retired_tab_stats['navigations'] += manager.total_navigations
+            retired_tab_stats['recycles'] += manager.recycles
+    driver.quit()
+
+# Function to print how many navigations the worker tabs served and how often they were recycled
+def print_tab_report():
+    with tab_managers_lock:
+        drivers = len(tab_managers) + retired_tab_stats['drivers']
+        navigations = sum(manager.total_navigations for manager in tab_managers.values()) + retired_tab_stats['navigations']
+        recycles = sum(manager.recycles for manager in tab_managers.values()) + retired_tab_stats['recycles']
+    if not drivers:
+        return
+    print(f"\nWorker tabs: {navigations} navigations across {drivers} drivers, "
+          f"{drivers + recycles} tabs opened instead of {navigations}")
@@ -0,0 +1,44 @@
+from browser_factory import LazyDriver
+from rate_limiter import RateLimiter, polite_get
+
+
+# Stub WebDriver recording the URLs it was sent to
+class StubDriver:
+    def __init__(self):
+        self.visited = []
+        self.quit_calls = 0
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def test_lazy_driver_starts_browser_on_first_use():
+    created = []
+    driver = LazyDriver(lambda: created.append(StubDriver()) or created[-1])
+    assert not created and not driver.started
+    driver.get('https://example.com/')
+    assert len(created) == 1 and driver.started
+    assert created[0].visited == ['https://example.com/']
+
+
+def test_polite_get_navigates_a_lazy_driver():
+    stub = StubDriver()
+    driver = LazyDriver(lambda: stub)
+    limiter = RateLimiter()
+    polite_get(driver, 'https://www.skipthedishes.com/richmond/restaurants', limiter)
+    assert stub.visited == ['https://www.skipthedishes.com/richmond/restaurants']
+    host = limiter.for_url('https://www.skipthedishes.com/')
+    assert host.slowdowns == 0
+
+
+def test_lazy_driver_quit_restarts_on_next_use():
+    stubs = []
+    driver = LazyDriver(lambda: stubs.append(StubDriver()) or stubs[-1])
+    driver.get('https://example.com/a')
+    driver.quit()
+    assert stubs[0].quit_calls == 1 and not driver.started
+    driver.get('https://example.com/b')
+    assert len(stubs) == 2 and stubs[1].visited == ['https://example.com/b']
@@ -0,0 +1,89 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import doordash_http
+from doordash_http import fetch_store_html
+from doordash_parse import parse_store_page
+from rate_limiter import RateLimiter
+
+STORE_LD_JSON = {
+    '@context': 'https://schema.org',
+    '@type': 'Restaurant',
+    'name': 'Stub Noodle House',
+    'address': {'@type': 'PostalAddress', 'streetAddress': '1 Main St', 'addressLocality': 'Surrey'},
+    'telephone': '+16045550100',
+    'hasMenu': {'hasMenuSection': [[
+        {'name': 'Noodles', 'hasMenuItem': [{'name': 'Beef Noodle Soup', 'offers': {'price': '$12.50'}}]},
+    ]]},
+}
+
+# Saved store page: the ld+json block plus the escaped store state the parser reads the address and phone from
+STORE_PAGE = (
+    '<html><head><title>Stub Noodle House</title>'
+    f'<script type="application/ld+json">{json.dumps(STORE_LD_JSON)}</script></head>'
+    '<body><h1>Stub Noodle House</h1>'
+    '<script>self.__state = "{\\"displayAddress\\":\\"1 Main St, Surrey, BC\\",\\"phoneno\\":\\"6045550100\\"}"</script>'
+    '</body></html>'
+)
+
+# Saved Cloudflare interstitial served instead of the store
+CHALLENGE_PAGE = (
+    '<html><head><title>Just a moment...</title></head>'
+    '<body><form id="challenge-form" action="/"></form></body></html>'
+)
+
+PAGES = {'/store/stub-noodle-house-1/': STORE_PAGE, '/store/challenged-2/': CHALLENGE_PAGE}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    # Unthrottled limiter so the stub host is not paced like a real one
+    monkeypatch.setattr(doordash_http, 'rate_limiter', RateLimiter(default_rate={'rate': 1000.0, 'burst': 100, 'max_rate': 1000.0}))
+    server = HTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_store_page_is_parsed_over_http(stub_server):
+    url = f'{stub_server}/store/stub-noodle-house-1/'
+    html = fetch_store_html(url)
+    assert html is not None
+    data = parse_store_page(html, url)
+    assert data['name'] == 'Stub Noodle House'
+    assert data['url'] == url
+    assert data['address'] == '1 Main St, Surrey, BC'
+    assert data['phone'] == '6045550100'
+    assert data['hasMenu']['hasMenuSection'][0][0]['hasMenuItem'][0]['price'] == 1250
+
+
+def test_challenge_page_falls_back_to_the_browser(stub_server):
+    url = f'{stub_server}/store/challenged-2/'
+    assert fetch_store_html(url) is None
+    assert doordash_http.rate_limiter.for_url(url).slowdowns == 1
+
+
+def test_missing_page_falls_back_to_the_browser(stub_server):
+    assert fetch_store_html(f'{stub_server}/store/missing-3/') is None
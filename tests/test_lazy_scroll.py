@@ -0,0 +1,30 @@
+import lazy_scroll
+from lazy_scroll import SCROLL_STEP_JS, scroll_until_stable
+
+
+# Stub driver answering the scroll step with a scripted item count per step
+class ScrollDriver:
+    def __init__(self, item_counts):
+        self.item_counts = list(item_counts)
+        self.steps = 0
+
+    def execute_script(self, script, *args):
+        if script != SCROLL_STEP_JS:
+            return None
+        items = self.item_counts[min(self.steps, len(self.item_counts) - 1)]
+        self.steps += 1
+        return [1000, 0, items]
+
+
+def test_unrendered_page_is_not_stable(monkeypatch):
+    monkeypatch.setattr(lazy_scroll.time, 'sleep', lambda seconds: None)
+    driver = ScrollDriver([0])
+    steps = scroll_until_stable(driver, {'type': 'css', 'value': 'h3'}, max_steps=20, stable_time=0)
+    assert steps == 20
+
+
+def test_stops_once_items_stop_growing(monkeypatch):
+    monkeypatch.setattr(lazy_scroll.time, 'sleep', lambda seconds: None)
+    driver = ScrollDriver([0, 0, 5, 12, 12])
+    steps = scroll_until_stable(driver, {'type': 'css', 'value': 'h3'}, max_steps=20, stable_time=0)
+    assert steps == 5
@@ -0,0 +1,44 @@
+import selector_lookup
+from selector_lookup import ordered_selectors
+from selector_stats import SelectorStats, list_key, DEAD_SELECTOR_MIN_ATTEMPTS
+
+SELECTORS = [
+    {'type': 'css', 'value': '.stale'},
+    {'type': 'css', 'value': '.current'},
+    {'type': 'xpath', 'value': '//span'},
+]
+
+
+def record(stats, selector, hits, misses):
+    for _ in range(hits):
+        stats.record(list_key(SELECTORS), selector, True, 0.0)
+    for _ in range(misses):
+        stats.record(list_key(SELECTORS), selector, False, 0.0)
+
+
+def test_lists_are_tried_most_successful_first(monkeypatch):
+    monkeypatch.setattr(selector_lookup, 'use_dynamic_order', True)
+    stats = SelectorStats(None)
+    record(stats, SELECTORS[0], 1, 5)
+    record(stats, SELECTORS[1], 5, 0)
+    _, ordered = ordered_selectors(SELECTORS, stats)
+    assert ordered == [SELECTORS[1], SELECTORS[2], SELECTORS[0]]
+
+
+def test_declared_order_without_dynamic_ordering(monkeypatch):
+    monkeypatch.setattr(selector_lookup, 'use_dynamic_order', False)
+    stats = SelectorStats(None)
+    record(stats, SELECTORS[1], 5, 0)
+    _, ordered = ordered_selectors(SELECTORS, stats)
+    assert ordered == SELECTORS
+
+
+def test_dead_selectors_are_skipped_and_stats_are_per_list(monkeypatch):
+    monkeypatch.setattr(selector_lookup, 'use_dynamic_order', False)
+    stats = SelectorStats(None)
+    record(stats, SELECTORS[0], 0, DEAD_SELECTOR_MIN_ATTEMPTS)
+    _, ordered = ordered_selectors(SELECTORS, stats)
+    assert ordered == SELECTORS[1:]
+    # The same selector in another list keeps its own, empty record
+    _, other = ordered_selectors(SELECTORS[:2], stats)
+    assert other == SELECTORS[:2]
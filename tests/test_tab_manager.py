@@ -0,0 +1,55 @@
+from selenium.common.exceptions import WebDriverException
+
+from tab_manager import TabManager
+
+
+# Stub driver whose session can be killed; every call then raises like a crashed browser
+class TabDriver:
+    def __init__(self):
+        self.handles = ['list']
+        self.current_window_handle = 'list'
+        self.crashed = False
+        self.visited = []
+        self.switch_to = self
+
+    @property
+    def window_handles(self):
+        self._check()
+        return list(self.handles)
+
+    def _check(self):
+        if self.crashed:
+            raise WebDriverException('invalid session id')
+
+    def new_window(self, kind):
+        self._check()
+        handle = f'tab{len(self.handles)}'
+        self.handles.append(handle)
+        self.current_window_handle = handle
+
+    def window(self, handle):
+        self._check()
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        self._check()
+        return 0
+
+    def get(self, url):
+        self._check()
+        self.visited.append(url)
+
+
+def test_release_after_crash_does_not_raise_and_next_navigate_recovers():
+    driver = TabDriver()
+    tabs = TabManager(driver)
+    tabs.navigate('https://www.skipthedishes.com/a')
+    worker = tabs.worker_handle
+    driver.crashed = True
+    tabs.release()
+    assert tabs.worker_handle is None and tabs.needs_recycle
+
+    driver.crashed = False
+    tabs.navigate('https://www.skipthedishes.com/b')
+    assert tabs.worker_handle not in (None, worker)
+    assert driver.visited == ['https://www.skipthedishes.com/a', 'https://www.skipthedishes.com/b']
@@ -2,55 +2,48 @@ import time
 import json
 import os
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+import sys
+from parsel import Selector
 from selenium.common.exceptions import (
-    NoSuchElementException,
     TimeoutException,
     WebDriverException,
 )
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-
-# Setup Chrome options
-options = webdriver.ChromeOptions()
-# options.add_argument("--headless")  # Uncomment this if you want to run headless
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--window-size=1920,1080")  # Set a larger window size
-
-# Initialize the WebDriver
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()), options=options
-)
-
-# Function to find an element using multiple selectors
-def find_element_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                return context.find_element(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                return context.find_element(By.CSS_SELECTOR, selector['value'])
-        except NoSuchElementException:
-            continue
-    return None  # If none of the selectors match
-
-# Function to find multiple elements using multiple selectors
-def find_elements_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                elements = context.find_elements(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                elements = context.find_elements(By.CSS_SELECTOR, selector['value'])
-            if elements:
-                return elements
-        except NoSuchElementException:
-            continue
-    return []  # If none of the selectors match
+from browser_factory import LazyDriver, create_chrome_driver, chrome_options, is_browser_crash, BROWSER_CRASH_EXCEPTIONS
+from page_ready import wait_until_ready, print_ready_report
+from lazy_scroll import scroll_until_stable, print_scroll_report
+from rate_limiter import polite_get, print_rate_report
+from master_store import append_master_record, master_index_path, export_master_dict
+from crawl_frontier import CrawlFrontier, print_frontier_report
+from url_utils import canonical_store_url
+from site_selectors import UBER_MERCHANT_SELECTORS, UBER_CATEGORIES_TO_EXCLUDE
+from menu_extract import extract_uber_merchant, convert_uber_price
+from browser_pool import BrowserPool
+from page_parser import parse_uber_merchant, select_all, select_first, node_text
+from snapshot_store import SnapshotStore, print_snapshot_report, replay_arguments
+from merchant_record import append_record, from_uber, RECORDS_FILE_NAME
+from selector_lookup import find_element_by_selectors, find_elements_by_selectors
+from selector_stats import print_selector_report
+from challenge_queue import challenge_queue, park_if_challenged, print_challenge_report
+from retry_scheduler import retry_scheduler, print_failure_report, MISSING_SELECTOR
+
+# Setup Chrome options from the run's browser profile (SCRAPER_PROFILE=debug for a visible 1920x1080 window)
+options = chrome_options()
+
+# Function to create a new WebDriver with the options above
+def create_driver():
+    return create_chrome_driver(options)
+
+# Initialize the WebDriver lazily: Chrome starts on the first page load, not at import
+driver = LazyDriver(create_driver)
+
+# Function to return the shared WebDriver used for city and category pages
+def get_driver():
+    return driver
+
+# Number of parallel browsers used to scrape merchants (1 disables the pool)
+pool_size = 4
 
 # Function to sanitize filenames
 def sanitize_filename(name):
@@ -64,26 +57,71 @@ def format_city_name_for_url(city_name):
     formatted_name = re.sub(r'[^\w\-]', '', formatted_name)  # Remove non-alphanumeric characters except hyphens
     return formatted_name
 
-# Initialize the set to keep track of processed merchants
-processed_merchants = set()
+# Persistent frontier keeping track of discovered, processed and failed merchants across runs
+frontier = CrawlFrontier()
+
+# Extract each merchant page with one injected JavaScript pass instead of per-element WebDriver calls
+use_js_extraction = True
+
+# Compressed store of every merchant page, re-parsed without a browser by --replay
+snapshots = SnapshotStore()
 
 # Path to the master JSON file (define this at the top level)
 base_save_directory = r'E:\Uber\Uber_menu'
 master_json_path = os.path.join(base_save_directory, 'master.json')
 
+# Cross-platform merchant records emitted next to the JSON files
+records_path = os.path.join(base_save_directory, RECORDS_FILE_NAME)
+
+# Selectors to find the opening times containers
+opening_times_container_selectors = [
+    {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[2]/div/div/div[3]/div/section/div[2]/div/div/div'},
+    {'type': 'xpath', 'value': '//section[contains(@aria-label, "Store Info")]/div[2]/div/div/div'},
+    {'type': 'xpath', 'value': '//section//div[@data-baseweb="typo-labelmedium"]/ancestor::div[1]'},
+    {'type': 'xpath', 'value': '//section//div[contains(text(), "Sunday")]/ancestor::div[1]'},
+    {'type': 'xpath', 'value': '//section//div[div[@data-baseweb="typo-labelmedium"] and p[@data-baseweb="typo-paragraphsmall"]]'},
+]
+
+# The day(s) element of a container
+opening_day_selectors = [
+    {'type': 'xpath', 'value': './div'},
+    {'type': 'xpath', 'value': './div[@data-baseweb="typo-labelmedium"]'},
+    {'type': 'css', 'value': 'div[data-baseweb="typo-labelmedium"]'},
+]
+
+# The time(s) element of a container
+opening_time_selectors = [
+    {'type': 'xpath', 'value': './p'},
+    {'type': 'xpath', 'value': './p[@data-baseweb="typo-paragraphsmall"]'},
+    {'type': 'css', 'value': 'p[data-baseweb="typo-paragraphsmall"]'},
+]
+
+# Function to add the time slot of one container to every day its label covers
+def add_opening_times(opening_times, day_text, time_text):
+    if not (day_text and time_text):
+        return
+    # Handle multiple days separated by commas or hyphens
+    days = []
+    if '-' in day_text:
+        start_day, end_day = map(str.strip, day_text.split('-'))
+        days_range = get_days_range(start_day, end_day)
+        days.extend(days_range)
+    elif ',' in day_text:
+        days_list = [day.strip() for day in day_text.split(',')]
+        days.extend(days_list)
+    else:
+        days.append(day_text.strip())
+
+    # For each day, add the time slot
+    for day in days:
+        if day not in opening_times:
+            opening_times[day] = []
+        opening_times[day].append(time_text)
+
 # Function to scrape the opening times of a merchant
 def scrape_opening_times(context):
     opening_times = {}
 
-    # Selectors to find the opening times containers
-    opening_times_container_selectors = [
-        {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[2]/div/div/div[3]/div/section/div[2]/div/div/div'},
-        {'type': 'xpath', 'value': '//section[contains(@aria-label, "Store Info")]/div[2]/div/div/div'},
-        {'type': 'xpath', 'value': '//section//div[@data-baseweb="typo-labelmedium"]/ancestor::div[1]'},
-        {'type': 'xpath', 'value': '//section//div[contains(text(), "Sunday")]/ancestor::div[1]'},
-        {'type': 'xpath', 'value': '//section//div[div[@data-baseweb="typo-labelmedium"] and p[@data-baseweb="typo-paragraphsmall"]]'},
-    ]
-
     containers = []
     for container_selector in opening_times_container_selectors:
         containers = find_elements_by_selectors(context, [container_selector])
@@ -92,48 +130,42 @@ def scrape_opening_times(context):
 
     if containers:
         for container in containers:
-            # The day(s) element
-            day_selectors = [
-                {'type': 'xpath', 'value': './div'},
-                {'type': 'xpath', 'value': './div[@data-baseweb="typo-labelmedium"]'},
-                {'type': 'css', 'value': 'div[data-baseweb="typo-labelmedium"]'},
-            ]
-            day_element = find_element_by_selectors(container, day_selectors)
+            day_element = find_element_by_selectors(container, opening_day_selectors)
             if day_element:
                 day_text = day_element.get_attribute('textContent').strip()
             else:
                 day_text = ""
 
-            # The time(s) element
-            time_selectors = [
-                {'type': 'xpath', 'value': './p'},
-                {'type': 'xpath', 'value': './p[@data-baseweb="typo-paragraphsmall"]'},
-                {'type': 'css', 'value': 'p[data-baseweb="typo-paragraphsmall"]'},
-            ]
-            time_element = find_element_by_selectors(container, time_selectors)
+            time_element = find_element_by_selectors(container, opening_time_selectors)
             if time_element:
                 time_text = time_element.get_attribute('textContent').strip()
             else:
                 time_text = ""
 
-            if day_text and time_text:
-                # Handle multiple days separated by commas or hyphens
-                days = []
-                if '-' in day_text:
-                    start_day, end_day = map(str.strip, day_text.split('-'))
-                    days_range = get_days_range(start_day, end_day)
-                    days.extend(days_range)
-                elif ',' in day_text:
-                    days_list = [day.strip() for day in day_text.split(',')]
-                    days.extend(days_list)
-                else:
-                    days.append(day_text.strip())
+            add_opening_times(opening_times, day_text, time_text)
+    else:
+        print("Opening times containers not found")
+
+    return opening_times
 
-                # For each day, add the time slot
-                for day in days:
-                    if day not in opening_times:
-                        opening_times[day] = []
-                    opening_times[day].append(time_text)
+# Function to read the opening times from a stored page snapshot with the same selectors
+def parse_opening_times(html):
+    opening_times = {}
+    root = Selector(text=html)
+
+    containers = []
+    for container_selector in opening_times_container_selectors:
+        containers = select_all(root, [container_selector])
+        if containers:
+            break
+
+    if containers:
+        for container in containers:
+            day_node = select_first(container, opening_day_selectors)
+            time_node = select_first(container, opening_time_selectors)
+            day_text = node_text(day_node) if day_node is not None else ""
+            time_text = node_text(time_node) if time_node is not None else ""
+            add_opening_times(opening_times, day_text, time_text)
     else:
         print("Opening times containers not found")
 
@@ -158,298 +190,277 @@ def get_days_range(start_day, end_day):
         # If days not recognized, return the original string as a list
         return [f"{start_day} - {end_day}"]
 
-# Function to update the master JSON file
+# Function to record a merchant in the append-only master index (master.json is exported at the end of the run)
 def update_master_json(data_to_save, master_json_path):
-    # If the master JSON does not exist, create an empty dict
-    if os.path.exists(master_json_path):
-        with open(master_json_path, 'r', encoding='utf-8') as f:
-            master_data = json.load(f)
-    else:
-        master_data = {}
-
-    # Use merchant name as key
-    merchant_name = data_to_save['merchant_name']
-
-    # Update or add the merchant data
-    master_data[merchant_name] = {
+    # Update or add the merchant data, keyed by URL
+    append_master_record(master_index_path(master_json_path), {
+        'merchant_name': data_to_save['merchant_name'],
         'address': data_to_save['address'],
         'opening_times': data_to_save.get('opening_times', {}),
         'url': data_to_save.get('merchant_url', ''),
         'banner_image_url': data_to_save.get('banner_image_url', ''),
         'cities': data_to_save.get('cities', []),
         # Add other relevant data if needed
+    })
+
+# Function to scrape merchant details and menu element by element (one WebDriver call per field)
+def scrape_merchant_details_by_elements(driver):
+    # Scrape merchant name
+    merchant_name_element = find_element_by_selectors(driver, UBER_MERCHANT_SELECTORS['merchant_name'])
+    if merchant_name_element:
+        merchant_name = merchant_name_element.text.strip()
+    else:
+        merchant_name = "Not found"
+        print("Merchant name not found")
+
+    # Scrape address
+    address_element = find_element_by_selectors(driver, UBER_MERCHANT_SELECTORS['address'])
+    if address_element:
+        address = address_element.text.strip()
+    else:
+        address = "Not found"
+        print("Address not found")
+
+    # Scrape banner image
+    image_element = find_element_by_selectors(driver, UBER_MERCHANT_SELECTORS['banner_image'])
+    if image_element:
+        banner_image_url = image_element.get_attribute('src')
+    else:
+        banner_image_url = "Not found"
+        print("Banner image not found")
+
+    # Dictionary to hold all categories and their dishes
+    menu = {}
+
+    categories = find_elements_by_selectors(driver, UBER_MERCHANT_SELECTORS['category'])
+    if not categories:
+        print("No categories found")
+    else:
+        for category in categories:
+            # Extract category name
+            category_name_element = find_element_by_selectors(category, UBER_MERCHANT_SELECTORS['category_name'])
+            if category_name_element:
+                category_name = category_name_element.text.strip()
+            else:
+                category_name = "Uncategorized"
+
+            # Skip the category if it's in the exclusion list
+            if category_name in UBER_CATEGORIES_TO_EXCLUDE:
+                print(f"Skipping category: {category_name}")
+                continue  # Skip to the next category
+
+            # Initialize the list for dishes in this category
+            menu[category_name] = []
+
+            dish_items = find_elements_by_selectors(category, UBER_MERCHANT_SELECTORS['dish_item'])
+
+            for dish in dish_items:
+                dish_name = "Not found"
+                dish_price = None  # Initialize as None
+                dish_description = ""
+                dish_img_url = ""
+
+                dish_name_element = find_element_by_selectors(dish, UBER_MERCHANT_SELECTORS['dish_name'])
+                if dish_name_element:
+                    dish_name = dish_name_element.text.strip()
+                else:
+                    print("Dish name not found")
+
+                dish_price_element = find_element_by_selectors(dish, UBER_MERCHANT_SELECTORS['dish_price'])
+                if dish_price_element:
+                    dish_price = convert_uber_price(dish_price_element.text)
+                else:
+                    print("Dish price element not found")
+
+                dish_description_element = find_element_by_selectors(dish, UBER_MERCHANT_SELECTORS['dish_description'])
+                if dish_description_element:
+                    dish_description = dish_description_element.text.strip()
+
+                dish_img_element = find_element_by_selectors(dish, UBER_MERCHANT_SELECTORS['dish_image'])
+                if dish_img_element:
+                    dish_img_url = dish_img_element.get_attribute('src')
+
+                # Add the dish to the category list
+                menu[category_name].append({
+                    'dish_name': dish_name,
+                    'dish_description': dish_description,
+                    'dish_img_url': dish_img_url,
+                    'dish_price': dish_price
+                })
+
+    return {
+        'merchant_name': merchant_name,
+        'address': address,
+        'banner_image_url': banner_image_url,
+        'menu': menu,
+        'category_count': len(categories),
     }
 
-    # Save the updated master data
-    with open(master_json_path, 'w', encoding='utf-8') as f:
-        json.dump(master_data, f, ensure_ascii=False, indent=2)
+# Function to save one merchant's JSON file and record it in the master index
+def save_merchant(details, opening_times, merchant_url, city, save_directory):
+    # Create a data structure to save, including merchant details and menu
+    data_to_save = {
+        'merchant_name': details['merchant_name'],
+        'address': details['address'],
+        'banner_image_url': details['banner_image_url'],
+        'menu': details['menu'],
+        'cities': [city],  # Initialize with the current city
+        'opening_times': opening_times,
+        'merchant_url': merchant_url,
+    }
+
+    # Sanitize merchant name for filename
+    filename = sanitize_filename(details['merchant_name'])
+
+    # Full path to save the JSON file
+    file_path = os.path.join(save_directory, f"{filename}.json")
 
-# Function to scrape a single merchant
-def scrape_merchant(merchant_url, error_log, city, save_directory):
-    # Check if the merchant has already been processed
-    if merchant_url in processed_merchants:
+    # Save the data to a JSON file
+    with open(file_path, 'w', encoding='utf-8') as json_file:
+        json.dump(data_to_save, json_file, ensure_ascii=False, indent=2)
+
+    print(f"Merchant data saved to {file_path}")
+
+    # Update the master JSON file
+    update_master_json(data_to_save, master_json_path)
+
+    # Emit the merchant in the shared record format
+    append_record(records_path, from_uber(data_to_save))
+
+# Function to record a failed merchant in the frontier and queue it for a retry when the failure is transient
+def record_merchant_failure(merchant_url, error, error_log, city, save_directory, failure_class=None):
+    retryable = retry_scheduler.record_failure(merchant_url, error, 'uber', city, (error_log, city, save_directory),
+                                               failure_class)
+    frontier.mark_failed(merchant_url, error, permanent=not retryable)
+
+# Function to scrape a single merchant. On a pool worker's browser (driver given) a browser crash is raised
+# again after it is recorded, so the pool rebuilds that browser.
+def scrape_merchant(merchant_url, error_log, city, save_directory, driver=None):
+    # Check if the merchant has already been processed, in this run or an earlier one
+    if not frontier.claim(merchant_url, 'uber', city):
         print(f"Merchant already processed: {merchant_url}")
         return
+    pool_worker = driver is not None
+    if driver is None:
+        driver = get_driver()
     try:
-        driver.get(merchant_url)
-
-        # Adding a wait to ensure the page has fully loaded
-        time.sleep(3)  # Initial wait time to allow loading
-
-        # Function to incrementally scroll down the page until no more content loads
-        def scroll_to_bottom(driver, scrolls=100):
-            for _ in range(scrolls):
-                driver.execute_script("window.scrollBy(0, 200);")  # Scroll down by 200 pixels
-                time.sleep(0.1)  # Wait for new content to load
-
-        # Execute the scrolling function to load all dishes
-        scroll_to_bottom(driver)
-
-        # Scrape merchant name
-        merchant_name_selectors = [
-            {'type': 'css', 'value': 'h1'},
-            {'type': 'xpath', 'value': '//h1'},
-        ]
-        merchant_name_element = find_element_by_selectors(driver, merchant_name_selectors)
-        if merchant_name_element:
-            merchant_name = merchant_name_element.text.strip()
-        else:
-            merchant_name = "Not found"
-            print("Merchant name not found")
-
-        # Scrape address
-        address_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[2]/div/div/div[3]/div/section/ul/button[1]/div[2]/div[1]/p[1]'},
-            {'type': 'css', 'value': 'address'},
-            {'type': 'xpath', 'value': '//button[@data-testid="store-info-address"]'},
-        ]
-        address_element = find_element_by_selectors(driver, address_selectors)
-        if address_element:
-            address = address_element.text.strip()
-        else:
-            address = "Not found"
-            print("Address not found")
-
-        # Scrape banner image
-        banner_image_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[1]/div/div[1]/img'},
-            {'type': 'css', 'value': 'img[data-test-id="store-banner-image"]'},
-            {'type': 'xpath', 'value': '//img[contains(@class, "ce ce")]'},
-        ]
-        image_element = find_element_by_selectors(driver, banner_image_selectors)
-        if image_element:
-            banner_image_url = image_element.get_attribute('src')
-        else:
-            banner_image_url = "Not found"
-            print("Banner image not found")
+        polite_get(driver, merchant_url)
 
-        # Scrape opening times
-        opening_times = scrape_opening_times(driver)
+        # Wait until the page is ready instead of a fixed sleep
+        wait_until_ready(driver, 'uber_merchant')
 
-        # Dictionary to hold all categories and their dishes
-        menu = {}
+        # Park a challenge page for later instead of blocking this browser on it
+        if park_if_challenged(driver.execute_script, merchant_url, 'uber', city):
+            frontier.release(merchant_url, 'challenge')
+            return
 
-        # List of category names to exclude
-        categories_to_exclude = ["Buy 1, Get 1 Free", "Offers"]
+        # Scroll until the menu stops growing
+        scroll_until_stable(driver, {'type': 'css', 'value': '#main-content ul li'}, max_steps=100, label=merchant_url)
 
-        # Selectors to find all category containers
-        category_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[7]/div/div/div/div/ul/li'},
-            {'type': 'xpath', 'value': '//*[@id="main-content"]/div/div[6]/div/div/div/div/ul/li'},
-            {'type': 'xpath', 'value': '//div[@data-test="store-menu-category"]'},
-            {'type': 'xpath', 'value': '//ul[contains(@class, "c9 c2 c8")]/li'},
-            {'type': 'xpath', 'value': '//h3/ancestor::div[contains(@class, "store-menu-section")]'},
-        ]
+        # Keep the fully loaded page for offline replay
+        snapshots.save(merchant_url, driver.page_source, 'uber', city)
 
-        # Wait for the categories to be present
+        # Scrape merchant details and the full menu
         try:
-            categories = find_elements_by_selectors(driver, category_selectors)
-            if not categories:
-                print("No categories found")
+            if use_js_extraction:
+                details = extract_uber_merchant(driver)
             else:
-                for category in categories:
-                    # Extract category name
-                    category_name_selectors = [
-                        {'type': 'xpath', 'value': './/div/div/div/div[1]/div/h3'},
-                        {'type': 'xpath', 'value': './/h3'},
-                        {'type': 'css', 'value': 'h3'},
-                    ]
-                    category_name_element = find_element_by_selectors(category, category_name_selectors)
-                    if category_name_element:
-                        category_name = category_name_element.text.strip()
-                    else:
-                        category_name = "Uncategorized"
-
-                    # Skip the category if it's in the exclusion list
-                    if category_name in categories_to_exclude:
-                        print(f"Skipping category: {category_name}")
-                        continue  # Skip to the next category
-
-                    # Initialize the list for dishes in this category
-                    menu[category_name] = []
-
-                    # Selectors to find all dish items within this category
-                    dish_item_selectors = [
-                        {'type': 'xpath', 'value': './/div/ul/li'},
-                        {'type': 'xpath', 'value': './/ul/li'},
-                        {'type': 'xpath', 'value': './/div[@role="listitem"]'},
-                    ]
-                    dish_items = find_elements_by_selectors(category, dish_item_selectors)
-
-                    for dish in dish_items:
-                        dish_name = "Not found"
-                        dish_price = None  # Initialize as None
-                        dish_description = ""
-                        dish_img_url = ""
-
-                        # Dish name selectors
-                        dish_name_selectors = [
-                            {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[1]/span'},
-                            {'type': 'xpath', 'value': './/h4'},
-                            {'type': 'xpath', 'value': './/span[contains(@class, "c1e c1f")]'},
-                            {'type': 'css', 'value': 'a > div > div > div > div > span'},
-                        ]
-                        dish_name_element = find_element_by_selectors(dish, dish_name_selectors)
-                        if dish_name_element:
-                            dish_name = dish_name_element.text.strip()
-                        else:
-                            print("Dish name not found")
-
-                        # Dish price selectors
-                        dish_price_selectors = [
-                            {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[2]/span'},
-                            {'type': 'xpath', 'value': './/div[contains(@class, "c1i")]/span'},
-                            {'type': 'css', 'value': 'a > div > div > div > div > span[data-test="menu-item-price"]'},
-                            {'type': 'xpath', 'value': './/span[contains(@data-test, "menu-item-price")]'},
-                        ]
-                        dish_price_element = find_element_by_selectors(dish, dish_price_selectors)
-                        if dish_price_element:
-                            try:
-                                price_text = dish_price_element.text
-                                price_text = price_text.replace('$', '').replace('£', '').replace('€', '').replace(',', '').strip()
-                                dish_price = int(float(price_text) * 100)
-                            except Exception as e:
-                                print(f"Dish price not found or could not be processed: {e}")
-                                dish_price = None
-                        else:
-                            print("Dish price element not found")
-
-                        # Dish description selectors
-                        dish_description_selectors = [
-                            {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[3]/div/span'},
-                            {'type': 'xpath', 'value': './/a/div/div[1]/div[1]/div[2]/div/span'},
-                            {'type': 'xpath', 'value': './/p[contains(@class, "menu-item-description")]'},
-                            {'type': 'xpath', 'value': './/div[contains(@class, "c1h c1k")]/span'},
-                            {'type': 'css', 'value': 'a > div > div > div > div > div > span'},
-                        ]
-                        dish_description_element = find_element_by_selectors(dish, dish_description_selectors)
-                        if dish_description_element:
-                            dish_description = dish_description_element.text.strip()
-                        else:
-                            dish_description = ""
-
-                        # Dish image selectors
-                        dish_image_selectors = [
-                            {'type': 'xpath', 'value': './/a/div/div[1]/div[2]/div[1]/picture/img'},
-                            {'type': 'xpath', 'value': './/img[contains(@class, "c1l")]'},
-                            {'type': 'css', 'value': 'img[data-test="menu-item-image"]'},
-                            {'type': 'xpath', 'value': './/img[contains(@src, "menu-items")]'},
-                        ]
-                        dish_img_element = find_element_by_selectors(dish, dish_image_selectors)
-                        if dish_img_element:
-                            dish_img_url = dish_img_element.get_attribute('src')
-                        else:
-                            dish_img_url = ""
-
-                        # Add the dish to the category list
-                        menu[category_name].append({
-                            'dish_name': dish_name,
-                            'dish_description': dish_description,
-                            'dish_img_url': dish_img_url,
-                            'dish_price': dish_price
-                        })
-
+                details = scrape_merchant_details_by_elements(driver)
         except Exception as e:
+            if is_browser_crash(e):
+                raise
             error_log.append(f"Error locating categories or dishes in {merchant_url}: {e}")
-            return  # Exit the function if categories cannot be found
+            record_merchant_failure(merchant_url, e, error_log, city, save_directory)
+            return  # Exit the function if the extraction failed
 
-        # Create a data structure to save, including merchant details and menu
-        data_to_save = {
-            'merchant_name': merchant_name,
-            'address': address,
-            'banner_image_url': banner_image_url,
-            'menu': menu,
-            'cities': [city],  # Initialize with the current city
-            'opening_times': opening_times,
-            'merchant_url': merchant_url,
-        }
-
-        # Sanitize merchant name for filename
-        filename = sanitize_filename(merchant_name)
-
-        # Full path to save the JSON file
-        file_path = os.path.join(save_directory, f"{filename}.json")
-
-        # Save the data to a JSON file
-        with open(file_path, 'w', encoding='utf-8') as json_file:
-            json.dump(data_to_save, json_file, ensure_ascii=False, indent=2)
+        # No category container matched: a selector problem, not worth retrying
+        if not details['category_count']:
+            error_log.append(f"No categories found in {merchant_url}")
+            record_merchant_failure(merchant_url, 'No categories found', error_log, city, save_directory, MISSING_SELECTOR)
+            return
 
-        print(f"Merchant data saved to {file_path}")
+        # Scrape opening times
+        opening_times = scrape_opening_times(driver)
 
-        # Update the master JSON file
-        update_master_json(data_to_save, master_json_path)
+        save_merchant(details, opening_times, merchant_url, city, save_directory)
 
-        # Add the merchant to the set of processed merchants
-        processed_merchants.add(merchant_url)
+        # Mark the merchant as processed
+        frontier.mark_done(merchant_url)
+        challenge_queue.mark_done(merchant_url)
+        retry_scheduler.record_success(merchant_url)
 
     except (WebDriverException, Exception) as e:
         error_log.append(f"Failed to scrape merchant at {merchant_url}: {e}")
         print(f"Failed to scrape merchant at {merchant_url}: {e}")
+        record_merchant_failure(merchant_url, e, error_log, city, save_directory)
+        if pool_worker and is_browser_crash(e):
+            raise
         return  # Exit the function if any exception occurs
 
-# Function to scrape all merchants in a category
-def scrape_category(category_url, error_log, city, save_directory):
-    try:
-        driver.get(category_url)
-
-        # Adding a wait to ensure the page has fully loaded
-        time.sleep(3)  # Initial wait time to allow loading
-
-        # Scroll to load all merchants
-        def scroll_to_load_merchants(driver, scrolls=50):
-            for _ in range(scrolls):
-                driver.execute_script("window.scrollBy(0, 400);")  # Scroll down by 400 pixels
-                time.sleep(0.1)  # Wait for new content to load
+# Function to load a category page and collect its canonical merchant URLs
+def collect_category_merchant_urls(category_url):
+    polite_get(driver, category_url)
 
-        scroll_to_load_merchants(driver)
+    # Wait until the page is ready instead of a fixed sleep
+    wait_until_ready(driver, 'uber_category')
 
-        # Selectors to find all merchant links
-        merchant_link_selectors = [
-            {'type': 'xpath', 'value': '//*[@id="main-content"]/div[4]/div/div/a'},
-            {'type': 'css', 'value': 'a[data-testid="store-card"]'},
-            {'type': 'xpath', 'value': '//a[contains(@href, "/ca/store/")]'},
-        ]
+    # Scroll to load all merchants
+    scroll_until_stable(driver, {'type': 'css', 'value': 'a[href*="/store/"]'}, max_steps=50, label=category_url)
 
-        # Find all merchant links
-        merchant_links = find_elements_by_selectors(driver, merchant_link_selectors)
+    # Selectors to find all merchant links
+    merchant_link_selectors = [
+        {'type': 'xpath', 'value': '//*[@id="main-content"]/div[4]/div/div/a'},
+        {'type': 'css', 'value': 'a[data-testid="store-card"]'},
+        {'type': 'xpath', 'value': '//a[contains(@href, "/ca/store/")]'},
+    ]
 
-        if not merchant_links:
-            print(f"No merchants found on the category page: {category_url}")
+    # Find all merchant links
+    merchant_links = find_elements_by_selectors(driver, merchant_link_selectors)
+
+    if not merchant_links:
+        return []
+
+    # Extract the URLs from the merchant links, reduced to the store ID path without tracking query strings
+    merchant_urls = []
+    for link in merchant_links:
+        href = link.get_attribute('href')
+        if href:
+            merchant_urls.append(canonical_store_url(href))
+
+    # Remove duplicate URLs, keeping the page order
+    return list(dict.fromkeys(merchant_urls))
+
+# Function to collect the merchants of a category, resuming from the frontier when it was already harvested
+def discover_category_merchants(category_url, city):
+    if frontier.is_page_harvested(category_url):
+        merchant_urls = frontier.pending('uber', source_page=category_url)
+        print(f"Category already harvested, {len(merchant_urls)} merchants left: {category_url}")
+        return merchant_urls
+
+    merchant_urls = collect_category_merchant_urls(category_url)
+    if not merchant_urls:
+        print(f"No merchants found on the category page: {category_url}")
+        return []
+    print(f"Found {len(merchant_urls)} merchants in category {category_url}")
+    frontier.add(merchant_urls, 'uber', city, category_url)
+    frontier.mark_page_harvested(category_url, 'uber', city, len(merchant_urls))
+    return merchant_urls
+
+# Function to scrape a deduplicated list of merchants, each visited once
+def scrape_merchants(merchant_urls, error_log, city, save_directory, pool=None):
+    try:
+        # Hand the merchants to the browser pool when one is running
+        if pool is not None:
+            print(f"Scraping {len(merchant_urls)} merchants in {city} with {pool.size} browsers")
+            pool.map(
+                lambda worker_driver, merchant_url: scrape_merchant(merchant_url, error_log, city, save_directory, worker_driver),
+                merchant_urls,
+            )
             return
 
-        # Extract the URLs from the merchant links
-        merchant_urls = []
-        for link in merchant_links:
-            href = link.get_attribute('href')
-            if href:
-                merchant_urls.append(href)
-
-        # Remove duplicate URLs
-        merchant_urls = list(set(merchant_urls))
-
         # Iterate over each merchant URL
         for index, merchant_url in enumerate(merchant_urls):
-            print(f"Scraping merchant {index + 1}/{len(merchant_urls)} in category {category_url}: {merchant_url}")
+            print(f"Scraping merchant {index + 1}/{len(merchant_urls)} in {city}: {merchant_url}")
             try:
                 scrape_merchant(merchant_url, error_log, city, save_directory)
             except Exception as e:
@@ -457,8 +468,45 @@ def scrape_category(category_url, error_log, city, save_directory):
                 print(f"Unexpected error with merchant at {merchant_url}: {e}")
 
     except Exception as e:
-        error_log.append(f"Failed to scrape category at {category_url}: {e}")
-        print(f"Failed to scrape category at {category_url}: {e}")
+        error_log.append(f"Failed to scrape merchants in {city}: {e}")
+        print(f"Failed to scrape merchants in {city}: {e}")
+
+# Function to retry the parked merchants whose retry window has passed (or that were cleared by hand)
+def retry_parked_merchants(error_log, pool=None):
+    due_by_city = {}
+    for item in challenge_queue.due('uber'):
+        due_by_city.setdefault(item['city'], []).append(item['url'])
+    for city, merchant_urls in due_by_city.items():
+        print(f"\nRetrying {len(merchant_urls)} parked merchants in {city}")
+        save_directory = os.path.join(base_save_directory, city or '')
+        os.makedirs(save_directory, exist_ok=True)
+        scrape_merchants(merchant_urls, error_log, city, save_directory, pool)
+
+# Function to export the legacy master.json from the append-only index
+def export_master_json():
+    if os.path.exists(master_index_path(master_json_path)):
+        count = export_master_dict(master_index_path(master_json_path), master_json_path)
+        print(f"Master JSON exported with {count} merchants: {master_json_path}")
+
+# Function to re-run the extraction on stored merchant pages without starting a browser
+def replay_snapshots(date=None):
+    error_log = []
+    count = 0
+    for merchant_url, city, html in snapshots.iter_snapshots('uber', date):
+        try:
+            details = parse_uber_merchant(html, merchant_url)
+            save_directory = os.path.join(base_save_directory, city or '')
+            os.makedirs(save_directory, exist_ok=True)
+            save_merchant(details, parse_opening_times(html), merchant_url, city, save_directory)
+            count += 1
+        except Exception as e:
+            error_log.append(f"Failed to replay merchant at {merchant_url}: {e}")
+            print(f"Failed to replay merchant at {merchant_url}: {e}")
+
+    export_master_json()
+    print(f"\nReplayed {count} merchant snapshots" + (f" from {date}" if date else ""))
+    for error in error_log:
+        print(error)
 
 # Main logic to traverse categories on the main page
 def main():
@@ -496,6 +544,22 @@ def main():
     # List to store errors
     error_log = []
 
+    # Canonical store URLs discovered so far across all cities and categories, and the raw link count
+    unique_merchants = set()
+    discovered_count = 0
+
+    # Pool of worker browsers for merchant pages; the main driver keeps the city and category pages
+    pool = None
+    if pool_size > 1:
+        pool = BrowserPool(
+            create_driver,
+            lambda worker_driver: worker_driver.quit(),
+            size=pool_size,
+            crash_exceptions=BROWSER_CRASH_EXCEPTIONS,
+            check_browser=lambda worker_driver: worker_driver.current_url,
+            item_retries=0,  # A crashed merchant is already queued by retry_scheduler
+        )
+
     # Iterate over each city
     for city in cities:
         formatted_city = format_city_name_for_url(city)
@@ -509,18 +573,13 @@ def main():
         os.makedirs(save_directory, exist_ok=True)
 
         try:
-            driver.get(main_category_url)
+            polite_get(driver, main_category_url)
 
-            # Adding a wait to ensure the page has fully loaded
-            time.sleep(3)  # Initial wait time to allow loading
+            # Wait until the page is ready instead of a fixed sleep
+            wait_until_ready(driver, 'uber_city')
 
             # Scroll to load all categories
-            def scroll_to_load_categories(driver, scrolls=10):
-                for _ in range(scrolls):
-                    driver.execute_script("window.scrollBy(0, 400);")  # Scroll down by 400 pixels
-                    time.sleep(0.1)  # Wait for new content to load
-
-            scroll_to_load_categories(driver)
+            scroll_until_stable(driver, {'type': 'css', 'value': 'a[href*="/ca/category/"]'}, max_steps=10, label=main_category_url)
 
             # Selectors to find all category links
             category_link_selectors = [
@@ -549,23 +608,62 @@ def main():
             # Remove duplicate URLs
             category_urls = list(set(category_urls))
 
-            # Iterate over each category URL
+            # Discovery phase: collect the merchants of every category before visiting any store
+            city_merchant_urls = []
             for index, category_url in enumerate(category_urls):
-                print(f"\nScraping category {index + 1}/{len(category_urls)} in {city}: {category_url}")
+                print(f"\nDiscovering category {index + 1}/{len(category_urls)} in {city}: {category_url}")
                 try:
-                    scrape_category(category_url, error_log, city, save_directory)
+                    merchant_urls = discover_category_merchants(category_url, city)
                 except Exception as e:
-                    error_log.append(f"Unexpected error with category at {category_url}: {e}")
-                    print(f"Unexpected error with category at {category_url}: {e}")
+                    error_log.append(f"Failed to scrape category at {category_url}: {e}")
+                    print(f"Failed to scrape category at {category_url}: {e}")
+                    continue
+                discovered_count += len(merchant_urls)
+                for merchant_url in merchant_urls:
+                    if merchant_url not in unique_merchants:
+                        unique_merchants.add(merchant_url)
+                        city_merchant_urls.append(merchant_url)
+
+            print(f"\n{city}: {len(city_merchant_urls)} unique merchants to scrape from {len(category_urls)} categories")
+
+            # Scrape each store once
+            scrape_merchants(city_merchant_urls, error_log, city, save_directory, pool)
 
         except Exception as e:
             error_log.append(f"Failed to process city {city}: {e}")
             print(f"Failed to process city {city}: {e}")
 
-    # Close the WebDriver
+    # Retry the merchants that failed on a transient error, with backoff, before the parked ones
+    if retry_scheduler.pending():
+        print(f"\nRetried {retry_scheduler.run(scrape_merchant)} failed merchants")
+
+    # Retry the merchants parked on a challenge page, in this run or an earlier one
+    retry_parked_merchants(error_log, pool)
+
+    # Export the legacy master.json from the append-only index
+    export_master_json()
+
+    # Close the worker browsers and the WebDriver
+    if pool is not None:
+        pool.close()
     driver.quit()
     print("\nScraping completed.")
 
+    # Report how many store visits the discovery phase saved
+    print(f"\nDiscovered {discovered_count} merchant links, {len(unique_merchants)} unique stores "
+          f"({discovered_count - len(unique_merchants)} duplicate visits saved)")
+
+    # Report the frontier state, how long pages took to become ready and how much scrolling was needed
+    print_frontier_report(frontier, 'uber')
+    print_ready_report()
+    print_scroll_report()
+    print_rate_report()
+    print_selector_report()
+    print_snapshot_report(snapshots)
+    print_challenge_report('uber')
+    print_failure_report('uber')
+    retry_scheduler.write_report(os.path.join(base_save_directory, 'failure_report.json'), 'uber')
+
     # Report errors after the scraping is done
     if error_log:
         print("\nErrors encountered during scraping:")
@@ -574,5 +672,13 @@ def main():
     else:
         print("\nNo errors encountered during scraping.")
 
+# Usage: python uber_final.py [--fresh] [--replay [--date YYYY-MM-DD]]
+#   --fresh  harvests every list page and scrapes every merchant again, ignoring what earlier runs finished
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    replay, replay_date = replay_arguments(sys.argv[1:])
+    if replay:
+        replay_snapshots(replay_date)
+    else:
+        if '--fresh' in sys.argv[1:]:
+            frontier.start_fresh()
+        main()
\ No newline at end of file
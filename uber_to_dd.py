@@ -3,56 +3,27 @@ import json
 import os
 import re
 import random
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import (
-    NoSuchElementException,
     TimeoutException,
     WebDriverException,
 )
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-
-# Setup Chrome options
-options = webdriver.ChromeOptions()
-# options.add_argument("--headless")  # Uncomment this if you want to run headless
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
+from browser_factory import LazyDriver, create_chrome_driver, chrome_options
+from page_ready import wait_until_ready, print_ready_report
+from lazy_scroll import scroll_until_stable, print_scroll_report
+from rate_limiter import polite_get, print_rate_report
+from master_store import append_master_record, master_index_path, export_master_dict
+from selector_lookup import find_element_by_selectors, find_elements_by_selectors
+from selector_stats import print_selector_report
+from retry_scheduler import retry_scheduler, print_failure_report
+
+# Setup Chrome options from the run's browser profile (SCRAPER_PROFILE=debug for a visible 1920x1080 window)
+options = chrome_options()
 options.add_argument("--force-device-scale-factor=1")
-options.add_argument("--window-size=1920,1080")  # Set a larger window size
 
-# Initialize the WebDriver
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()), options=options
-)
-
-# Function to find an element using multiple selectors
-def find_element_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                return context.find_element(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                return context.find_element(By.CSS_SELECTOR, selector['value'])
-        except NoSuchElementException:
-            continue
-    return None  # If none of the selectors match
-
-# Function to find multiple elements using multiple selectors
-def find_elements_by_selectors(context, selectors):
-    for selector in selectors:
-        try:
-            if selector['type'] == 'xpath':
-                elements = context.find_elements(By.XPATH, selector['value'])
-            elif selector['type'] == 'css':
-                elements = context.find_elements(By.CSS_SELECTOR, selector['value'])
-            if elements:
-                return elements
-        except NoSuchElementException:
-            continue
-    return []  # If none of the selectors match
+# Initialize the WebDriver lazily: Chrome starts on the first page load, not at import
+driver = LazyDriver(lambda: create_chrome_driver(options))
 
 # Function to sanitize filenames
 def sanitize_filename(name):
@@ -73,30 +44,17 @@ processed_merchants = set()
 base_save_directory = r'D:\Doordash\doordash_menu'
 master_json_path = os.path.join(base_save_directory, 'master.json')
 
-# Function to update the master JSON file
+# Function to record a merchant in the append-only master index (master.json is exported at the end of the run)
 def update_master_json(data_to_save, master_json_path):
-    # If the master JSON does not exist, create an empty dict
-    if os.path.exists(master_json_path):
-        with open(master_json_path, 'r', encoding='utf-8') as f:
-            master_data = json.load(f)
-    else:
-        master_data = {}
-
-    # Use merchant name as key
-    merchant_name = data_to_save['merchant_name']
-
-    # Update or add the merchant data
-    master_data[merchant_name] = {
+    # Update or add the merchant data, keyed by URL
+    append_master_record(master_index_path(master_json_path), {
+        'merchant_name': data_to_save['merchant_name'],
         'address': data_to_save['address'],
         'url': data_to_save.get('merchant_url', ''),
         'banner_image_url': data_to_save.get('banner_image_url', ''),
         'cities': data_to_save.get('cities', []),
         # Add other relevant data if needed
-    }
-
-    # Save the updated master data
-    with open(master_json_path, 'w', encoding='utf-8') as f:
-        json.dump(master_data, f, ensure_ascii=False, indent=2)
+    })
 
 # Function to scrape a single merchant
 def scrape_merchant(merchant_url, error_log, city, save_directory):
@@ -105,19 +63,13 @@ def scrape_merchant(merchant_url, error_log, city, save_directory):
         print(f"Merchant already processed: {merchant_url}")
         return
     try:
-        driver.get(merchant_url)
+        polite_get(driver, merchant_url)
 
-        # Adding a wait to ensure the page has fully loaded
-        time.sleep(3)  # Initial wait time to allow loading
+        # Wait until the page is ready instead of a fixed sleep
+        wait_until_ready(driver, 'doordash_store')
 
-        # Function to incrementally scroll down the page until no more content loads
-        def scroll_to_bottom(driver, scrolls=100):
-            for _ in range(scrolls):
-                driver.execute_script("window.scrollBy(0, 200);")  # Scroll down by 200 pixels
-                time.sleep(0.1)  # Wait for new content to load
-
-        # Execute the scrolling function to load all dishes
-        scroll_to_bottom(driver)
+        # Scroll until the menu stops growing
+        scroll_until_stable(driver, {'type': 'css', 'value': '#main-content ul li'}, max_steps=100, label=merchant_url)
 
         # Scrape merchant name
         merchant_name_selectors = [
@@ -311,27 +263,25 @@ def scrape_merchant(merchant_url, error_log, city, save_directory):
 
         # Add the merchant to the set of processed merchants
         processed_merchants.add(merchant_url)
+        retry_scheduler.record_success(merchant_url)
 
     except (WebDriverException, Exception) as e:
         error_log.append(f"Failed to scrape merchant at {merchant_url}: {e}")
         print(f"Failed to scrape merchant at {merchant_url}: {e}")
+        # Queue the merchant for a retry with backoff when the failure is transient
+        retry_scheduler.record_failure(merchant_url, e, 'doordash', city, (error_log, city, save_directory))
         return  # Exit the function if any exception occurs
 
 # Function to scrape all merchants on a city's page
 def scrape_city(city_url, error_log, city, save_directory):
     try:
-        driver.get(city_url)
+        polite_get(driver, city_url)
 
-        # Adding a wait to ensure the page has fully loaded
-        time.sleep(3)  # Initial wait time to allow loading
+        # Wait until the page is ready instead of a fixed sleep
+        wait_until_ready(driver, 'doordash_city')
 
         # Scroll to load all merchants
-        def scroll_to_load_merchants(driver, scrolls=100):
-            for _ in range(scrolls):
-                driver.execute_script("window.scrollBy(0, 400);")  # Scroll down by 400 pixels
-                time.sleep(random.uniform(0.5, 4))  # Wait for new content to load
-
-        scroll_to_load_merchants(driver)
+        scroll_until_stable(driver, {'type': 'css', 'value': 'a[href*="/store/"]'}, max_steps=100, stable_time=3, label=city_url)
 
         # Selectors to find all merchant links
         merchant_link_selectors = [
@@ -424,10 +374,27 @@ def main():
             error_log.append(f"Failed to process city {city}: {e}")
             print(f"Failed to process city {city}: {e}")
 
+    # Retry the merchants that failed on a transient error, with backoff
+    if retry_scheduler.pending():
+        print(f"\nRetried {retry_scheduler.run(scrape_merchant)} failed merchants")
+
+    # Export the legacy master.json from the append-only index
+    if os.path.exists(master_index_path(master_json_path)):
+        count = export_master_dict(master_index_path(master_json_path), master_json_path)
+        print(f"Master JSON exported with {count} merchants: {master_json_path}")
+
     # Close the WebDriver
     driver.quit()
     print("\nScraping completed.")
 
+    # Report how long pages took to become ready and how much scrolling was needed
+    print_ready_report()
+    print_scroll_report()
+    print_rate_report()
+    print_selector_report()
+    print_failure_report()
+    retry_scheduler.write_report(os.path.join(base_save_directory, 'failure_report.json'))
+
     # Report errors after the scraping is done
     if error_log:
         print("\nErrors encountered during scraping:")
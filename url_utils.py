@@ -0,0 +1,26 @@
+# URL canonicalization shared by the scrapers, so the same store reached through different
+# categories or with tracking query strings (srsltid=, utm_*) is recognised as one store.
+import sys
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+UBER_BASE_URL = 'https://www.ubereats.com'
+
+# Function to strip the query string, fragment and trailing slash from a URL
+def canonical_url(url, base_url=''):
+    parts = urlsplit(urljoin(base_url, url.strip()))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, '', ''))
+
+# Function to reduce a store URL to its store ID path (/<region>/store/<slug>/<store id>), query stripped
+def canonical_store_url(url, base_url=UBER_BASE_URL):
+    parts = urlsplit(canonical_url(url, base_url))
+    segments = parts.path.strip('/').split('/')
+    if 'store' in segments:
+        # Drop anything after the store ID, e.g. an item path opened from the menu
+        segments = segments[:segments.index('store') + 3]
+    return urlunsplit((parts.scheme, parts.netloc, '/' + '/'.join(segments), '', ''))
+
+# Usage: python url_utils.py <url> [<url> ...] - prints the canonical store URL of each argument
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        print(canonical_store_url(arg))